@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app import deps
 from app.db import models
 from app import schemas
+from app.services import ai_service, analytics_rollup, daily_stats, job_queue, trend_jobs
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.realtime import hub
+from app.db.database import pool_stats
+from app.db.pagination import paginate
 
 router = APIRouter()
 
@@ -44,20 +50,28 @@ def get_pending_mentors(
 
 @router.get("/users/students", response_model=List[schemas.UserResponse])
 def get_all_students(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = settings.PAGE_SIZE_DEFAULT,
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
     check_admin(current_user)
-    students = db.query(models.User).filter(models.User.role == "student").all()
+    query = db.query(models.User).filter(models.User.role == "student")
+    students = paginate(query, [models.User.id], cursor, limit, response, descending=False)
     return students
 
 @router.get("/users/mentors", response_model=List[schemas.UserResponse])
 def get_all_mentors(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = settings.PAGE_SIZE_DEFAULT,
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
     check_admin(current_user)
-    mentors = db.query(models.User).filter(models.User.role == "mentor").all()
+    query = db.query(models.User).filter(models.User.role == "mentor")
+    mentors = paginate(query, [models.User.id], cursor, limit, response, descending=False)
     return mentors
 
 @router.post("/opportunities", response_model=schemas.OpportunityResponse)
@@ -83,6 +97,8 @@ def create_admin_opportunity(
         mentor_id=current_user.id
     )
     db.add(db_opportunity)
+    db.flush()
+    daily_stats.record(db, daily_stats.FUNDING_COMMITTED, current_user.id, db_opportunity.id, amount=db_opportunity.funding_amount or 0)
     db.commit()
     db.refresh(db_opportunity)
     
@@ -102,10 +118,104 @@ def create_admin_opportunity(
 
 @router.get("/applications", response_model=List[schemas.ApplicationResponse])
 def get_all_applications(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = settings.PAGE_SIZE_DEFAULT,
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
     check_admin(current_user)
-    applications = db.query(models.Application).all()
+    applications = paginate(
+        db.query(models.Application),
+        [models.Application.created_at, models.Application.id], cursor, limit, response
+    )
     return applications
 
+
+@router.get("/embeddings/cache")
+def get_embedding_cache_stats(
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    check_admin(current_user)
+    return ai_service.embedding_cache_stats()
+
+@router.get("/cache")
+def get_cache_stats(
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    check_admin(current_user)
+    return {
+        "app": cache.stats(),
+        "llm_responses": ai_service.response_cache_stats(),
+        "embeddings": ai_service.embedding_cache_stats()
+    }
+
+@router.get("/db/pool")
+def get_db_pool_stats(
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    check_admin(current_user)
+    return pool_stats()
+
+@router.get("/realtime")
+def get_realtime_stats(
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    check_admin(current_user)
+    return hub.stats()
+
+@router.post("/analytics/refresh")
+def refresh_dashboard_stats(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    """Rebuilds the /analytics/dashboard rollups now instead of on the next stale read."""
+    check_admin(current_user)
+    mentors = analytics_rollup.refresh(db)
+    return {"mentors": mentors}
+
+@router.post("/trends/recompute")
+def recompute_trends(
+    scope: str = "changed",
+    priority: int = 0,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    """
+    Recomputes topic trends for every mentor ("all") or those whose publications
+    changed ("changed"). Resumes an interrupted run instead of starting a new one.
+    Queued for the job worker; poll the run or the returned job for progress.
+    """
+    check_admin(current_user)
+    if scope not in trend_jobs.SCOPES:
+        raise HTTPException(status_code=400, detail=f"scope must be one of {', '.join(trend_jobs.SCOPES)}")
+    try:
+        run, resumed = trend_jobs.start_run(db, scope)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    job = job_queue.enqueue(db, job_queue.TREND_RUN, payload={"run_id": run.id}, priority=priority)
+    return {"run_id": run.id, "resumed": resumed, "total": run.total, "job_id": job.id}
+
+@router.get("/trends/runs/latest")
+def get_latest_trend_run(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    check_admin(current_user)
+    summary = trend_jobs.run_status(db)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="No trend runs yet")
+    return summary
+
+@router.get("/trends/runs/{run_id}")
+def get_trend_run(
+    run_id: int,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    """Progress of a recompute run, with per-mentor timings (slowest first)."""
+    check_admin(current_user)
+    summary = trend_jobs.run_status(db, run_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Trend run not found")
+    return summary
@@ -1,14 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.database import get_db
+from app.db.database import get_async_db, run_in_session
 from app.db import models
-from app.deps import get_current_user
+from app.deps import get_current_user_async
 from app.services import ai_service
+from app.core.cancellation import run_cancellable
 from pydantic import BaseModel
 from typing import List, Optional
+import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Disable proxy buffering so tokens reach the browser as they are generated
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 class AIAnalysisRequest(BaseModel):
     opportunity_id: int
 
@@ -91,8 +101,9 @@ def format_opportunity(opp: models.Opportunity) -> str:
 @router.post("/match-analysis", response_model=MatchAnalysisResponse)
 async def analyze_match(
     request: AIAnalysisRequest,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    http_request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
 ):
     """
     Analyzes the match between the current user's profile and the specified opportunity.
@@ -100,28 +111,45 @@ async def analyze_match(
     if current_user.role != "student":
          raise HTTPException(status_code=403, detail="Only students can request match analysis")
          
+    resume_text, job_desc = await run_in_session(db, _load_application_texts, request.opportunity_id, current_user.id)
+    
+    result = await run_cancellable(http_request, ai_service.analyze_match(resume_text, job_desc))
+    
+    return result
+
+def _load_application_texts(db: Session, opportunity_id: int, user_id: int):
+    """
+    Returns (resume_text, job_desc) for the student and the given opportunity.
+    Sync ORM code: async routes call it through run_in_session.
+    """
     # Fetch Opportunity
-    opportunity = db.query(models.Opportunity).filter(models.Opportunity.id == request.opportunity_id).first()
+    opportunity = db.query(models.Opportunity).filter(models.Opportunity.id == opportunity_id).first()
     if not opportunity:
         raise HTTPException(status_code=404, detail="Opportunity not found")
         
     # Fetch Student Profile
-    profile = db.query(models.StudentProfile).filter(models.StudentProfile.user_id == current_user.id).first()
+    profile = db.query(models.StudentProfile).filter(models.StudentProfile.user_id == user_id).first()
     if not profile:
         raise HTTPException(status_code=400, detail="Student profile not found. Please complete your profile first.")
         
-    resume_text = format_student_profile(profile)
-    job_desc = format_opportunity(opportunity)
-    
-    result = await ai_service.analyze_match(resume_text, job_desc)
-    
-    return result
+    return format_student_profile(profile), format_opportunity(opportunity)
+
+def _sse(event: str, data) -> str:
+    """Formats one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _stream_error_detail(error: Exception, fallback: str) -> str:
+    # Headers are already sent once streaming starts, so errors travel as an `error` event
+    if "GEMINI_API_KEY is not set" in str(error):
+        return "Please add GEMINI_API_KEY to your .env file to enable AI features."
+    return fallback
 
 @router.post("/cover-letter", response_model=CoverLetterResponse)
 async def generate_cover_letter(
     request: AIAnalysisRequest,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    http_request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
 ):
     """
     Generates a cover letter for the specified opportunity based on the user's profile.
@@ -129,37 +157,45 @@ async def generate_cover_letter(
     if current_user.role != "student":
          raise HTTPException(status_code=403, detail="Only students can generate cover letters")
          
-    # Fetch Opportunity
-    opportunity = db.query(models.Opportunity).filter(models.Opportunity.id == request.opportunity_id).first()
-    if not opportunity:
-        raise HTTPException(status_code=404, detail="Opportunity not found")
-        
-    # Fetch Student Profile
-    profile = db.query(models.StudentProfile).filter(models.StudentProfile.user_id == current_user.id).first()
-    if not profile:
-        raise HTTPException(status_code=400, detail="Student profile not found. Please complete your profile first.")
-        
-    resume_text = format_student_profile(profile)
-    job_desc = format_opportunity(opportunity)
+    resume_text, job_desc = await run_in_session(db, _load_application_texts, request.opportunity_id, current_user.id)
     
-    cover_letter = await ai_service.generate_cover_letter(resume_text, job_desc)
+    cover_letter = await run_cancellable(http_request, ai_service.generate_cover_letter(resume_text, job_desc))
     
     return {"cover_letter": cover_letter}
 
-@router.post("/proposal-guidance", response_model=ProposalGuidanceResponse)
-async def get_proposal_guidance(
-    request: ProposalGuidanceRequest,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+@router.post("/cover-letter/stream")
+async def stream_cover_letter(
+    request: AIAnalysisRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
 ):
     """
-    Generates structured proposal guidance, supervisor talking points, and a readiness check.
+    Server-Sent Events variant of /cover-letter: emits `token` events with text chunks
+    as Gemini generates them, then a final `done` (or `error`) event.
     """
     if current_user.role != "student":
-         raise HTTPException(status_code=403, detail="Only students can request proposal guidance")
+         raise HTTPException(status_code=403, detail="Only students can generate cover letters")
+         
+    resume_text, job_desc = await run_in_session(db, _load_application_texts, request.opportunity_id, current_user.id)
+
+    async def events():
+        try:
+            async for chunk in ai_service.stream_cover_letter(resume_text, job_desc):
+                yield _sse("token", {"text": chunk})
+            yield _sse("done", {})
+        except Exception as e:
+            logger.error(f"Error streaming cover letter: {str(e)}")
+            yield _sse("error", {"detail": _stream_error_detail(e, "Error generating cover letter. Please try again later.")})
 
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+def _load_proposal_inputs(db: Session, request: ProposalGuidanceRequest, user_id: int):
+    """
+    Returns the (student, mentor, gap) dicts ai_service expects for proposal guidance.
+    Sync ORM code: async routes call it through run_in_session.
+    """
     # Fetch Student Profile
-    student = db.query(models.StudentProfile).filter(models.StudentProfile.user_id == current_user.id).first()
+    student = db.query(models.StudentProfile).filter(models.StudentProfile.user_id == user_id).first()
     if not student:
         raise HTTPException(status_code=404, detail="Student profile not found")
 
@@ -192,5 +228,51 @@ async def get_proposal_guidance(
         "description": request.gap_description
     }
 
-    result = await ai_service.generate_proposal_guidance(student_data, mentor_data, gap_data)
+    return student_data, mentor_data, gap_data
+
+@router.post("/proposal-guidance", response_model=ProposalGuidanceResponse)
+async def get_proposal_guidance(
+    request: ProposalGuidanceRequest,
+    http_request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    """
+    Generates structured proposal guidance, supervisor talking points, and a readiness check.
+    """
+    if current_user.role != "student":
+         raise HTTPException(status_code=403, detail="Only students can request proposal guidance")
+
+    student_data, mentor_data, gap_data = await run_in_session(db, _load_proposal_inputs, request, current_user.id)
+
+    result = await run_cancellable(
+        http_request, ai_service.generate_proposal_guidance(student_data, mentor_data, gap_data)
+    )
     return result
+
+@router.post("/proposal-guidance/stream")
+async def stream_proposal_guidance(
+    request: ProposalGuidanceRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    """
+    Server-Sent Events variant of /proposal-guidance: emits one `section` event per
+    top-level key ("proposal_direction", "talking_points", "readiness_check") as soon as
+    it has been fully generated, so the UI can render progressively.
+    """
+    if current_user.role != "student":
+         raise HTTPException(status_code=403, detail="Only students can request proposal guidance")
+
+    student_data, mentor_data, gap_data = await run_in_session(db, _load_proposal_inputs, request, current_user.id)
+
+    async def events():
+        try:
+            async for key, value in ai_service.stream_proposal_guidance(student_data, mentor_data, gap_data):
+                yield _sse("section", {"key": key, "value": value})
+            yield _sse("done", {})
+        except Exception as e:
+            logger.error(f"Error streaming proposal guidance: {str(e)}")
+            yield _sse("error", {"detail": _stream_error_detail(e, "Error generating guidance. Please try again later.")})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
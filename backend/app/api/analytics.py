@@ -1,77 +1,104 @@
-from fastapi import APIRouter, Depends
+from datetime import date, datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from app.core.config import settings
 from app.db.database import get_db
-from app.db.models import User, Opportunity, Application, Certificate, PublicationProject
+from app.db.models import Opportunity, User
 from app.deps import get_current_user
+from app.services import analytics_rollup, daily_stats
 
 router = APIRouter()
 
 @router.get("/dashboard")
 def get_analytics_dashboard(
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # Determine scope based on user role
-    if current_user.role == "mentor":
-        # Mentor-specific analytics
-        total_opportunities = db.query(Opportunity).filter(Opportunity.mentor_id == current_user.id).count()
-        
-        # Applications to this mentor's opportunities
-        total_applications = db.query(Application).join(Opportunity).filter(Opportunity.mentor_id == current_user.id).count()
-        
-        # Unique students who applied to this mentor
-        total_students = db.query(Application.student_id).join(Opportunity).filter(Opportunity.mentor_id == current_user.id).distinct().count()
-        
-        # Mentor isn't tracking other mentors
-        total_mentors = 0
-        
-        # Research projects
-        active_projects = db.query(PublicationProject).filter(
-            PublicationProject.mentor_id == current_user.id, 
-            PublicationProject.status != "Published"
-        ).count()
-        
-        published_projects = db.query(PublicationProject).filter(
-            PublicationProject.mentor_id == current_user.id, 
-            PublicationProject.status == "Published"
-        ).count()
-        
-        # Certificates issued by this mentor
-        certificates_issued = db.query(Certificate).filter(Certificate.mentor_id == current_user.id).count()
-        
-        # Funding for this mentor's opportunities
-        total_funding = db.query(func.sum(Opportunity.funding_amount)).filter(Opportunity.mentor_id == current_user.id).scalar() or 0.0
-        
-    else:
-        # Admin / Platform-wide analytics (Default for Admin)
-        total_students = db.query(User).filter(User.role == "student").count()
-        total_mentors = db.query(User).filter(User.role == "mentor").count()
-        total_opportunities = db.query(Opportunity).count()
-        total_applications = db.query(Application).count()
-        active_projects = db.query(PublicationProject).filter(PublicationProject.status != "Published").count()
-        published_projects = db.query(PublicationProject).filter(PublicationProject.status == "Published").count()
-        certificates_issued = db.query(Certificate).count()
-        
-        # Funding Stats
-        total_funding = db.query(func.sum(Opportunity.funding_amount)).scalar() or 0.0
-    
+    # Determine scope based on user role: mentors see their own numbers,
+    # everyone else (admins) the platform-wide ones
+    mentor_id = current_user.id if current_user.role == "mentor" else None
+
+    # Read from the rollup table; a stale or missing rollup is still answered
+    # (from the old row, or one live query) while a refresh runs afterwards
+    stats, as_of, source = analytics_rollup.dashboard_stats(db, mentor_id)
+    if source == "live" or analytics_rollup.is_stale(as_of):
+        background_tasks.add_task(analytics_rollup.refresh_if_stale, db.get_bind())
+
     return {
         "users": {
-            "students": total_students,
-            "mentors": total_mentors
+            "students": stats["students"],
+            "mentors": stats["mentors"]
         },
         "engagement": {
-            "opportunities": total_opportunities,
-            "applications": total_applications,
-            "certificates": certificates_issued
+            "opportunities": stats["opportunities"],
+            "applications": stats["applications"],
+            "certificates": stats["certificates"]
         },
         "research": {
-            "active": active_projects,
-            "published": published_projects
+            "active": stats["active_projects"],
+            "published": stats["published_projects"]
         },
         "funding": {
-            "total_committed": total_funding,
+            "total_committed": stats["total_funding"] or 0.0,
             "currency": "USD"
-        }
+        },
+        "as_of": as_of, # When these numbers were computed (UTC)
+        "source": source
+    }
+
+@router.get("/timeseries/{metric}")
+def get_analytics_timeseries(
+    metric: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    interval: Optional[str] = None,
+    mentor_id: Optional[int] = None,
+    opportunity_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    A metric over time from the daily buckets (last 30 days by default). Points are
+    summed into days, weeks or months: `interval` if given, but never finer than it
+    takes to stay within ANALYTICS_MAX_POINTS. Mentors see their own numbers; admins the platform's,
+    or one mentor's with ?mentor_id=. acceptance_rate is accepted / received per point.
+    """
+    if metric not in daily_stats.METRICS and metric not in daily_stats.DERIVED:
+        raise HTTPException(status_code=404, detail=f"Unknown metric {metric!r}")
+    if interval is not None and interval not in daily_stats.INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of {', '.join(daily_stats.INTERVALS)}")
+
+    if current_user.role == "mentor":
+        mentor_id = current_user.id
+    elif current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only mentors and admins can view analytics")
+
+    if opportunity_id is not None:
+        opportunity = db.query(Opportunity).filter(Opportunity.id == opportunity_id).first()
+        if not opportunity or (mentor_id is not None and opportunity.mentor_id != mentor_id):
+            raise HTTPException(status_code=404, detail="Opportunity not found")
+        # Buckets are keyed by mentor first
+        mentor_id = opportunity.mentor_id or 0
+
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days >= settings.ANALYTICS_MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {settings.ANALYTICS_MAX_RANGE_DAYS} days")
+    # A requested interval too fine for the range is coarsened to stay within the point budget
+    coarsest = daily_stats.pick_interval(start, end, settings.ANALYTICS_MAX_POINTS)
+    if interval is None or daily_stats.INTERVALS.index(interval) < daily_stats.INTERVALS.index(coarsest):
+        interval = coarsest
+
+    points, total = daily_stats.series(db, metric, start, end, interval, mentor_id, opportunity_id)
+    return {
+        "metric": metric,
+        "interval": interval,
+        "start": start,
+        "end": end,
+        "total": total,
+        "points": [{"date": day, "value": value} for day, value in points]
     }
@@ -1,14 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session, joinedload
-from typing import List
+from typing import List, Optional
 import json
 from datetime import datetime
 from app.db.database import get_db
 from app.db.models import Application, Opportunity, User, Message, StudentProfile
 from app.schemas import ApplicationCreate, ApplicationResponse, ApplicationUpdate
 from app.deps import get_current_user
+from app.db.pagination import paginate
 from app.services.matching import calculate_match_score
 from app.services.twilio_service import send_whatsapp_message
+from app.services import conversations, daily_stats
+from app.core import events
 from app.core.config import settings
 
 router = APIRouter()
@@ -53,6 +56,7 @@ def create_application(
         match_details=json.dumps(details)
     )
     db.add(new_application)
+    daily_stats.record(db, daily_stats.APPLICATIONS, opportunity.mentor_id, opportunity.id)
     db.commit()
     db.refresh(new_application)
     return new_application
@@ -70,6 +74,9 @@ def read_my_applications(
 
 @router.get("/mentor", response_model=List[ApplicationResponse])
 def read_mentor_applications(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = settings.PAGE_SIZE_DEFAULT,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -77,7 +84,7 @@ def read_mentor_applications(
         raise HTTPException(status_code=403, detail="Only mentors can view applications for their opportunities")
     
     # Join Opportunity to filter by mentor_id and order by match_score descending (Ranked Applicants)
-    applications = db.query(Application)\
+    query = db.query(Application)\
         .join(Opportunity)\
         .options(
             joinedload(Application.student).joinedload(User.student_profile).joinedload(StudentProfile.projects),
@@ -85,9 +92,8 @@ def read_mentor_applications(
             joinedload(Application.student).joinedload(User.student_profile).joinedload(StudentProfile.work_experiences),
             joinedload(Application.opportunity)
         )\
-        .filter(Opportunity.mentor_id == current_user.id)\
-        .order_by(Application.match_score.desc())\
-        .all()
+        .filter(Opportunity.mentor_id == current_user.id)
+    applications = paginate(query, [Application.match_score, Application.id], cursor, limit, response)
     return applications
 
 @router.put("/{application_id}/status", response_model=ApplicationResponse)
@@ -116,6 +122,13 @@ def update_application_status(
     
     old_status = application.status
     application.status = status_update.status
+
+    # Acceptances count on the day they happen; withdrawing one takes it back
+    if (status_update.status == "accepted") != (old_status == "accepted"):
+        daily_stats.record(
+            db, daily_stats.APPLICATIONS_ACCEPTED, current_user.id, application.opportunity_id,
+            amount=1 if status_update.status == "accepted" else -1
+        )
     
     # Send notification if accepted
     if status_update.status == "accepted" and old_status != "accepted":
@@ -127,6 +140,8 @@ def update_application_status(
             timestamp=datetime.utcnow()
         )
         db.add(new_message)
+        db.flush()
+        conversations.record_message(db, new_message)
 
         # Send WhatsApp Notification
         student_phone = None
@@ -156,4 +171,6 @@ def update_application_status(
         
     db.commit()
     db.refresh(application)
+    if status_update.status == "accepted" and old_status != "accepted":
+        events.publish(events.MESSAGE_SENT, message=conversations.message_payload(new_message))
     return application
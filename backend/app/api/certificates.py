@@ -7,6 +7,7 @@ import uuid
 from app.db.database import get_db
 from app.db.models import User, Certificate, Opportunity
 from app.deps import get_current_user
+from app.services import daily_stats
 
 router = APIRouter()
 
@@ -57,6 +58,7 @@ def generate_certificate(
     )
     
     db.add(new_cert)
+    daily_stats.record(db, daily_stats.CERTIFICATES, current_user.id, data.opportunity_id)
     db.commit()
     db.refresh(new_cert)
     
@@ -1,15 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, WebSocket, WebSocketDisconnect, status
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, select
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
-from app.db.database import get_db
-from app.db.models import User, Message, Meeting
-from app.deps import get_current_user
+from app.core import events
+from app.core.config import settings
+from app.core.realtime import hub
+from app.db.database import get_db, AsyncSessionLocal, run_in_session
+from app.db.pagination import paginate
+from app.db.models import User, Message, Meeting, Conversation
+from app.deps import get_current_user, _email_from_token
+from app.services import conversations
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Set on chat history windows when there are more messages beyond the page
+HAS_MORE_HEADER = "X-Has-More"
+
 # --- Pydantic Models ---
 
 class MessageCreate(BaseModel):
@@ -27,6 +39,22 @@ class MessageResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ConversationResponse(BaseModel):
+    id: int # Partner's user id
+    name: Optional[str] = None
+    role: Optional[str] = None
+    last_message: Optional[str] = None
+    last_message_sender_id: Optional[int] = None
+    last_message_at: Optional[datetime] = None
+    unread_count: int = 0
+
+class MarkReadRequest(BaseModel):
+    up_to_id: Optional[int] = None # Newest message the client has shown; None marks everything
+
+class UnreadResponse(BaseModel):
+    marked: int = 0
+    unread_total: int
+
 class MeetingCreate(BaseModel):
     attendee_id: int # Or organizer if student calls it? Let's assume user invites other.
     title: str
@@ -47,6 +75,13 @@ class MeetingResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class MeetingUpdate(BaseModel):
+    title: Optional[str] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    status: Optional[str] = None # scheduled, completed, cancelled
+    link: Optional[str] = None
+
 # --- Chat Endpoints ---
 
 @router.post("/messages/", response_model=MessageResponse)
@@ -66,45 +101,89 @@ def send_message(
         content=msg.content
     )
     db.add(new_msg)
+    db.flush()
+    conversations.record_message(db, new_msg)
     db.commit()
     db.refresh(new_msg)
+    events.publish(events.MESSAGE_SENT, message=conversations.message_payload(new_msg))
     return new_msg
 
 @router.get("/messages/{other_user_id}", response_model=List[MessageResponse])
 def get_chat_history(
     other_user_id: int,
+    response: Response,
+    since_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    limit: int = settings.CHAT_PAGE_SIZE_DEFAULT,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # Get messages where (sender=me AND receiver=other) OR (sender=other AND receiver=me)
-    messages = db.query(Message).filter(
-        or_(
-            (Message.sender_id == current_user.id) & (Message.receiver_id == other_user_id),
-            (Message.sender_id == other_user_id) & (Message.receiver_id == current_user.id)
-        )
-    ).order_by(Message.timestamp).all()
-    
+    """
+    A window of the chat with another user, oldest first. Without parameters it is
+    the latest `limit` messages; ?before_id= pages back from the oldest one shown,
+    ?since_id= fetches only what arrived after the newest one. X-Has-More tells
+    whether another window lies in that direction.
+    """
+    if since_id is not None and before_id is not None:
+        raise HTTPException(status_code=400, detail="Use either since_id or before_id, not both")
+    limit = max(1, min(limit, settings.PAGE_SIZE_MAX))
+
+    # One extra row tells whether there is more
+    messages = conversations.conversation_window(
+        db, current_user.id, other_user_id, limit + 1, before_id=before_id, since_id=since_id
+    )
+    has_more = len(messages) > limit
+    if has_more:
+        messages = messages[:limit] if since_id is not None else messages[1:]
+    response.headers[HAS_MORE_HEADER] = "true" if has_more else "false"
     return messages
 
-@router.get("/conversations", response_model=List[dict]) # Return list of users chatted with
+@router.post("/messages/{other_user_id}/read", response_model=UnreadResponse)
+def mark_messages_read(
+    other_user_id: int,
+    body: MarkReadRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Marks everything the other user sent up to `up_to_id` as read, in one UPDATE."""
+    marked = conversations.mark_read(db, current_user.id, other_user_id, body.up_to_id)
+    db.commit()
+    if marked:
+        events.publish(events.MESSAGES_READ, reader_id=current_user.id, partner_id=other_user_id, up_to_id=body.up_to_id, count=marked)
+    return UnreadResponse(marked=marked, unread_total=conversations.unread_total(db, current_user.id))
+
+@router.get("/unread", response_model=UnreadResponse)
+def get_unread_total(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Unread messages across all conversations (the inbox badge)."""
+    return UnreadResponse(unread_total=conversations.unread_total(db, current_user.id))
+
+@router.get("/conversations", response_model=List[ConversationResponse]) # Return list of users chatted with
 def get_conversations(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = settings.PAGE_SIZE_DEFAULT,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # This is a bit complex in raw SQL, simplifying:
-    # Find all unique user IDs in sender_id or receiver_id where other side is current_user
-    sent = db.query(Message.receiver_id).filter(Message.sender_id == current_user.id).distinct()
-    received = db.query(Message.sender_id).filter(Message.receiver_id == current_user.id).distinct()
-    
-    user_ids = set([r[0] for r in sent] + [r[0] for r in received])
-    
-    users = []
-    for uid in user_ids:
-        u = db.query(User).filter(User.id == uid).first()
-        if u:
-            users.append({"id": u.id, "name": u.name, "role": u.role})
-            
-    return users
+    # Partner, last message and unread count per conversation, most recent first,
+    # read from the conversations summary in a single query
+    query = conversations.conversation_index(db, current_user.id)
+    rows = paginate(query, [Conversation.last_message_at, Conversation.id], cursor, limit, response)
+    return [
+        ConversationResponse(
+            id=row.partner.id,
+            name=row.partner.name,
+            role=row.partner.role,
+            last_message=row.last_message.content if row.last_message else None,
+            last_message_sender_id=row.last_message.sender_id if row.last_message else None,
+            last_message_at=row.last_message_at,
+            unread_count=row.unread_count
+        )
+        for row in rows
+    ]
 
 # --- Meeting Endpoints ---
 
@@ -126,8 +205,29 @@ def schedule_meeting(
     db.add(new_meeting)
     db.commit()
     db.refresh(new_meeting)
+    events.publish(events.MEETING_UPDATED, meeting=MeetingResponse.model_validate(new_meeting).model_dump(mode="json"))
     return new_meeting
 
+@router.put("/meetings/{meeting_id}", response_model=MeetingResponse)
+def update_meeting(
+    meeting_id: int,
+    update: MeetingUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    meeting = db.query(Meeting).filter(Meeting.id == meeting_id).first()
+    if not meeting:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    if current_user.id not in (meeting.organizer_id, meeting.attendee_id):
+        raise HTTPException(status_code=403, detail="Not authorized to update this meeting")
+
+    for field, value in update.model_dump(exclude_unset=True).items():
+        setattr(meeting, field, value)
+    db.commit()
+    db.refresh(meeting)
+    events.publish(events.MEETING_UPDATED, meeting=MeetingResponse.model_validate(meeting).model_dump(mode="json"))
+    return meeting
+
 @router.get("/meetings/", response_model=List[MeetingResponse])
 def get_my_meetings(
     db: Session = Depends(get_db),
@@ -136,3 +236,112 @@ def get_my_meetings(
     return db.query(Meeting).filter(
         or_(Meeting.organizer_id == current_user.id, Meeting.attendee_id == current_user.id)
     ).order_by(Meeting.start_time).all()
+
+# --- Real-time Push ---
+
+def _push_message(message: dict, **_):
+    hub.publish([message["sender_id"], message["receiver_id"]], {"type": "message.new", "message": message})
+
+def _push_read_receipt(reader_id: int, partner_id: int, up_to_id: Optional[int], count: int, **_):
+    # The partner learns their messages were read; the reader's other tabs clear the badge
+    hub.publish([reader_id, partner_id], {
+        "type": "message.read", "reader_id": reader_id, "partner_id": partner_id, "up_to_id": up_to_id, "count": count
+    })
+
+def _push_meeting(meeting: dict, **_):
+    hub.publish([meeting["organizer_id"], meeting["attendee_id"]], {"type": "meeting.updated", "meeting": meeting})
+
+events.subscribe(events.MESSAGE_SENT, _push_message)
+events.subscribe(events.MESSAGES_READ, _push_read_receipt)
+events.subscribe(events.MEETING_UPDATED, _push_meeting)
+
+async def _socket_user(token: str) -> Optional[User]:
+    try:
+        email = _email_from_token(token)
+    except HTTPException:
+        return None
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(User).where(User.email == email))).scalar_one_or_none()
+
+async def _mark_read(user_id: int, partner_id: int, up_to_id: Optional[int]):
+    async with AsyncSessionLocal() as db:
+        count = await run_in_session(db, conversations.mark_read, user_id, partner_id, up_to_id)
+        await db.commit()
+    if count:
+        # Handlers publish through the realtime broker, which may write to SQLite or Redis
+        await asyncio.to_thread(
+            events.publish, events.MESSAGES_READ, reader_id=user_id, partner_id=partner_id, up_to_id=up_to_id, count=count
+        )
+
+async def _forward_events(websocket: WebSocket, subscription, replayed_up_to: int):
+    while True:
+        event = await subscription.get()
+        if event["type"] == "message.new" and event["message"]["id"] <= replayed_up_to:
+            continue  # already sent by the since_id replay
+        await websocket.send_json(event)
+        if subscription.overflowed:
+            # The client fell behind; it reconnects with since_id to catch up
+            await websocket.close()
+            return
+
+async def _handle_client_frames(websocket: WebSocket, user_id: int):
+    while True:
+        try:
+            frame = await websocket.receive_json()
+            if frame.get("type") == "ping":
+                await websocket.send_json({"type": "pong"})
+            elif frame.get("type") == "read":
+                up_to_id = frame.get("up_to_id")
+                await _mark_read(user_id, int(frame["partner_id"]), int(up_to_id) if up_to_id is not None else None)
+            else:
+                await websocket.send_json({"type": "error", "detail": f"Unknown frame type {frame.get('type')!r}"})
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            await websocket.send_json({"type": "error", "detail": f"Invalid frame: {str(e)}"})
+
+@router.websocket("/ws")
+async def chat_socket(websocket: WebSocket, token: str = Query(...), since_id: Optional[int] = None):
+    """
+    Pushes message.new, message.read and meeting.updated events to the user. The JWT
+    comes as ?token= (browsers cannot set WebSocket headers); a reconnecting client
+    passes ?since_id=<newest message id it has> and first receives what it missed.
+    Client frames: {"type": "read", "partner_id", "up_to_id"} and {"type": "ping"}.
+    """
+    user = await _socket_user(token)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+
+    # Subscribe before the replay so nothing published in between is lost
+    subscription = hub.connect(user.id)
+    try:
+        replayed_up_to = 0
+        if since_id is not None:
+            async with AsyncSessionLocal() as db:
+                missed = await run_in_session(db, conversations.messages_since, user.id, since_id, settings.REALTIME_REPLAY_LIMIT)
+            for message in missed:
+                await websocket.send_json({"type": "message.new", "message": conversations.message_payload(message)})
+            replayed_up_to = missed[-1].id if missed else since_id
+            if len(missed) == settings.REALTIME_REPLAY_LIMIT:
+                # More than a replay's worth: the client should reload over REST
+                await websocket.send_json({"type": "resync"})
+
+        tasks = [
+            asyncio.create_task(_forward_events(websocket, subscription, replayed_up_to)),
+            asyncio.create_task(_handle_client_frames(websocket, user.id))
+        ]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # Also when this handler is cancelled; gathering retrieves every outcome,
+            # including one that finished (e.g. on the disconnect) before the cancel
+            for task in tasks:
+                task.cancel()
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception) and not isinstance(result, WebSocketDisconnect):
+                logger.error(f"Chat socket for user {user.id} failed: {str(result)}")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.disconnect(subscription)
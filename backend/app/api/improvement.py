@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-from app.db.database import get_db
+from app.db.database import get_db, get_async_db, run_in_session
 from app.db.models import User, Opportunity, ImprovementPlan, PlanItem, StudentProfile
-from app.deps import get_current_user
+from app.deps import get_current_user, get_current_user_async
 from app.services import ai_service
+from app.core.cancellation import run_cancellable
 
 router = APIRouter()
 
@@ -104,60 +106,48 @@ def format_opportunity(opp: Opportunity) -> str:
 
 # Endpoints
 
-@router.post("/generate/{opportunity_id}", response_model=ImprovementPlanResponse)
-async def generate_improvement_plan(
-    opportunity_id: int, 
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
-):
-    if current_user.role != "student":
-        raise HTTPException(status_code=403, detail="Only students can generate improvement plans")
-
+def _load_plan_inputs(db: Session, opportunity_id: int, user_id: int):
+    """
+    Returns (existing_plan_response, resume_text, job_desc, days_remaining).
+    Sync ORM code: the async route calls it through run_in_session.
+    """
     # Check if plan already exists
     existing_plan = db.query(ImprovementPlan).filter(
-        ImprovementPlan.student_id == current_user.id,
+        ImprovementPlan.student_id == user_id,
         ImprovementPlan.opportunity_id == opportunity_id
     ).first()
     
     if existing_plan:
-        return _format_plan_response(existing_plan)
+        return _format_plan_response(existing_plan), None, None, None
 
     opportunity = db.query(Opportunity).filter(Opportunity.id == opportunity_id).first()
     if not opportunity:
         raise HTTPException(status_code=404, detail="Opportunity not found")
 
     # Fetch Student Profile
-    profile = db.query(StudentProfile).filter(StudentProfile.user_id == current_user.id).first()
+    profile = db.query(StudentProfile).filter(StudentProfile.user_id == user_id).first()
     if not profile:
         raise HTTPException(status_code=400, detail="Student profile not found. Please complete your profile first.")
 
+    # Calculate days remaining (default 30 if no deadline)
+    days_remaining = 30
+    if opportunity.deadline:
+         delta = opportunity.deadline - datetime.utcnow()
+         if delta.days > 0:
+             days_remaining = delta.days
+
+    return None, format_student_profile(profile), format_opportunity(opportunity), days_remaining
+
+def _save_plan(db: Session, opportunity_id: int, user_id: int, ai_items: list):
     # Create Plan Record
     new_plan = ImprovementPlan(
-        student_id=current_user.id,
+        student_id=user_id,
         opportunity_id=opportunity_id,
         status="in_progress"
     )
     db.add(new_plan)
     db.flush() # Get ID
 
-    # Generate Plan Items via AI
-    resume_text = format_student_profile(profile)
-    job_desc = format_opportunity(opportunity)
-    
-    # Calculate days remaining (default 30 if no deadline)
-    days_remaining = 30
-    if opportunity.deadline:
-         delta = opportunity.deadline - datetime.utcnow()
-         if delta.days > 0:
-             days_remaining = delta.days
-    
-    ai_items = await ai_service.generate_improvement_plan(resume_text, job_desc, days_remaining)
-    
-    if not ai_items:
-        # Fallback to simple skill gap if AI fails
-        # (Simplified fallback omitted for brevity, but should handle error gracefully)
-        pass
-
     for item_data in ai_items:
         # Calculate absolute deadline date
         deadline_date = None
@@ -181,6 +171,34 @@ async def generate_improvement_plan(
     db.refresh(new_plan)
     return _format_plan_response(new_plan)
 
+@router.post("/generate/{opportunity_id}", response_model=ImprovementPlanResponse)
+async def generate_improvement_plan(
+    opportunity_id: int, 
+    http_request: Request,
+    db: AsyncSession = Depends(get_async_db), 
+    current_user: User = Depends(get_current_user_async)
+):
+    if current_user.role != "student":
+        raise HTTPException(status_code=403, detail="Only students can generate improvement plans")
+
+    existing_plan, resume_text, job_desc, days_remaining = await run_in_session(
+        db, _load_plan_inputs, opportunity_id, current_user.id
+    )
+    if existing_plan:
+        return existing_plan
+
+    # Generate Plan Items via AI (no transaction is held open meanwhile)
+    ai_items = await run_cancellable(
+        http_request, ai_service.generate_improvement_plan(resume_text, job_desc, days_remaining)
+    )
+    
+    if not ai_items:
+        # Fallback to simple skill gap if AI fails
+        # (Simplified fallback omitted for brevity, but should handle error gracefully)
+        pass
+
+    return await run_in_session(db, _save_plan, opportunity_id, current_user.id, ai_items)
+
 @router.get("/", response_model=List[ImprovementPlanResponse])
 def get_my_plans(
     db: Session = Depends(get_db),
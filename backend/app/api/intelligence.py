@@ -1,60 +1,87 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Any, Optional
 from pydantic import BaseModel
 from datetime import datetime
-from app.db.database import get_db
+from app.db.database import get_db, get_async_db, run_in_session
 from app.db.models import User, SavedResearchGap, MentorProfile
-from app.deps import get_current_user
+from app.deps import get_current_user, get_current_user_async
+from app.services import job_queue
 from app.services.research_service import ResearchService
-from app.core.cache import SimpleCache
+from app.core.cache import cache
+from app.core.cancellation import run_cancellable
 
 router = APIRouter()
-cache = SimpleCache()
+
+def _check_mentor_access(current_user: User, mentor_id: Optional[int]):
+    # Admin or the Mentor themselves
+    if current_user.role != "admin" and (current_user.mentor_profile is None or current_user.mentor_profile.id != mentor_id):
+        raise HTTPException(status_code=403, detail="Not authorized")
 
 @router.post("/mentors/{mentor_id}/ingest")
 async def ingest_publications(
     mentor_id: int,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
-    # Auth check: Admin or the Mentor themselves
-    if current_user.role != "admin" and (current_user.mentor_profile is None or current_user.mentor_profile.id != mentor_id):
-        raise HTTPException(status_code=403, detail="Not authorized")
-        
-    # Run in background as it calls AI
-    background_tasks.add_task(ResearchService.ingest_publications, db, mentor_id)
-    return {"message": "Ingestion started in background"}
+    _check_mentor_access(current_user, mentor_id)
+
+    # Runs on the job worker as it calls AI; poll /intelligence/jobs/{job_id}
+    job = await run_in_session(db, job_queue.enqueue, job_queue.INGEST_PUBLICATIONS, mentor_id)
+    return {"message": "Ingestion queued", "job_id": job.id, "status": job.status}
 
 @router.post("/mentors/{mentor_id}/analyze")
 async def analyze_research(
     mentor_id: int,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
-    # Auth check
-    if current_user.role != "admin" and (current_user.mentor_profile is None or current_user.mentor_profile.id != mentor_id):
-        raise HTTPException(status_code=403, detail="Not authorized")
-        
-    background_tasks.add_task(ResearchService.analyze_trends, db, mentor_id)
-    return {"message": "Analysis started in background"}
+    _check_mentor_access(current_user, mentor_id)
+
+    job = await run_in_session(db, job_queue.enqueue, job_queue.ANALYZE_TRENDS, mentor_id)
+    return {"message": "Analysis queued", "job_id": job.id, "status": job.status}
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Status of a queued ingestion or analysis, for the UI to poll."""
+    job = await run_in_session(db, job_queue.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    _check_mentor_access(current_user, job.mentor_id)
+    return await run_in_session(db, job_queue.job_status, job)
+
+@router.get("/mentors/{mentor_id}/jobs")
+async def get_mentor_jobs(
+    mentor_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """The mentor's recent ingestion and analysis jobs, newest first."""
+    _check_mentor_access(current_user, mentor_id)
+    return await run_in_session(db, job_queue.mentor_jobs, mentor_id)
 
 @router.get("/mentors/{mentor_id}/analytics")
 def get_analytics(
     mentor_id: int,
+    window: Optional[int] = Query(None, ge=1, le=50),
     db: Session = Depends(get_db)
 ):
     # Publicly accessible (or at least for logged in users)
-    return ResearchService.get_mentor_analytics(db, mentor_id)
+    # Trends compare the last `window` years with the `window` before (TREND_WINDOW_YEARS by default)
+    return ResearchService.get_mentor_analytics(db, mentor_id, window)
 
 @router.get("/mentors/{mentor_id}/gaps")
 async def get_research_gaps(
     mentor_id: int,
     student_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    http_request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Returns AI-generated research gaps for a student-mentor pair.
@@ -66,18 +93,16 @@ async def get_research_gaps(
         raise HTTPException(status_code=403, detail="Not authorized to view these gaps")
         
     try:
-        # Check cache first
-        cache_key = f"research_gaps_{student_id}_{mentor_id}"
-        cached_gaps = cache.get(cache_key)
-        if cached_gaps:
-            return cached_gaps
-
-        gaps = await ResearchService.generate_gaps_for_pair(db, mentor_id, student_id)
-        
-        # Cache for 24 hours
-        cache.set(cache_key, gaps, ttl_seconds=86400)
-        
-        return gaps
+        # Cached for 24 hours; concurrent misses for the same pair share one generation.
+        # Generation returns [] on LLM errors and timeouts, which must not be cached
+        return await cache.get_or_set(
+            f"research_gaps_{student_id}_{mentor_id}",
+            lambda: run_cancellable(http_request, ResearchService.generate_gaps_for_pair(db, mentor_id, student_id)),
+            ttl_seconds=86400,
+            should_cache=bool
+        )
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
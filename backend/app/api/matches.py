@@ -1,16 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Any
-from app.db.database import get_db
+import logging
+import time
+from app.db.database import get_async_db, run_in_session
 from app.db import models
-from app.deps import get_current_user
+from app.db.queries import active_mentor_count_select, matching_mentors_select
+from app.deps import get_current_user_async
 from app.services.matching_engine import MatchingEngine
+from app.services import embedding_store
+from app.services.mentor_index import get_mentor_index
+from app.core.config import settings
 from pydantic import BaseModel
 
-from app.core.cache import SimpleCache
+from app.core.cache import cache
+from app.services import match_cache
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
-cache = SimpleCache()
 
 class TrendInfo(BaseModel):
     topic: str
@@ -34,8 +42,8 @@ class MatchResult(BaseModel):
 @router.get("/mentors", response_model=List[MatchResult])
 async def get_mentor_matches(
     limit: int = 10,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
 ):
     """
     Get intelligent matches for the current student against all mentors.
@@ -48,20 +56,73 @@ async def get_mentor_matches(
     if not student_profile:
         raise HTTPException(status_code=400, detail="Student profile not found")
         
-    # Check cache first
-    cache_key = f"smart_matches_{current_user.email}"
-    cached_matches = cache.get(cache_key)
-    if cached_matches:
-        return cached_matches[:limit]
+    # Check cache first; entries stay valid until a change event touches them
+    cache_key = match_cache.match_cache_key(current_user.email)
+    cached = await cache.aget(cache_key)
+    if cached and cached["depth"] >= limit and not await match_cache.dirty_mentor_ids(cached):
+        return cached["matches"][:limit]
 
-    # Fetch all mentors
-    mentors = db.query(models.MentorProfile).join(models.User).filter(models.User.is_active == True).all()
-    
-    # Run Matching Engine
-    matches = await MatchingEngine.match_student_with_mentors(student_profile, mentors)
-    
-    # Cache the result for 24 hours (86400 seconds)
-    # We cache the Pydantic models (or dicts)
-    cache.set(cache_key, matches, ttl_seconds=86400)
+    # Mentors come with user, trends and topics eager-loaded (no per-mentor lazy loads)
+    active_mentors = matching_mentors_select()
+
+    # Single-flight: concurrent requests for the same student wait for one computation
+    async with cache.lock(cache_key):
+        cached = await cache.aget(cache_key)
+        dirty = await match_cache.dirty_mentor_ids(cached) if cached else set()
+        if cached and cached["depth"] >= limit and not dirty:
+            return cached["matches"][:limit]
+
+        # Lens 3 reads the student's projects; load them before scoring
+        await db.refresh(student_profile, ["projects"])
+
+        if len(dirty) > settings.MATCH_RESCORE_MAX_MENTORS:
+            cached = None  # Too many changes: a full recomputation is cheaper
+        elif dirty:
+            # Some mentors changed since the entry was computed: re-score only those
+            computed_at = time.time()
+            mentors = (await db.execute(active_mentors.where(models.MentorProfile.id.in_(dirty)))).scalars().all()
+            mentor_vectors = await embedding_store.load_mentor_vectors(db, mentors)
+            rescored = await MatchingEngine.match_student_with_mentors(student_profile, mentors, mentor_vectors)
+            cached = match_cache.merge_rescored(cached, dirty, rescored, computed_at)
+            await match_cache.store(current_user.email, cached)
+        if cached and cached["depth"] >= limit:
+            return cached["matches"][:limit]
+
+        computed_at = time.time()
+        depth = max(limit, settings.MATCH_CACHE_DEPTH)
+        
+        student_vec = None
+        candidate_ids = []
+        if await db.scalar(active_mentor_count_select()) > settings.MATCH_EXACT_THRESHOLD:
+            # Large catalogue: retrieve semantic candidates from the ANN index, then run
+            # Lens 1/3 and explanations on that candidate set only
+            index = get_mentor_index()
+            await run_in_session(db, index.sync)
+            student_vec = await MatchingEngine.embed_student(student_profile)
+            # A failed (or key-less) embedding is a zero vector, which retrieves nothing
+            if any(student_vec):
+                candidate_ids = [mentor_id for mentor_id, _ in index.search(student_vec, settings.MATCH_ANN_CANDIDATES)]
+            if not candidate_ids:
+                logger.warning(f"No ANN candidates for student {student_profile.id}; scoring all mentors exactly")
+
+        if candidate_ids:
+            mentors = (await db.execute(active_mentors.where(models.MentorProfile.id.in_(candidate_ids)))).scalars().all()
+            matches = await MatchingEngine.match_student_with_mentors(
+                student_profile, mentors, index.get_vectors(candidate_ids), student_vec=student_vec, limit=depth
+            )
+        else:
+            # Small catalogue (or no candidates): score every mentor exactly
+            mentors = (await db.execute(active_mentors)).scalars().all()
+            
+            # Bulk-load stored mentor embeddings (one query instead of one embedding call per mentor)
+            mentor_vectors = await embedding_store.load_mentor_vectors(db, mentors)
+            matches = await MatchingEngine.match_student_with_mentors(
+                student_profile, mentors, mentor_vectors, student_vec=student_vec, limit=depth
+            )
+        
+        # Cached for match_cache.ttl_seconds(); profile/skill/trend events keep it fresh.
+        # An empty list usually means scoring failed, so the next request retries
+        if matches:
+            await match_cache.store(current_user.email, match_cache.new_entry(matches, depth, computed_at))
     
     return matches[:limit]
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from sqlalchemy.orm import Session, joinedload
 from app.db.database import get_db
+from app.db.pagination import paginate
+from app.core.config import settings
 from app.db.models import Opportunity, User, OpportunitySkill
 from app.schemas import OpportunityCreate, OpportunityResponse, OpportunityUpdate
 from app.deps import get_current_user
 from app.services.matching import calculate_match_score
+from app.services import daily_stats
 
 router = APIRouter()
 
@@ -28,6 +31,8 @@ def create_opportunity(
         **opportunity_data
     )
     db.add(new_opportunity)
+    db.flush()
+    daily_stats.record(db, daily_stats.FUNDING_COMMITTED, current_user.id, new_opportunity.id, amount=new_opportunity.funding_amount or 0)
     db.commit()
     db.refresh(new_opportunity)
     
@@ -47,8 +52,9 @@ def create_opportunity(
 
 @router.get("/", response_model=List[OpportunityResponse])
 def read_opportunities(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = settings.PAGE_SIZE_DEFAULT,
     type: Optional[str] = None,
     mentor_id: Optional[int] = None,
     db: Session = Depends(get_db)
@@ -62,7 +68,8 @@ def read_opportunities(
     # Eager load the mentor relationship
     query = query.options(joinedload(Opportunity.mentor))
     
-    opportunities = query.offset(skip).limit(limit).all()
+    # Newest first; the next page's cursor is in the X-Next-Cursor header
+    opportunities = paginate(query, [Opportunity.created_at, Opportunity.id], cursor, limit, response)
     return opportunities
 
 @router.get("/{opportunity_id}", response_model=OpportunityResponse)
@@ -106,8 +113,14 @@ def update_opportunity(
     if opportunity.mentor_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to update this opportunity")
     
+    old_funding = opportunity.funding_amount or 0
     for key, value in opportunity_update.dict(exclude_unset=True).items():
         setattr(opportunity, key, value)
+    # Funding changes are booked on the day they are made
+    daily_stats.record(
+        db, daily_stats.FUNDING_COMMITTED, opportunity.mentor_id, opportunity.id,
+        amount=(opportunity.funding_amount or 0) - old_funding
+    )
     
     db.commit()
     db.refresh(opportunity)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 
@@ -6,6 +6,8 @@ from app import deps
 from app.db import models
 from app import schemas
 from app.services.matching import calculate_readiness_score
+from app.services import embedding_store
+from app.core import events
 
 router = APIRouter()
 
@@ -104,11 +106,14 @@ def update_student_profile(
     
     db.commit()
     db.refresh(profile)
+
+    events.publish(events.STUDENT_PROFILE_UPDATED, user_id=current_user.id, email=current_user.email)
     return profile
 
 @router.put("/me/mentor", response_model=schemas.MentorProfileResponse)
 def update_mentor_profile(
     profile_in: schemas.MentorProfileUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
@@ -139,6 +144,11 @@ def update_mentor_profile(
             
     db.commit()
     db.refresh(profile)
+
+    # Keep the stored matching embedding in sync (no-op if research_areas/bio are unchanged)
+    background_tasks.add_task(embedding_store.refresh_mentor_embedding_task, profile.id)
+
+    events.publish(events.MENTOR_PROFILE_UPDATED, mentor_id=profile.id)
     return profile
 
 @router.post("/me/skills", response_model=List[schemas.SkillResponse])
@@ -171,6 +181,9 @@ def update_user_skills(
     
     db.commit()
     db.refresh(current_user)
+
+    if current_user.student_profile:
+        events.publish(events.STUDENT_SKILLS_UPDATED, user_id=current_user.id, email=current_user.email)
     return current_user.skills
 
 @router.get("/{user_id}", response_model=schemas.UserResponse)
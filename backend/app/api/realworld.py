@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from app.core.config import settings
 from app.db.database import get_db
+from app.db.pagination import paginate
 from app.db import models
 from app import schemas
 from app import deps
@@ -64,12 +66,16 @@ def create_visit(
 
 @router.get("/visits", response_model=List[schemas.IndustrialVisitResponse])
 def get_visits(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = settings.PAGE_SIZE_DEFAULT,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
-    return db.query(models.IndustrialVisit).offset(skip).limit(limit).all()
+    return paginate(
+        db.query(models.IndustrialVisit),
+        [models.IndustrialVisit.created_at, models.IndustrialVisit.id], cursor, limit, response
+    )
 
 @router.post("/visits/{visit_id}/enroll", response_model=schemas.IndustrialVisitEnrollmentResponse)
 def enroll_visit(
@@ -129,11 +135,15 @@ def create_beehive_event(
 
 @router.get("/beehive", response_model=List[schemas.BeehiveEventResponse])
 def get_beehive_events(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = settings.PAGE_SIZE_DEFAULT,
     db: Session = Depends(get_db),
 ):
-    return db.query(models.BeehiveEvent).filter(models.BeehiveEvent.is_active == True).offset(skip).limit(limit).all()
+    return paginate(
+        db.query(models.BeehiveEvent).filter(models.BeehiveEvent.is_active == True),
+        [models.BeehiveEvent.created_at, models.BeehiveEvent.id], cursor, limit, response
+    )
 
 @router.post("/beehive/{event_id}/enroll", response_model=schemas.BeehiveEnrollmentResponse)
 def enroll_beehive(
@@ -194,9 +204,15 @@ def create_beehive_contact(
 
 @router.get("/beehive/contact", response_model=List[schemas.BeehiveContactResponse])
 def list_beehive_contacts(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = settings.PAGE_SIZE_DEFAULT,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Only admins can view Beehive contact requests")
-    return db.query(models.BeehiveContact).order_by(models.BeehiveContact.created_at.desc()).all()
+    return paginate(
+        db.query(models.BeehiveContact),
+        [models.BeehiveContact.created_at, models.BeehiveContact.id], cursor, limit, response
+    )
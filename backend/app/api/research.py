@@ -6,6 +6,7 @@ from datetime import datetime
 from app.db.database import get_db
 from app.db.models import User, Opportunity, PublicationProject
 from app.deps import get_current_user
+from app.services import daily_stats
 
 router = APIRouter()
 
@@ -50,6 +51,7 @@ def create_project(
         status="Ideation"
     )
     db.add(new_project)
+    daily_stats.record(db, daily_stats.PROJECTS_STARTED, current_user.id, project.opportunity_id)
     db.commit()
     db.refresh(new_project)
     return new_project
@@ -80,6 +82,11 @@ def update_project_status(
         raise HTTPException(status_code=403, detail="Not authorized")
         
     if update.status:
+        if (update.status == "Published") != (project.status == "Published"):
+            daily_stats.record(
+                db, daily_stats.PROJECTS_PUBLISHED, project.mentor_id, project.opportunity_id,
+                amount=1 if update.status == "Published" else -1
+            )
         project.status = update.status
     if update.title:
         project.title = update.title
@@ -1,36 +1,189 @@
-from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+import asyncio
+import logging
+import threading
 import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
-class SimpleCache:
-    _instance = None
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(SimpleCache, cls).__new__(cls)
-            cls._instance._cache: Dict[str, Dict[str, Any]] = {}
-        return cls._instance
+from app.core.cache_backends import CacheBackend, create_backend
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Cache:
+    """
+    Application cache in front of a pluggable backend (see cache_backends.create_backend).
+
+    Adds what the raw stores lack: a background thread that sweeps expired entries, and
+    a per-key single-flight lock so that when an expensive entry (match list, LLM gaps)
+    is missing, one request computes it while concurrent ones wait for the result.
+    With a shared backend the lock also spans workers.
+    """
+
+    _LOCK_POLL_SECONDS = 0.1
+
+    def __init__(self, backend: CacheBackend, default_ttl: int = 3600,
+                 lock_timeout: int = 120, sweep_interval: int = 60):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.lock_timeout = lock_timeout
+        self.sweep_interval = sweep_interval
+        self._sweeper: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._locks: Dict[str, List] = {}
+        # key -> [threading.Lock, holders + waiters], like _locks for lock_sync()
+        self._sync_locks: Dict[str, List] = {}
+        self._sync_locks_guard = threading.Lock()
 
     def get(self, key: str) -> Optional[Any]:
-        if key in self._cache:
-            item = self._cache[key]
-            if item["expires_at"] > time.time():
-                return item["value"]
-            else:
-                del self._cache[key]
-        return None
-
-    def set(self, key: str, value: Any, ttl_seconds: int = 3600):
-        self._cache[key] = {
-            "value": value,
-            "expires_at": time.time() + ttl_seconds
-        }
+        return self.backend.get(key)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None):
+        self._ensure_sweeper()
+        self.backend.set(key, value, ttl_seconds or self.default_ttl)
 
     def delete(self, key: str):
-        if key in self._cache:
-            del self._cache[key]
+        self.backend.delete(key)
 
     def clear(self):
-        self._cache = {}
+        self.backend.clear()
+
+    # Async callers use these: shared backends do their I/O in a worker thread
+    async def aget(self, key: str) -> Optional[Any]:
+        return await self.backend.aget(key)
+
+    async def aset(self, key: str, value: Any, ttl_seconds: Optional[int] = None):
+        self._ensure_sweeper()
+        await self.backend.aset(key, value, ttl_seconds or self.default_ttl)
+
+    async def adelete(self, key: str):
+        await self.backend.adelete(key)
+
+    @asynccontextmanager
+    async def lock(self, key: str):
+        """
+        Single-flight guard for `key`. Callers should re-check the cache once inside,
+        since whoever held the lock before them has usually just filled it.
+        """
+        locks = self._bind_loop()
+        entry = locks.get(key)
+        if entry is None:
+            entry = locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                shared = await self._acquire_shared(key)
+                try:
+                    yield
+                finally:
+                    if shared:
+                        await self.backend.arelease_lock(key)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                locks.pop(key, None)
+
+    @contextmanager
+    def lock_sync(self, key: str):
+        """
+        Blocking counterpart of lock() for short read-modify-write sections in sync
+        routes (worker threads). Serialises with other threads holding the same key and,
+        on shared backends, other workers.
+        """
+        with self._sync_locks_guard:
+            entry = self._sync_locks.get(key)
+            if entry is None:
+                entry = self._sync_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                deadline = time.monotonic() + self.lock_timeout
+                shared = True
+                while not self.backend.acquire_lock(key, self.lock_timeout):
+                    if time.monotonic() >= deadline:
+                        logger.warning(f"Timed out waiting for cache lock on {key}; continuing without it")
+                        shared = False
+                        break
+                    time.sleep(self._LOCK_POLL_SECONDS)
+                try:
+                    yield
+                finally:
+                    if shared:
+                        self.backend.release_lock(key)
+        finally:
+            with self._sync_locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._sync_locks.pop(key, None)
+
+    async def get_or_set(self, key: str, compute: Callable[[], Awaitable[Any]],
+                         ttl_seconds: Optional[int] = None,
+                         should_cache: Callable[[Any], bool] = lambda value: value is not None) -> Any:
+        """
+        Cached value for `key`, computing it on a miss. Values `should_cache` rejects
+        (e.g. the empty result of a failed generation) are returned but not stored,
+        and treated as a miss if found, so the next call computes again.
+        """
+        value = await self.aget(key)
+        if value is not None and should_cache(value):
+            return value
+        async with self.lock(key):
+            value = await self.aget(key)
+            if value is None or not should_cache(value):
+                value = await compute()
+                if should_cache(value):
+                    await self.aset(key, value, ttl_seconds)
+            return value
+
+    def stats(self) -> dict:
+        stats = self.backend.stats()
+        stats["policy"] = getattr(self.backend, "policy", None)
+        stats["locked_keys"] = len(self._locks)
+        return stats
+
+    def _bind_loop(self) -> Dict[str, List]:
+        # asyncio locks belong to one loop; start afresh if the running loop changed
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._locks = {}
+        return self._locks
+
+    async def _acquire_shared(self, key: str) -> bool:
+        # Another worker may be computing the same key; wait for it rather than
+        # duplicating the work. Past the deadline, compute anyway.
+        deadline = time.monotonic() + self.lock_timeout
+        while not await self.backend.aacquire_lock(key, self.lock_timeout):
+            if time.monotonic() >= deadline:
+                logger.warning(f"Timed out waiting for cache lock on {key}; computing without it")
+                return False
+            await asyncio.sleep(self._LOCK_POLL_SECONDS)
+        return True
+
+    def _ensure_sweeper(self):
+        if self._sweeper is None and self.sweep_interval > 0:
+            self._sweeper = threading.Thread(target=self._sweep_forever, name="cache-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def _sweep_forever(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                removed = self.backend.sweep()
+                if removed:
+                    logger.info(f"Cache sweep removed {removed} expired entries")
+            except Exception as e:
+                logger.error(f"Cache sweep failed: {str(e)}")
+
 
-cache = SimpleCache()
+cache = Cache(
+    create_backend(
+        settings.CACHE_URL,
+        max_entries=settings.CACHE_MAX_ENTRIES,
+        namespace="app",
+        policy=settings.CACHE_EVICTION_POLICY
+    ),
+    lock_timeout=settings.CACHE_LOCK_TIMEOUT_SECONDS,
+    sweep_interval=settings.CACHE_SWEEP_INTERVAL_SECONDS
+)
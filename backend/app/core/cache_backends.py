@@ -0,0 +1,363 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import redis
+except ImportError:  # Optional: only needed for redis:// cache URLs
+    redis = None
+
+
+class CacheBackend(ABC):
+    """Minimal key/value interface with per-entry TTL shared by all cache stores."""
+
+    # Whether other processes (API workers, the job worker) see the same entries
+    shared = False
+
+    def __init__(self):
+        # Per-process counters; a shared store's other workers keep their own
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_seconds: int):
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+    @abstractmethod
+    def size(self) -> int:
+        ...
+
+    # Shared stores do disk or network I/O, so async callers go through a worker thread
+    async def aget(self, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any, ttl_seconds: int):
+        await asyncio.to_thread(self.set, key, value, ttl_seconds)
+
+    async def adelete(self, key: str):
+        await asyncio.to_thread(self.delete, key)
+
+    async def aacquire_lock(self, key: str, ttl_seconds: int) -> bool:
+        return await asyncio.to_thread(self.acquire_lock, key, ttl_seconds)
+
+    async def arelease_lock(self, key: str):
+        await asyncio.to_thread(self.release_lock, key)
+
+    def sweep(self) -> int:
+        """Removes expired entries; returns how many were dropped."""
+        return 0
+
+    def acquire_lock(self, key: str, ttl_seconds: int) -> bool:
+        """Cross-process lock for `key`. Stores private to one process always succeed."""
+        return True
+
+    def release_lock(self, key: str):
+        pass
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "size": self.size(),
+            "max_entries": getattr(self, "max_entries", None),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Per-process, size-bounded store. With policy="lru" the least recently used entry is
+    evicted first; with policy="lfu" the least frequently used one (ties broken by age).
+    """
+
+    def __init__(self, max_entries: int = 10000, policy: str = "lru"):
+        super().__init__()
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"Unsupported eviction policy: {policy}")
+        self.max_entries = max_entries
+        self.policy = policy
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        # LFU bookkeeping: key -> use count, and use count -> keys in insertion order
+        self._freq: Dict[str, int] = {}
+        self._buckets: "Dict[int, OrderedDict[str, None]]" = {}
+        self._lock = threading.Lock()
+
+    # In-process and non-blocking, so no thread hop for async callers
+    async def aget(self, key: str) -> Optional[Any]:
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any, ttl_seconds: int):
+        self.set(key, value, ttl_seconds)
+
+    async def adelete(self, key: str):
+        self.delete(key)
+
+    async def aacquire_lock(self, key: str, ttl_seconds: int) -> bool:
+        return True
+
+    async def arelease_lock(self, key: str):
+        pass
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, expires_at = item
+            if expires_at <= time.time():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._touch(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: int):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl_seconds)
+            self._touch(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(self._victim())
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._freq.clear()
+            self._buckets.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def sweep(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def _touch(self, key: str):
+        self._entries.move_to_end(key)
+        if self.policy == "lfu":
+            count = self._freq.get(key, 0)
+            if count:
+                self._unbucket(key, count)
+            self._freq[key] = count + 1
+            self._buckets.setdefault(count + 1, OrderedDict())[key] = None
+
+    def _victim(self) -> str:
+        if self.policy == "lru":
+            return next(iter(self._entries))
+        return next(iter(self._buckets[min(self._buckets)]))
+
+    def _remove(self, key: str):
+        del self._entries[key]
+        count = self._freq.pop(key, 0)
+        if count:
+            self._unbucket(key, count)
+
+    def _unbucket(self, key: str, count: int):
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    File-backed store shared by every worker on the host. Values are JSON encoded;
+    once the table exceeds `max_entries`, the least recently read rows are pruned.
+    """
+
+    shared = True
+    _PRUNE_EVERY = 100
+
+    def __init__(self, path: str, max_entries: int = 10000, table: str = "cache_entries"):
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self.table = table
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{self.table}_accessed_at ON {self.table} (accessed_at)")
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table}_locks (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute(f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        if row[1] <= now:
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ? AND expires_at <= ?", (key, now))
+            self.expirations += 1
+            self.misses += 1
+            return None
+        conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl_seconds: int):
+        now = time.time()
+        self._conn().execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), now + ttl_seconds, now)
+        )
+        self._writes += 1
+        if self._writes % self._PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self):
+        self.sweep()
+        excess = self.size() - self.max_entries
+        if excess > 0:
+            self._conn().execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)",
+                (excess,)
+            )
+            self.evictions += excess
+
+    def sweep(self) -> int:
+        expired = self._conn().execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),)).rowcount
+        self.expirations += expired
+        return expired
+
+    def size(self) -> int:
+        return self._conn().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def acquire_lock(self, key: str, ttl_seconds: int) -> bool:
+        conn = self._conn()
+        now = time.time()
+        # A lock left behind by a crashed worker expires instead of blocking forever
+        conn.execute(f"DELETE FROM {self.table}_locks WHERE key = ? AND expires_at <= ?", (key, now))
+        cursor = conn.execute(
+            f"INSERT OR IGNORE INTO {self.table}_locks (key, expires_at) VALUES (?, ?)", (key, now + ttl_seconds)
+        )
+        return cursor.rowcount == 1
+
+    def release_lock(self, key: str):
+        self._conn().execute(f"DELETE FROM {self.table}_locks WHERE key = ?", (key,))
+
+    def delete(self, key: str):
+        self._conn().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self):
+        self._conn().execute(f"DELETE FROM {self.table}")
+        self._conn().execute(f"DELETE FROM {self.table}_locks")
+
+
+class RedisBackend(CacheBackend):
+    """
+    Any Redis-protocol server (Redis, Valkey, KeyDB or a local stand-in). Size bounding
+    is delegated to the server's maxmemory-policy (allkeys-lru / allkeys-lfu).
+    """
+
+    shared = True
+
+    def __init__(self, url: str, prefix: str = ""):
+        super().__init__()
+        if redis is None:
+            raise RuntimeError("The 'redis' package is required for redis:// cache URLs")
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._client.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl_seconds: int):
+        self._client.set(self.prefix + key, json.dumps(value), ex=max(1, int(ttl_seconds)))
+
+    def delete(self, key: str):
+        self._client.delete(self.prefix + key)
+
+    def clear(self):
+        keys = list(self._client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+    def size(self) -> int:
+        if not self.prefix:
+            return self._client.dbsize()
+        return sum(1 for _ in self._client.scan_iter(match=self.prefix + "*", count=1000))
+
+    def acquire_lock(self, key: str, ttl_seconds: int) -> bool:
+        return bool(self._client.set(f"{self.prefix}lock:{key}", 1, nx=True, ex=max(1, int(ttl_seconds))))
+
+    def release_lock(self, key: str):
+        self._client.delete(f"{self.prefix}lock:{key}")
+
+
+def create_backend(url: str, max_entries: int = 10000, namespace: str = "", policy: str = "lru") -> CacheBackend:
+    """
+    Builds a backend from a URL:
+      memory://                      per-process (default)
+      sqlite:///path/to/cache.db     shared by workers on one host (/dev/shm/... keeps it in RAM)
+      redis://host:6379/0            shared across hosts
+    `policy` ("lru" or "lfu") applies to memory://; SQLite always prunes least recently read.
+    """
+    if not url or url.startswith("memory://"):
+        return MemoryBackend(max_entries=max_entries, policy=policy)
+    if url.startswith("sqlite:///"):
+        table = f"cache_{namespace}" if namespace else "cache_entries"
+        return SQLiteBackend(url[len("sqlite:///"):], max_entries=max_entries, table=table)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url, prefix=f"{namespace}:" if namespace else "")
+    raise ValueError(f"Unsupported cache URL: {url}")
@@ -0,0 +1,28 @@
+import asyncio
+from typing import Awaitable, TypeVar
+from fastapi import HTTPException, Request
+
+T = TypeVar("T")
+
+# nginx's non-standard "client closed request"; never actually reaches the client
+CLIENT_CLOSED_REQUEST = 499
+
+
+async def run_cancellable(request: Request, awaitable: Awaitable[T], poll_interval: float = 0.5) -> T:
+    """
+    Awaits `awaitable` while watching the client connection. If the client goes away
+    first, the work (e.g. an in-flight LLM generation) is cancelled instead of running
+    to completion for nobody.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
@@ -20,6 +20,81 @@ class Settings(BaseSettings):
     TWILIO_WHATSAPP_NUMBER: str = "+12548575066" # User provided number
     TWILIO_CONTACT_NUMBER: str = "+1234567890" # Number for students to contact
 
+    # Database Connection Pool (per engine, per worker; the app has a sync and an async engine)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0 # Max wait for a free connection before erroring
+    DB_POOL_RECYCLE_SECONDS: int = 3600
+    DB_PRE_PING: str = "idle" # always (ping every checkout), idle (only after DB_PRE_PING_IDLE_SECONDS) or never
+    DB_PRE_PING_IDLE_SECONDS: int = 300
+    DB_STATEMENT_TIMEOUT_MS: int = 0 # Postgres statement_timeout per connection; 0 disables
+    DB_SLOW_CHECKOUT_MS: int = 200 # Log checkouts that waited this long for a connection; 0 disables
+
+    # Application Cache (match lists, research gaps)
+    CACHE_URL: str = "memory://" # memory://, sqlite:///path/app_cache.db (/dev/shm/... for RAM) or redis://host:6379/0; app.worker needs a shared one
+    CACHE_MAX_ENTRIES: int = 5000
+    CACHE_EVICTION_POLICY: str = "lru" # lru or lfu (memory:// only)
+    CACHE_SWEEP_INTERVAL_SECONDS: int = 60 # How often expired entries are purged in the background
+    CACHE_LOCK_TIMEOUT_SECONDS: int = 120 # Max wait for another request computing the same entry
+
+    # LLM Generation
+    LLM_TIMEOUT_SECONDS: float = 60.0 # Per-call timeout for Gemini generations
+    LLM_MAX_CONCURRENCY: int = 8 # Concurrent Gemini generations per worker
+    LLM_CACHE_URL: str = "memory://" # memory://, sqlite:///path/llm_cache.db or redis://host:6379/0
+    LLM_CACHE_TTL_SECONDS: int = 86400
+    LLM_CACHE_MAX_ENTRIES: int = 2000
+
+    # Embeddings
+    EMBEDDING_BATCH_WINDOW_MS: int = 10 # How long to wait for more texts before sending a batch
+    EMBEDDING_MAX_BATCH: int = 100 # Texts per upstream batch call
+    EMBEDDING_MAX_CONCURRENCY: int = 4 # Concurrent upstream batch calls per worker
+    EMBEDDING_CACHE_SIZE: int = 10000 # In-memory LRU entries per worker
+    EMBEDDING_CACHE_PATH: str = "" # Optional on-disk segment, e.g. "cache/embeddings.bin"
+    EMBEDDING_CACHE_DISK_MAX_MB: int = 512
+
+    # Matching Engine
+    MATCH_EXACT_THRESHOLD: int = 2000 # Up to this many mentors, score all of them exactly
+    MATCH_ANN_CANDIDATES: int = 500 # Candidates retrieved from the ANN index above the threshold
+    MATCH_ANN_NPROBE: int = 8 # IVF lists probed per query
+    MATCH_ANN_PRUNE_INTERVAL_SECONDS: int = 300 # How often the index drops deactivated/deleted mentors
+    MATCH_CACHE_DEPTH: int = 50 # Ranked results kept per student in the match cache
+    MATCH_CACHE_TTL_SECONDS: int = 604800 # With a shared CACHE_URL; change events invalidate entries, so a long TTL is safe
+    MATCH_CACHE_LOCAL_TTL_SECONDS: int = 900 # With memory://, where events from other processes never arrive
+    MATCH_RESCORE_MAX_MENTORS: int = 200 # Above this many changed mentors, recompute instead of re-scoring
+
+    # List Pagination (keyset cursors, see app/db/pagination.py)
+    PAGE_SIZE_DEFAULT: int = 100
+    PAGE_SIZE_MAX: int = 200 # Hard cap; larger `limit` values are clamped
+    CHAT_PAGE_SIZE_DEFAULT: int = 50 # Messages per chat history window (since_id / before_id)
+
+    # Analytics Dashboard (rollup table, see app/services/analytics_rollup.py)
+    ANALYTICS_ROLLUP_MAX_AGE_SECONDS: int = 300 # Older rollups are still served, but trigger a background refresh
+    ANALYTICS_MAX_POINTS: int = 90 # Time series are downsampled (day -> week -> month) to at most this many points
+    ANALYTICS_MAX_RANGE_DAYS: int = 1830 # Longest time series range accepted (about five years)
+
+    # Trend Recompute Jobs (see app/services/trend_jobs.py)
+    TREND_JOB_CONCURRENCY: int = 4 # Mentors analysed at once (each one is an LLM topic extraction)
+    TREND_JOB_STALE_SECONDS: int = 900 # A running job without progress for this long is resumed by the next start
+
+    # Research Trends (see app/services/trend_stats.py)
+    TREND_WINDOW_YEARS: int = 3 # Recent window, compared with the same span before it
+    TREND_RISING_RATIO: float = 1.5 # Recent vs previous publications to count as Rising (or the inverse, Declining)
+    TOPIC_SIMILARITY_THRESHOLD: float = 0.75 # Cosine similarity linking a publication to a topic, besides literal name matches
+
+    # Job Queue (see app/services/job_queue.py; run workers with `python -m app.worker`)
+    JOB_WORKER_CONCURRENCY: int = 2 # Jobs run at once per worker process
+    JOB_POLL_INTERVAL_MS: int = 1000 # Idle worker's wait between polls
+    JOB_LEASE_SECONDS: int = 300 # Renewed while a job runs; an expired lease (dead worker) is retried
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_SECONDS: int = 30 # Backoff doubles per attempt: 30 s, 60 s, 120 s ...
+    JOB_RETRY_MAX_SECONDS: int = 1800
+
+    # Real-time Chat (WebSocket hub, see app/core/realtime.py)
+    REALTIME_BROKER_URL: str = "memory://" # memory:// (one worker), sqlite:///path/realtime.db (workers on one host) or redis://host:6379/0
+    REALTIME_POLL_INTERVAL_MS: int = 200 # sqlite:// broker poll interval
+    REALTIME_QUEUE_SIZE: int = 256 # Events buffered per socket before the client is told to resync
+    REALTIME_REPLAY_LIMIT: int = 500 # Missed messages replayed on reconnect with since_id
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,39 @@
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Event names published by the API and services
+STUDENT_PROFILE_UPDATED = "student.profile_updated"  # user_id, email
+STUDENT_SKILLS_UPDATED = "student.skills_updated"  # user_id, email
+MENTOR_PROFILE_UPDATED = "mentor.profile_updated"  # mentor_id
+MENTOR_TRENDS_UPDATED = "mentor.trends_updated"  # mentor_id
+MESSAGE_SENT = "chat.message_sent"  # message (MessageResponse dict)
+MESSAGES_READ = "chat.messages_read"  # reader_id, partner_id, up_to_id, count
+MEETING_UPDATED = "meeting.updated"  # meeting (MeetingResponse dict)
+
+_subscribers: Dict[str, List[Callable[..., None]]] = defaultdict(list)
+
+
+def subscribe(event: str, handler: Callable[..., None]):
+    """Registers `handler(**payload)` to run whenever `event` is published."""
+    if handler not in _subscribers[event]:
+        _subscribers[event].append(handler)
+
+
+def unsubscribe(event: str, handler: Callable[..., None]):
+    if handler in _subscribers[event]:
+        _subscribers[event].remove(handler)
+
+
+def publish(event: str, **payload):
+    """
+    Runs the handlers for `event` synchronously, after the publisher has committed.
+    A failing handler is logged and never fails the request that published the event.
+    """
+    for handler in list(_subscribers[event]):
+        try:
+            handler(**payload)
+        except Exception as e:
+            logger.error(f"Handler {handler.__name__} failed for {event}: {str(e)}")
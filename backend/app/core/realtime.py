@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set
+
+from app.core.config import settings
+from app.core.realtime_brokers import Broker, create_broker
+
+logger = logging.getLogger(__name__)
+
+# Sent (and the socket closed) when a client falls too far behind; it reconnects
+# with since_id to catch up
+RESYNC_EVENT = {"type": "resync"}
+
+
+class Subscription:
+    """One WebSocket's buffered event stream."""
+
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def put(self, event: dict):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+
+class Hub:
+    """
+    Fans events out to each user's open WebSockets. Events are published through
+    a broker, so with a shared broker an event raised in one worker also reaches
+    sockets held by the others. publish() is safe to call from sync routes.
+    """
+
+    def __init__(self, broker: Broker, queue_size: int = 256):
+        self.broker = broker
+        self.queue_size = queue_size
+        self._subscriptions: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def connect(self, user_id: int) -> Subscription:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Sockets belong to one loop; a new loop means the old ones are gone
+            self._loop = loop
+            self._subscriptions.clear()
+        subscription = Subscription(user_id, self.queue_size)
+        self._subscriptions[user_id].add(subscription)
+        self.broker.start(self._dispatch)
+        return subscription
+
+    def disconnect(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    def publish(self, user_ids: Iterable[int], event: dict):
+        recipients = sorted({user_id for user_id in user_ids if user_id is not None})
+        if not recipients:
+            return
+        try:
+            self.broker.publish(recipients, event)
+        except Exception as e:
+            # Clients still catch up with since_id on their next reconnect
+            logger.error(f"Realtime publish of {event.get('type')} failed: {str(e)}")
+
+    def stats(self) -> dict:
+        stats = self.broker.stats()
+        stats["connected_users"] = len(self._subscriptions)
+        stats["sockets"] = sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+        return stats
+
+    def _dispatch(self, user_ids, event: dict):
+        # Called by the broker from any thread; the queues live on the event loop
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(user_ids, event)
+        else:
+            loop.call_soon_threadsafe(self._deliver, user_ids, event)
+
+    def _deliver(self, user_ids, event: dict):
+        for user_id in user_ids:
+            for subscription in list(self._subscriptions.get(user_id, ())):
+                subscription.put(event)
+
+
+hub = Hub(
+    create_broker(settings.REALTIME_BROKER_URL, poll_interval=settings.REALTIME_POLL_INTERVAL_MS / 1000),
+    queue_size=settings.REALTIME_QUEUE_SIZE
+)
@@ -0,0 +1,178 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional
+
+try:
+    import redis
+except ImportError:  # Optional: only needed for redis:// broker URLs
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[List[int], dict], None]
+
+
+class Broker(ABC):
+    """
+    Carries hub events between workers. publish() may be called from any thread;
+    once start() has been called, every published event (from any worker sharing
+    the broker) is handed to `deliver(user_ids, event)`.
+    """
+
+    def __init__(self):
+        self.published = 0
+        self.delivered = 0
+
+    @abstractmethod
+    def publish(self, user_ids: List[int], event: dict):
+        ...
+
+    @abstractmethod
+    def start(self, deliver: Deliver):
+        ...
+
+    def stats(self) -> dict:
+        return {"broker": type(self).__name__, "published": self.published, "delivered": self.delivered}
+
+
+class LocalBroker(Broker):
+    """Single process: events go straight to this worker's sockets."""
+
+    def __init__(self):
+        super().__init__()
+        self._deliver: Optional[Deliver] = None
+
+    def publish(self, user_ids: List[int], event: dict):
+        self.published += 1
+        if self._deliver is not None:
+            self.delivered += 1
+            self._deliver(user_ids, event)
+
+    def start(self, deliver: Deliver):
+        self._deliver = deliver
+
+
+class SQLiteBroker(Broker):
+    """
+    Stand-in for a real broker when several workers share one host: events are
+    appended to a table in a shared SQLite file, which each worker polls.
+    """
+
+    _RETENTION_SECONDS = 60
+
+    def __init__(self, path: str, poll_interval: float = 0.2, table: str = "realtime_events"):
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self.table = table
+        self._local = threading.local()
+        self._thread: Optional[threading.Thread] = None
+        self._deliver: Optional[Deliver] = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, user_ids TEXT NOT NULL, payload TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def publish(self, user_ids: List[int], event: dict):
+        self._conn().execute(
+            f"INSERT INTO {self.table} (user_ids, payload, created_at) VALUES (?, ?, ?)",
+            (json.dumps(user_ids), json.dumps(event), time.time())
+        )
+        self.published += 1
+
+    def start(self, deliver: Deliver):
+        self._deliver = deliver
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._poll_forever, name="realtime-broker", daemon=True)
+            self._thread.start()
+
+    def _poll_forever(self):
+        conn = self._conn()
+        # Only events published from now on; reconnecting clients catch up via since_id
+        last_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {self.table}").fetchone()[0]
+        last_prune = time.time()
+        while True:
+            try:
+                rows = conn.execute(
+                    f"SELECT id, user_ids, payload FROM {self.table} WHERE id > ? ORDER BY id", (last_id,)
+                ).fetchall()
+                for row_id, user_ids, payload in rows:
+                    last_id = row_id
+                    self.delivered += 1
+                    self._deliver(json.loads(user_ids), json.loads(payload))
+                if time.time() - last_prune > self._RETENTION_SECONDS:
+                    last_prune = time.time()
+                    conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (last_prune - self._RETENTION_SECONDS,))
+            except Exception as e:
+                logger.error(f"Realtime broker poll failed: {str(e)}")
+            time.sleep(self.poll_interval)
+
+
+class RedisBroker(Broker):
+    """Redis pub/sub on one channel; works across hosts."""
+
+    def __init__(self, url: str, channel: str = "realtime"):
+        super().__init__()
+        if redis is None:
+            raise RuntimeError("The 'redis' package is required for redis:// broker URLs")
+        self._client = redis.Redis.from_url(url)
+        self.channel = channel
+        self._thread: Optional[threading.Thread] = None
+        self._deliver: Optional[Deliver] = None
+
+    def publish(self, user_ids: List[int], event: dict):
+        self._client.publish(self.channel, json.dumps({"user_ids": user_ids, "event": event}))
+        self.published += 1
+
+    def start(self, deliver: Deliver):
+        self._deliver = deliver
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._listen_forever, name="realtime-broker", daemon=True)
+            self._thread.start()
+
+    def _listen_forever(self):
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    data = json.loads(message["data"])
+                    self.delivered += 1
+                    self._deliver(data["user_ids"], data["event"])
+            except Exception as e:
+                logger.error(f"Realtime broker subscription failed, retrying: {str(e)}")
+                time.sleep(1)
+
+
+def create_broker(url: str, poll_interval: float = 0.2) -> Broker:
+    """
+    Builds a broker from a URL:
+      memory://                        this worker only (default)
+      sqlite:///path/to/realtime.db    workers on one host
+      redis://host:6379/0              across hosts
+    """
+    if not url or url.startswith("memory://"):
+        return LocalBroker()
+    if url.startswith("sqlite:///"):
+        return SQLiteBroker(url[len("sqlite:///"):], poll_interval=poll_interval)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBroker(url)
+    raise ValueError(f"Unsupported realtime broker URL: {url}")
@@ -1,13 +1,24 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+import logging
 import os
+import threading
 from dotenv import load_dotenv
+from app.core.config import settings
+from app.db.pool import engine_options, instrument_engine
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_recycle=3600)
+# Pool sizing, pre-ping policy and statement timeout come from the DB_* settings;
+# size DB_POOL_SIZE + DB_MAX_OVERFLOW per worker against Postgres max_connections
+engine = create_engine(DATABASE_URL, **engine_options(settings))
+sync_pool_telemetry = instrument_engine(engine, "sync", settings)
 SessionLocal = sessionmaker(bind=engine)
 
 Base = declarative_base()
@@ -18,3 +29,80 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Async Mode
+# Async routes use this engine so DB waits yield to the event loop instead of
+# blocking it. Defaults to the async driver for DATABASE_URL's backend.
+_ASYNC_DRIVERS = {"postgresql": "asyncpg", "postgres": "asyncpg", "sqlite": "aiosqlite"}
+
+def to_async_url(url: str):
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' URLs; set ASYNC_DATABASE_URL")
+    parsed = parsed.set(drivername=f"{'postgresql' if backend == 'postgres' else backend}+{_ASYNC_DRIVERS[backend]}")
+    # asyncpg takes `ssl`, not libpq's `sslmode`
+    if "sslmode" in parsed.query:
+        query = dict(parsed.query)
+        query["ssl"] = query.pop("sslmode")
+        parsed = parsed.set(query=query)
+    return parsed
+
+def _async_database_url():
+    url = os.getenv("ASYNC_DATABASE_URL")
+    if url:
+        return url
+    try:
+        return to_async_url(DATABASE_URL)
+    except ValueError as e:
+        # Only the async routes need it; the rest of the app runs on the sync engine
+        logger.warning(f"{str(e)}; async routes are unavailable")
+        return None
+
+ASYNC_DATABASE_URL = _async_database_url()
+
+# Built on first use, so a backend without an async driver only fails the routes
+# that need one instead of the whole app at import
+async_engine = None
+async_pool_telemetry = None
+_async_sessionmaker = None
+_async_init_lock = threading.Lock()
+
+def get_async_engine():
+    global async_engine, async_pool_telemetry, _async_sessionmaker
+    if async_engine is None:
+        with _async_init_lock:
+            if async_engine is None:
+                if ASYNC_DATABASE_URL is None:
+                    raise RuntimeError("No async driver for DATABASE_URL; set ASYNC_DATABASE_URL to use async routes")
+                created = create_async_engine(ASYNC_DATABASE_URL, **engine_options(settings, is_async=True))
+                async_pool_telemetry = instrument_engine(created.sync_engine, "async", settings)
+                # Objects stay usable after commit; expiring them would force lazy loads, which
+                # an AsyncSession can only do inside run_sync
+                _async_sessionmaker = async_sessionmaker(bind=created, expire_on_commit=False)
+                async_engine = created
+    return async_engine
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _async_sessionmaker()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def pool_stats() -> dict:
+    return {
+        "sync": sync_pool_telemetry.snapshot(),
+        "async": async_pool_telemetry.snapshot() if async_pool_telemetry else None
+    }
+
+async def run_in_session(db, fn, *args, **kwargs):
+    """
+    Runs sync ORM code `fn(session, *args)` against either session flavour. On an
+    AsyncSession it goes through run_sync, so lazy loads and flushes await the driver
+    instead of blocking the event loop.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return fn(db, *args, **kwargs)
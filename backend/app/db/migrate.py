@@ -0,0 +1,143 @@
+"""
+Versioned schema migrations.
+
+Each module in app/db/migrations named NNNN_<slug>.py defines `upgrade(conn)` and
+is applied once per database, in version order; applied versions are recorded in
+the schema_migrations table. A module that sets `transactional = False` runs in
+autocommit mode (e.g. for Postgres CREATE INDEX CONCURRENTLY).
+
+    python -m app.db.migrate            # apply pending migrations
+    python -m app.db.migrate status     # list applied / pending versions
+"""
+import importlib
+import logging
+import os
+import re
+import sys
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+_MODULE_PATTERN = re.compile(r"^(\d{4})_\w+\.py$")
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _metadata,
+    Column("version", String, primary_key=True),
+    Column("name", String),
+    Column("applied_at", DateTime, default=datetime.utcnow)
+)
+
+
+class Migration:
+    def __init__(self, version: str, name: str, module):
+        self.version = version
+        self.name = name
+        self.module = module
+        self.transactional = getattr(module, "transactional", True)
+
+    def __repr__(self) -> str:
+        return f"{self.version}_{self.name}"
+
+
+def discover() -> List[Migration]:
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = _MODULE_PATTERN.match(filename)
+        if not match:
+            continue
+        module_name = filename[:-3]
+        module = importlib.import_module(f"app.db.migrations.{module_name}")
+        migrations.append(Migration(match.group(1), module_name[5:], module))
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions in {MIGRATIONS_DIR}: {versions}")
+    return migrations
+
+
+def applied_versions(engine: Engine) -> set:
+    with engine.begin() as conn:
+        _metadata.create_all(conn)
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending(engine: Engine) -> List[Migration]:
+    applied = applied_versions(engine)
+    return [m for m in discover() if m.version not in applied]
+
+
+def upgrade(engine: Engine) -> List[Migration]:
+    """Applies every pending migration in order; returns the ones applied."""
+    todo = pending(engine)
+    for migration in todo:
+        logger.info(f"Applying migration {migration}")
+        if migration.transactional:
+            with engine.begin() as conn:
+                migration.module.upgrade(conn)
+                _record(conn, migration)
+        else:
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                migration.module.upgrade(conn)
+                _record(conn, migration)
+    return todo
+
+
+def _record(conn: Connection, migration: Migration):
+    conn.execute(schema_migrations.insert().values(
+        version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+    ))
+
+
+# Helpers for migration modules. All of them are idempotent, since databases that
+# predate versioned migrations may already have some of the later columns and indexes.
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def add_column(conn: Connection, table: str, column: str, type_def: str):
+    if has_column(conn, table, column):
+        return
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {type_def}"))
+    logger.info(f"Added column {column} to {table}")
+
+
+def create_index(conn: Connection, name: str, table: str, columns: Sequence[str],
+                 unique: bool = False, concurrently: bool = False, where: Optional[str] = None):
+    """
+    CREATE INDEX IF NOT EXISTS. `concurrently` avoids locking writes on Postgres
+    (the migration must set transactional = False); other backends ignore it.
+    `where` makes a partial index (raw SQL, so it must suit the dialect).
+    """
+    quote = conn.dialect.identifier_preparer.quote
+    concurrent = " CONCURRENTLY" if concurrently and conn.dialect.name == "postgresql" else ""
+    conn.execute(text(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX{concurrent} IF NOT EXISTS {quote(name)} "
+        f"ON {quote(table)} ({', '.join(quote(c) for c in columns)})"
+        + (f" WHERE {where}" if where else "")
+    ))
+
+
+def drop_index(conn: Connection, name: str):
+    conn.execute(text(f"DROP INDEX IF EXISTS {conn.dialect.identifier_preparer.quote(name)}"))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    from app.db.database import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    if command == "upgrade":
+        applied = upgrade(engine)
+        print(f"Applied {len(applied)} migration(s)" + (f": {', '.join(map(str, applied))}" if applied else ""))
+    elif command == "status":
+        done = applied_versions(engine)
+        for migration in discover():
+            print(f"{'applied' if migration.version in done else 'pending'}  {migration}")
+    else:
+        sys.exit(f"Unknown command {command!r}; use upgrade or status")
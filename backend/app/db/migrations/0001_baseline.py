@@ -0,0 +1,436 @@
+"""
+Baseline schema: the tables as they stood when versioned migrations were
+introduced, frozen here so that later model changes only reach a database
+through their own migration. Existing databases keep their tables; the columns
+the old ad-hoc migrate_*.py scripts used to patch onto older ones are added.
+"""
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, MetaData, String, Table, Text
+
+from app.db.migrate import add_column
+
+metadata = MetaData()
+
+Table(
+    "research_topics", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, unique=True, index=True)
+)
+
+Table(
+    "skills", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, unique=True, index=True)
+)
+
+Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True),
+    Column("name", String),
+    Column("password_hash", String),
+    Column("provider", String),
+    Column("role", String),
+    Column("is_active", Boolean)
+)
+
+Table(
+    "beehive_events", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("organizer_id", Integer, ForeignKey("users.id")),
+    Column("title", String),
+    Column("description", Text),
+    Column("event_date", DateTime),
+    Column("duration_hours", Float),
+    Column("max_seats", Integer),
+    Column("entry_fee", Float),
+    Column("is_active", Boolean),
+    Column("created_at", DateTime)
+)
+
+Table(
+    "industrial_visits", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("organizer_id", Integer, ForeignKey("users.id")),
+    Column("title", String),
+    Column("company_name", String),
+    Column("location", String),
+    Column("description", Text),
+    Column("visit_date", DateTime),
+    Column("max_students", Integer),
+    Column("created_at", DateTime)
+)
+
+Table(
+    "meetings", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("organizer_id", Integer, ForeignKey("users.id")),
+    Column("attendee_id", Integer, ForeignKey("users.id")),
+    Column("title", String),
+    Column("start_time", DateTime),
+    Column("end_time", DateTime),
+    Column("status", String),
+    Column("link", String)
+)
+
+Table(
+    "mentor_profiles", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), unique=True),
+    Column("lab_name", String),
+    Column("university", String),
+    Column("position", String),
+    Column("research_areas", String),
+    Column("is_verified", Boolean),
+    Column("bio", Text),
+    Column("website_url", String),
+    Column("mentor_type", String),
+    Column("company", String),
+    Column("reputation_score", Float),
+    Column("outcome_count", Integer),
+    Column("accepting_phd_students", String),
+    Column("funding_available", String),
+    Column("preferred_backgrounds", Text),
+    Column("min_expectations", Text),
+    Column("max_student_requests", Integer),
+    Column("lab_size", Integer),
+    Column("time_commitment", String),
+    Column("application_requirements", Text),
+    Column("research_methodology", String),
+    Column("mentorship_style", String),
+    Column("alumni_placement", Text)
+)
+
+Table(
+    "messages", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("sender_id", Integer, ForeignKey("users.id")),
+    Column("receiver_id", Integer, ForeignKey("users.id")),
+    Column("content", Text),
+    Column("timestamp", DateTime),
+    Column("read", Boolean)
+)
+
+Table(
+    "opportunities", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("mentor_id", Integer, ForeignKey("users.id")),
+    Column("title", String, index=True),
+    Column("description", Text),
+    Column("type", String),
+    Column("requirements", Text),
+    Column("created_at", DateTime),
+    Column("is_open", Boolean),
+    Column("deadline", DateTime),
+    Column("total_slots", Integer),
+    Column("curriculum", Text),
+    Column("funding_amount", Float),
+    Column("currency", String),
+    Column("grant_agency", String)
+)
+
+Table(
+    "real_world_project_interests", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("student_id", Integer, ForeignKey("users.id")),
+    Column("interest_area", Text),
+    Column("preferred_industry", String),
+    Column("current_skills", Text),
+    Column("status", String),
+    Column("created_at", DateTime)
+)
+
+Table(
+    "references", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("mentor_id", Integer, ForeignKey("users.id")),
+    Column("student_id", Integer, ForeignKey("users.id")),
+    Column("content", Text),
+    Column("is_silent", Boolean),
+    Column("created_at", DateTime)
+)
+
+Table(
+    "student_profiles", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), unique=True),
+    Column("university", String),
+    Column("degree", String),
+    Column("major", String),
+    Column("graduation_year", Integer),
+    Column("bio", Text),
+    Column("github_url", String),
+    Column("scholar_url", String),
+    Column("website_url", String),
+    Column("intro_video_url", String),
+    Column("phone_number", String),
+    Column("city", String),
+    Column("country", String),
+    Column("gender", String),
+    Column("languages", Text),
+    Column("current_status", String),
+    Column("start_year", Integer),
+    Column("interests", Text),
+    Column("resume_url", String),
+    Column("headline", String),
+    Column("linkedin_url", String),
+    Column("twitter_url", String),
+    Column("primary_skills", Text),
+    Column("tools_libraries", Text),
+    Column("readiness_score", Float),
+    Column("is_phd_seeker", Boolean),
+    Column("research_interests", Text),
+    Column("gpa", String),
+    Column("gre_score", String),
+    Column("toefl_score", String)
+)
+
+Table(
+    "user_skills", metadata,
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    Column("skill_id", Integer, ForeignKey("skills.id"), primary_key=True)
+)
+
+Table(
+    "applications", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("student_id", Integer, ForeignKey("users.id")),
+    Column("opportunity_id", Integer, ForeignKey("opportunities.id")),
+    Column("status", String),
+    Column("cover_letter", Text),
+    Column("created_at", DateTime),
+    Column("match_score", Float),
+    Column("match_details", Text),
+    Column("funding_status", String)
+)
+
+Table(
+    "assignments", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("opportunity_id", Integer, ForeignKey("opportunities.id")),
+    Column("title", String),
+    Column("description", Text),
+    Column("type", String),
+    Column("due_date", DateTime),
+    Column("created_at", DateTime)
+)
+
+Table(
+    "beehive_contacts", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("event_id", Integer, ForeignKey("beehive_events.id")),
+    Column("first_name", String),
+    Column("last_name", String),
+    Column("phone", String),
+    Column("email", String),
+    Column("interests", Text),
+    Column("message", Text),
+    Column("created_at", DateTime)
+)
+
+Table(
+    "beehive_enrollments", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("event_id", Integer, ForeignKey("beehive_events.id")),
+    Column("student_id", Integer, ForeignKey("users.id")),
+    Column("payment_status", String),
+    Column("status", String),
+    Column("enrolled_at", DateTime)
+)
+
+Table(
+    "certificates", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("uuid", String, unique=True, index=True),
+    Column("student_id", Integer, ForeignKey("users.id")),
+    Column("mentor_id", Integer, ForeignKey("users.id")),
+    Column("opportunity_id", Integer, ForeignKey("opportunities.id")),
+    Column("issue_date", DateTime),
+    Column("pdf_url", String)
+)
+
+Table(
+    "educations", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("student_profile_id", Integer, ForeignKey("student_profiles.id")),
+    Column("institution", String),
+    Column("degree", String),
+    Column("start_year", String),
+    Column("end_year", String),
+    Column("grade", String)
+)
+
+Table(
+    "improvement_plans", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("student_id", Integer, ForeignKey("users.id")),
+    Column("opportunity_id", Integer, ForeignKey("opportunities.id")),
+    Column("created_at", DateTime),
+    Column("status", String)
+)
+
+Table(
+    "industrial_visit_enrollments", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("visit_id", Integer, ForeignKey("industrial_visits.id")),
+    Column("student_id", Integer, ForeignKey("users.id")),
+    Column("status", String),
+    Column("created_at", DateTime)
+)
+
+Table(
+    "mentor_topic_trends", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("mentor_id", Integer, ForeignKey("mentor_profiles.id")),
+    Column("topic_id", Integer, ForeignKey("research_topics.id")),
+    Column("trend_status", String),
+    Column("total_count", Integer),
+    Column("last_active_year", Integer)
+)
+
+Table(
+    "opportunity_skills", metadata,
+    Column("opportunity_id", Integer, ForeignKey("opportunities.id"), primary_key=True),
+    Column("skill_id", Integer, ForeignKey("skills.id"), primary_key=True),
+    Column("weight", Integer)
+)
+
+Table(
+    "projects", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("student_profile_id", Integer, ForeignKey("student_profiles.id")),
+    Column("title", String),
+    Column("tech_stack", Text),
+    Column("url", String),
+    Column("description", Text)
+)
+
+Table(
+    "publication_projects", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String),
+    Column("student_id", Integer, ForeignKey("users.id")),
+    Column("mentor_id", Integer, ForeignKey("users.id")),
+    Column("opportunity_id", Integer, ForeignKey("opportunities.id")),
+    Column("status", String),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime)
+)
+
+Table(
+    "publications", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("student_profile_id", Integer, ForeignKey("student_profiles.id")),
+    Column("mentor_profile_id", Integer, ForeignKey("mentor_profiles.id")),
+    Column("title", String),
+    Column("journal_conference", String),
+    Column("publication_date", String),
+    Column("url", String),
+    Column("description", Text),
+    Column("citation_count", Integer),
+    Column("doi", String)
+)
+
+Table(
+    "saved_research_gaps", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("student_id", Integer, ForeignKey("users.id")),
+    Column("mentor_id", Integer, ForeignKey("mentor_profiles.id")),
+    Column("title", String),
+    Column("description", Text),
+    Column("type", String),
+    Column("why_gap", Text),
+    Column("reason_student", Text),
+    Column("reason_mentor", Text),
+    Column("feasibility_score", Integer),
+    Column("confidence_score", Integer),
+    Column("related_papers", Text),
+    Column("created_at", DateTime)
+)
+
+Table(
+    "work_experiences", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("student_profile_id", Integer, ForeignKey("student_profiles.id")),
+    Column("title", String),
+    Column("company", String),
+    Column("start_date", String),
+    Column("end_date", String),
+    Column("description", Text),
+    Column("skills_used", Text)
+)
+
+Table(
+    "plan_items", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("plan_id", Integer, ForeignKey("improvement_plans.id")),
+    Column("title", String),
+    Column("description", Text),
+    Column("type", String),
+    Column("status", String),
+    Column("evidence_link", String),
+    Column("created_at", DateTime),
+    Column("deadline", DateTime),
+    Column("estimated_hours", String),
+    Column("priority", String)
+)
+
+Table(
+    "project_files", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("project_id", Integer, ForeignKey("publication_projects.id")),
+    Column("uploader_id", Integer, ForeignKey("users.id")),
+    Column("name", String),
+    Column("url", String),
+    Column("version", Integer),
+    Column("created_at", DateTime)
+)
+
+Table(
+    "submissions", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("assignment_id", Integer, ForeignKey("assignments.id")),
+    Column("student_id", Integer, ForeignKey("users.id")),
+    Column("content", Text),
+    Column("file_url", String),
+    Column("submitted_at", DateTime),
+    Column("grade", Float),
+    Column("feedback", Text),
+    Column("rubric_scores", Text),
+    Column("audio_feedback_url", String)
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn)
+
+    # Improvement plan scheduling
+    add_column(conn, "plan_items", "deadline", "TIMESTAMP")
+    add_column(conn, "plan_items", "estimated_hours", "VARCHAR")
+    add_column(conn, "plan_items", "priority", "VARCHAR DEFAULT 'medium'")
+
+    # PhD matcher
+    add_column(conn, "student_profiles", "is_phd_seeker", "BOOLEAN DEFAULT FALSE")
+    add_column(conn, "student_profiles", "research_interests", "TEXT")
+    add_column(conn, "student_profiles", "gpa", "VARCHAR")
+    add_column(conn, "student_profiles", "gre_score", "VARCHAR")
+    add_column(conn, "student_profiles", "toefl_score", "VARCHAR")
+    add_column(conn, "mentor_profiles", "accepting_phd_students", "VARCHAR")
+    add_column(conn, "mentor_profiles", "funding_available", "VARCHAR")
+    add_column(conn, "mentor_profiles", "preferred_backgrounds", "TEXT")
+    add_column(conn, "mentor_profiles", "min_expectations", "TEXT")
+    add_column(conn, "mentor_profiles", "max_student_requests", "INTEGER DEFAULT 5")
+    add_column(conn, "mentor_profiles", "lab_size", "INTEGER")
+    add_column(conn, "mentor_profiles", "time_commitment", "VARCHAR")
+    add_column(conn, "mentor_profiles", "application_requirements", "TEXT")
+    add_column(conn, "mentor_profiles", "research_methodology", "VARCHAR")
+    add_column(conn, "mentor_profiles", "mentorship_style", "VARCHAR")
+    add_column(conn, "mentor_profiles", "alumni_placement", "TEXT")
+
+    # Mentor types
+    add_column(conn, "mentor_profiles", "mentor_type", "VARCHAR DEFAULT 'academic_supervisor'")
+    add_column(conn, "mentor_profiles", "company", "VARCHAR")
+
+    # Research intelligence
+    add_column(conn, "publications", "mentor_profile_id", "INTEGER REFERENCES mentor_profiles(id)")
+    add_column(conn, "publications", "citation_count", "INTEGER DEFAULT 0")
+    add_column(conn, "publications", "doi", "VARCHAR")
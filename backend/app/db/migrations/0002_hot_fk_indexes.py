@@ -0,0 +1,47 @@
+"""
+Indexes for the foreign-key filters on hot paths, shaped to the queries that use
+them: equality columns first, then the ORDER BY / range column.
+"""
+from app.db.migrate import create_index
+
+# Built CONCURRENTLY on Postgres so messages/applications stay writable meanwhile
+transactional = False
+
+INDEXES = [
+    # "My applications" + duplicate-application check; mentor's applicant list by score
+    ("ix_applications_student_id_opportunity_id", "applications", ["student_id", "opportunity_id"]),
+    ("ix_applications_opportunity_id_match_score", "applications", ["opportunity_id", "match_score"]),
+    ("ix_opportunities_mentor_id", "opportunities", ["mentor_id"]),
+    # Publication count per mentor, latest 10 for gap analysis
+    ("ix_publications_mentor_profile_id_publication_date", "publications", ["mentor_profile_id", "publication_date"]),
+    ("ix_publications_student_profile_id", "publications", ["student_profile_id"]),
+    # Top-5 trends per mentor by count
+    ("ix_mentor_topic_trends_mentor_id_total_count", "mentor_topic_trends", ["mentor_id", "total_count"]),
+    ("ix_assignments_opportunity_id", "assignments", ["opportunity_id"]),
+    ("ix_submissions_assignment_id_student_id", "submissions", ["assignment_id", "student_id"]),
+    ("ix_improvement_plans_student_id_opportunity_id", "improvement_plans", ["student_id", "opportunity_id"]),
+    ("ix_improvement_plans_opportunity_id", "improvement_plans", ["opportunity_id"]),
+    ("ix_plan_items_plan_id", "plan_items", ["plan_id"]),
+    ("ix_industrial_visit_enrollments_visit_id_student_id", "industrial_visit_enrollments", ["visit_id", "student_id"]),
+    ("ix_beehive_enrollments_event_id_student_id", "beehive_enrollments", ["event_id", "student_id"]),
+    ("ix_real_world_project_interests_student_id", "real_world_project_interests", ["student_id"]),
+    ("ix_meetings_organizer_id_start_time", "meetings", ["organizer_id", "start_time"]),
+    ("ix_meetings_attendee_id_start_time", "meetings", ["attendee_id", "start_time"]),
+    ("ix_publication_projects_mentor_id_status", "publication_projects", ["mentor_id", "status"]),
+    ("ix_publication_projects_student_id", "publication_projects", ["student_id"]),
+    ("ix_certificates_student_id", "certificates", ["student_id"]),
+    ("ix_certificates_mentor_id", "certificates", ["mentor_id"]),
+    ("ix_references_student_id", "references", ["student_id"]),
+    ("ix_saved_research_gaps_student_id_created_at", "saved_research_gaps", ["student_id", "created_at"]),
+    # Profile sub-collections, loaded with every full student profile
+    ("ix_work_experiences_student_profile_id", "work_experiences", ["student_profile_id"]),
+    ("ix_educations_student_profile_id", "educations", ["student_profile_id"]),
+    ("ix_projects_student_profile_id", "projects", ["student_profile_id"]),
+    # Admin student/mentor lists and platform analytics counts
+    ("ix_users_role", "users", ["role"]),
+]
+
+
+def upgrade(conn):
+    for name, table, columns in INDEXES:
+        create_index(conn, name, table, columns, concurrently=True)
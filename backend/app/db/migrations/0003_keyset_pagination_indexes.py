@@ -0,0 +1,20 @@
+"""
+Indexes on the keyset pagination sort keys, so each page is an index range scan
+rather than a sort of the whole table.
+"""
+from app.db.migrate import create_index
+
+transactional = False
+
+INDEXES = [
+    ("ix_opportunities_created_at_id", "opportunities", ["created_at", "id"]),
+    ("ix_applications_created_at_id", "applications", ["created_at", "id"]),
+    ("ix_industrial_visits_created_at_id", "industrial_visits", ["created_at", "id"]),
+    ("ix_beehive_events_is_active_created_at_id", "beehive_events", ["is_active", "created_at", "id"]),
+    ("ix_beehive_contacts_created_at_id", "beehive_contacts", ["created_at", "id"]),
+]
+
+
+def upgrade(conn):
+    for name, table, columns in INDEXES:
+        create_index(conn, name, table, columns, concurrently=True)
@@ -0,0 +1,30 @@
+"""
+Conversation summary table, backfilled from existing messages: per participant,
+the latest message (ROW_NUMBER over the pair) and the count of unread incoming ones.
+"""
+from sqlalchemy import text
+
+from app.db import models
+
+
+def upgrade(conn):
+    models.Conversation.__table__.create(conn, checkfirst=True)
+    conn.execute(text("DELETE FROM conversations"))
+    conn.execute(text("""
+        INSERT INTO conversations (user_id, partner_id, last_message_id, last_message_at, unread_count)
+        SELECT user_id, partner_id, message_id, sent_at, unread
+        FROM (
+            SELECT
+                user_id, partner_id, id AS message_id, timestamp AS sent_at,
+                ROW_NUMBER() OVER (PARTITION BY user_id, partner_id ORDER BY timestamp DESC, id DESC) AS position,
+                SUM(CASE WHEN incoming = 1 AND read IS NOT TRUE THEN 1 ELSE 0 END)
+                    OVER (PARTITION BY user_id, partner_id) AS unread
+            FROM (
+                SELECT sender_id AS user_id, receiver_id AS partner_id, id, timestamp, read, 0 AS incoming FROM messages
+                UNION ALL
+                SELECT receiver_id, sender_id, id, timestamp, read, 1 FROM messages
+            ) AS sides
+            WHERE user_id IS NOT NULL AND partner_id IS NOT NULL
+        ) AS ranked
+        WHERE position = 1
+    """))
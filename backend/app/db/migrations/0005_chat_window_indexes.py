@@ -0,0 +1,20 @@
+"""
+Chat history is windowed by message id (since_id / before_id): each side of a
+conversation is a range on (sender_id, receiver_id, id). A partial index over
+unread messages backs unread counts and bulk mark-as-read; reconnect catch-up
+(id > since_id) uses the primary key.
+"""
+from app.db.migrate import create_index
+
+transactional = False
+
+# Must match the predicate SQLAlchemy renders for Message.read.isnot(True)
+UNREAD_PREDICATE = {"sqlite": "read IS NOT 1", "postgresql": "read IS NOT true"}
+
+
+def upgrade(conn):
+    create_index(conn, "ix_messages_sender_id_receiver_id_id", "messages", ["sender_id", "receiver_id", "id"], concurrently=True)
+    predicate = UNREAD_PREDICATE.get(conn.dialect.name)
+    if predicate:
+        create_index(conn, "ix_messages_unread", "messages", ["receiver_id", "sender_id", "id"],
+                     concurrently=True, where=predicate)
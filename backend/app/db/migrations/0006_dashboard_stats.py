@@ -0,0 +1,9 @@
+"""
+Rollup table behind /analytics/dashboard. It starts empty; the first dashboard
+read falls back to a live query and schedules the initial refresh.
+"""
+from app.db import models
+
+
+def upgrade(conn):
+    models.DashboardStats.__table__.create(conn, checkfirst=True)
@@ -0,0 +1,49 @@
+"""
+Daily counters for /analytics/timeseries, backfilled from existing rows.
+
+Acceptances and publications have no timestamp of their own, so history counts
+them on the application's created_at and the project's updated_at; from now on
+they are counted on the day the status changes.
+"""
+from sqlalchemy import Date, cast, func, literal, select, text
+
+from app.db import models
+
+Application, Opportunity = models.Application, models.Opportunity
+Certificate, PublicationProject = models.Certificate, models.PublicationProject
+
+
+def _sources():
+    # (metric, timestamp, mentor id, opportunity id, value, select_from, filters)
+    applications = Application.__table__.outerjoin(Opportunity.__table__, Application.opportunity_id == Opportunity.id)
+    return [
+        ("applications", Application.created_at, Opportunity.mentor_id, Application.opportunity_id,
+         func.count(), applications, []),
+        ("applications_accepted", Application.created_at, Opportunity.mentor_id, Application.opportunity_id,
+         func.count(), applications, [Application.status == "accepted"]),
+        ("certificates", Certificate.issue_date, Certificate.mentor_id, Certificate.opportunity_id,
+         func.count(), Certificate.__table__, []),
+        ("projects_started", PublicationProject.created_at, PublicationProject.mentor_id, PublicationProject.opportunity_id,
+         func.count(), PublicationProject.__table__, []),
+        ("projects_published", PublicationProject.updated_at, PublicationProject.mentor_id, PublicationProject.opportunity_id,
+         func.count(), PublicationProject.__table__, [PublicationProject.status == "Published"]),
+        ("funding_committed", Opportunity.created_at, Opportunity.mentor_id, Opportunity.id,
+         func.sum(Opportunity.funding_amount), Opportunity.__table__, [Opportunity.funding_amount.isnot(None)]),
+    ]
+
+
+def upgrade(conn):
+    models.DailyStat.__table__.create(conn, checkfirst=True)
+    conn.execute(text("DELETE FROM daily_stats"))
+    daily_stats = models.DailyStat.__table__
+    for metric, timestamp, mentor_id, opportunity_id, value, source, filters in _sources():
+        # SQLite keeps dates as ISO text, which is what date() returns
+        day = func.date(timestamp) if conn.dialect.name == "sqlite" else cast(timestamp, Date)
+        mentor_id, opportunity_id = func.coalesce(mentor_id, 0), func.coalesce(opportunity_id, 0)
+        query = select(literal(metric), mentor_id, opportunity_id, day, value)\
+            .select_from(source)\
+            .where(timestamp.isnot(None), *filters)\
+            .group_by(mentor_id, opportunity_id, day)
+        conn.execute(daily_stats.insert().from_select(
+            ["metric", "mentor_id", "opportunity_id", "day", "value"], query
+        ))
@@ -0,0 +1,9 @@
+"""
+Publication-to-topic links written by trend analysis. The model was referenced
+by ResearchService but never defined, so no database has the table yet.
+"""
+from app.db import models
+
+
+def upgrade(conn):
+    models.PublicationTopic.__table__.create(conn, checkfirst=True)
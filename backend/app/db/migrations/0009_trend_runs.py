@@ -0,0 +1,13 @@
+"""
+Checkpoint tables for trend recompute runs, and the per-mentor markers used to
+find mentors whose publications changed since their last analysis.
+"""
+from app.db import models
+from app.db.migrate import add_column
+
+
+def upgrade(conn):
+    add_column(conn, "mentor_profiles", "trends_analyzed_at", "TIMESTAMP")
+    add_column(conn, "mentor_profiles", "trends_fingerprint", "VARCHAR")
+    models.TrendRun.__table__.create(conn, checkfirst=True)
+    models.TrendRunItem.__table__.create(conn, checkfirst=True)
@@ -0,0 +1,8 @@
+"""
+Durable job queue that replaces in-process BackgroundTasks for AI work.
+"""
+from app.db import models
+
+
+def upgrade(conn):
+    models.Job.__table__.create(conn, checkfirst=True)
@@ -0,0 +1,47 @@
+"""
+Per-(mentor, topic, year) publication and citation counts, backfilled from the
+links behind each mentor's current trends.
+"""
+from collections import defaultdict
+
+from sqlalchemy import select
+
+from app.db import models
+
+Publication, PublicationTopic = models.Publication, models.PublicationTopic
+MentorTopicTrend = models.MentorTopicTrend
+
+
+def _year(publication_date):
+    try:
+        return int(publication_date[:4])
+    except (TypeError, ValueError):
+        return None
+
+
+def upgrade(conn):
+    table = models.MentorTopicYear.__table__
+    table.create(conn, checkfirst=True)
+    conn.execute(table.delete())
+
+    # publication_topics keeps links from earlier analyses; count only the topics
+    # each mentor currently has trends for
+    rows = conn.execute(
+        select(Publication.mentor_profile_id, PublicationTopic.topic_id, Publication.publication_date, Publication.citation_count)
+        .select_from(PublicationTopic.__table__.join(Publication.__table__, PublicationTopic.publication_id == Publication.id))
+        .join(MentorTopicTrend.__table__, (MentorTopicTrend.mentor_id == Publication.mentor_profile_id) &
+              (MentorTopicTrend.topic_id == PublicationTopic.topic_id))
+    )
+    buckets = defaultdict(lambda: [0, 0])
+    for mentor_id, topic_id, publication_date, citations in rows:
+        year = _year(publication_date)
+        if year is None:
+            continue
+        bucket = buckets[(mentor_id, topic_id, year)]
+        bucket[0] += 1
+        bucket[1] += citations or 0
+    if buckets:
+        conn.execute(table.insert(), [
+            {"mentor_id": mentor_id, "topic_id": topic_id, "year": year, "publications": publications, "citations": citations}
+            for (mentor_id, topic_id, year), (publications, citations) in buckets.items()
+        ])
@@ -0,0 +1,8 @@
+"""
+Stored publication embeddings for topic classification in trend analysis.
+"""
+from app.db import models
+
+
+def upgrade(conn):
+    models.PublicationEmbedding.__table__.create(conn, checkfirst=True)
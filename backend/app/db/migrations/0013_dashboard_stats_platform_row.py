@@ -0,0 +1,12 @@
+"""
+dashboard_stats keys the platform row as mentor_id 0 instead of NULL, so it is
+covered by the unique constraint. The table only holds rollups, so it is
+recreated empty; the next dashboard read reads live and schedules a refresh.
+"""
+from app.db import models
+
+
+def upgrade(conn):
+    table = models.DashboardStats.__table__
+    table.drop(conn, checkfirst=True)
+    table.create(conn)
@@ -0,0 +1,9 @@
+"""
+Stored mentor embeddings reused at match time. Until the baseline was frozen the
+table only came from create_all(); backfill_mentor_embeddings.py fills it.
+"""
+from app.db import models
+
+
+def upgrade(conn):
+    models.MentorEmbedding.__table__.create(conn, checkfirst=True)
@@ -0,0 +1,15 @@
+"""
+applications.match_score becomes NOT NULL, 0 when unknown. Mentors' applicant
+pages are keyed on it, and a NULL key falls out of the keyset comparison, which
+dropped those rows. New applications always get a score; only older rows lack
+one. SQLite can't add the constraint to an existing column, so there the model
+default keeps new rows non-NULL.
+"""
+from sqlalchemy import text
+
+
+def upgrade(conn):
+    conn.execute(text("UPDATE applications SET match_score = 0 WHERE match_score IS NULL"))
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TABLE applications ALTER COLUMN match_score SET DEFAULT 0, "
+                          "ALTER COLUMN match_score SET NOT NULL"))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Text, Table, DateTime, Float
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Text, Table, DateTime, Date, Float, LargeBinary, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.database import Base
@@ -18,7 +18,7 @@ class User(Base):
     name = Column(String)
     password_hash = Column(String)
     provider = Column(String, default="local")
-    role = Column(String) # student, mentor, admin
+    role = Column(String, index=True) # student, mentor, admin
     is_active = Column(Boolean, default=True)
 
     # Relationships
@@ -34,7 +34,7 @@ class RealWorldProjectInterest(Base):
     __tablename__ = "real_world_project_interests"
 
     id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(Integer, ForeignKey("users.id"))
+    student_id = Column(Integer, ForeignKey("users.id"), index=True)
     interest_area = Column(Text) # e.g., AI, Web Dev, IoT
     preferred_industry = Column(String)
     current_skills = Column(Text)
@@ -45,6 +45,9 @@ class RealWorldProjectInterest(Base):
 
 class IndustrialVisit(Base):
     __tablename__ = "industrial_visits"
+    __table_args__ = (
+        Index("ix_industrial_visits_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     organizer_id = Column(Integer, ForeignKey("users.id")) # Admin or Mentor
@@ -61,6 +64,9 @@ class IndustrialVisit(Base):
 
 class IndustrialVisitEnrollment(Base):
     __tablename__ = "industrial_visit_enrollments"
+    __table_args__ = (
+        Index("ix_industrial_visit_enrollments_visit_id_student_id", "visit_id", "student_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     visit_id = Column(Integer, ForeignKey("industrial_visits.id"))
@@ -73,6 +79,9 @@ class IndustrialVisitEnrollment(Base):
 
 class BeehiveEvent(Base):
     __tablename__ = "beehive_events"
+    __table_args__ = (
+        Index("ix_beehive_events_is_active_created_at_id", "is_active", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     organizer_id = Column(Integer, ForeignKey("users.id")) # Admin only usually
@@ -90,6 +99,9 @@ class BeehiveEvent(Base):
 
 class BeehiveEnrollment(Base):
     __tablename__ = "beehive_enrollments"
+    __table_args__ = (
+        Index("ix_beehive_enrollments_event_id_student_id", "event_id", "student_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     event_id = Column(Integer, ForeignKey("beehive_events.id"))
@@ -103,6 +115,9 @@ class BeehiveEnrollment(Base):
 
 class BeehiveContact(Base):
     __tablename__ = "beehive_contacts"
+    __table_args__ = (
+        Index("ix_beehive_contacts_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     event_id = Column(Integer, ForeignKey("beehive_events.id"), nullable=True)
@@ -171,7 +186,7 @@ class WorkExperience(Base):
     __tablename__ = "work_experiences"
     
     id = Column(Integer, primary_key=True, index=True)
-    student_profile_id = Column(Integer, ForeignKey("student_profiles.id"))
+    student_profile_id = Column(Integer, ForeignKey("student_profiles.id"), index=True)
     
     title = Column(String)
     company = Column(String)
@@ -186,7 +201,7 @@ class Education(Base):
     __tablename__ = "educations"
     
     id = Column(Integer, primary_key=True, index=True)
-    student_profile_id = Column(Integer, ForeignKey("student_profiles.id"))
+    student_profile_id = Column(Integer, ForeignKey("student_profiles.id"), index=True)
     
     institution = Column(String)
     degree = Column(String)
@@ -200,7 +215,7 @@ class Project(Base):
     __tablename__ = "projects"
     
     id = Column(Integer, primary_key=True, index=True)
-    student_profile_id = Column(Integer, ForeignKey("student_profiles.id"))
+    student_profile_id = Column(Integer, ForeignKey("student_profiles.id"), index=True)
     
     title = Column(String)
     tech_stack = Column(Text) # Comma separated
@@ -211,9 +226,12 @@ class Project(Base):
 
 class Publication(Base):
     __tablename__ = "publications"
+    __table_args__ = (
+        Index("ix_publications_mentor_profile_id_publication_date", "mentor_profile_id", "publication_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    student_profile_id = Column(Integer, ForeignKey("student_profiles.id"), nullable=True)
+    student_profile_id = Column(Integer, ForeignKey("student_profiles.id"), nullable=True, index=True)
     mentor_profile_id = Column(Integer, ForeignKey("mentor_profiles.id"), nullable=True)
     
     title = Column(String)
@@ -228,6 +246,20 @@ class Publication(Base):
     
     student_profile = relationship("StudentProfile", back_populates="publications")
     mentor_profile = relationship("MentorProfile", back_populates="publications")
+    embedding = relationship("PublicationEmbedding", back_populates="publication", uselist=False, cascade="all, delete-orphan")
+
+# Reused by trend analysis until the title/abstract (or the embedding model) changes
+class PublicationEmbedding(Base):
+    __tablename__ = "publication_embeddings"
+
+    publication_id = Column(Integer, ForeignKey("publications.id"), primary_key=True)
+    content_hash = Column(String(64)) # sha256 of the embedded title/abstract text
+    model = Column(String) # Embedding model that produced the vector
+    dimensions = Column(Integer)
+    vector = Column(LargeBinary) # Packed float32 array
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    publication = relationship("Publication", back_populates="embedding")
 
 class ResearchTopic(Base):
     __tablename__ = "research_topics"
@@ -237,8 +269,32 @@ class ResearchTopic(Base):
 
     mentor_trends = relationship("MentorTopicTrend", back_populates="topic")
 
+# Which publications mention which topics, filled in by trend analysis
+class PublicationTopic(Base):
+    __tablename__ = "publication_topics"
+
+    publication_id = Column(Integer, ForeignKey("publications.id"), primary_key=True)
+    topic_id = Column(Integer, ForeignKey("research_topics.id"), primary_key=True, index=True)
+
+    publication = relationship("Publication")
+    topic = relationship("ResearchTopic")
+
+# Per-year counts behind MentorTopicTrend, so trends can be re-derived for any
+# window without re-running topic extraction (see app/services/trend_stats.py)
+class MentorTopicYear(Base):
+    __tablename__ = "mentor_topic_years"
+
+    mentor_id = Column(Integer, ForeignKey("mentor_profiles.id"), primary_key=True)
+    topic_id = Column(Integer, ForeignKey("research_topics.id"), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    publications = Column(Integer, nullable=False, default=0)
+    citations = Column(Integer, nullable=False, default=0)
+
 class MentorTopicTrend(Base):
     __tablename__ = "mentor_topic_trends"
+    __table_args__ = (
+        Index("ix_mentor_topic_trends_mentor_id_total_count", "mentor_id", "total_count"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     mentor_id = Column(Integer, ForeignKey("mentor_profiles.id"))
@@ -287,11 +343,29 @@ class MentorProfile(Base):
     research_methodology = Column(String) # Theoretical, Experimental, Computational
     mentorship_style = Column(String) # Hands-on, Hands-off, etc.
     alumni_placement = Column(Text) # Where alumni have gone
+
+    # Trend analysis: when it last ran, and on which publications (a hash of what the
+    # analysis reads from them), so recompute jobs can skip mentors whose papers have not changed
+    trends_analyzed_at = Column(DateTime, nullable=True)
+    trends_fingerprint = Column(String, nullable=True)
     
     # Relationships
     user = relationship("User", back_populates="mentor_profile")
     publications = relationship("Publication", back_populates="mentor_profile", cascade="all, delete-orphan")
     topic_trends = relationship("MentorTopicTrend", back_populates="mentor", cascade="all, delete-orphan")
+    embedding = relationship("MentorEmbedding", back_populates="mentor", uselist=False, cascade="all, delete-orphan")
+
+class MentorEmbedding(Base):
+    __tablename__ = "mentor_embeddings"
+
+    mentor_id = Column(Integer, ForeignKey("mentor_profiles.id"), primary_key=True)
+    content_hash = Column(String(64)) # sha256 of the embedded research_areas/bio text
+    model = Column(String) # Embedding model that produced the vector
+    dimensions = Column(Integer)
+    vector = Column(LargeBinary) # Packed float32 array
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    mentor = relationship("MentorProfile", back_populates="embedding")
 
 class Skill(Base):
     __tablename__ = "skills"
@@ -305,9 +379,12 @@ class Skill(Base):
 
 class Opportunity(Base):
     __tablename__ = "opportunities"
+    __table_args__ = (
+        Index("ix_opportunities_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    mentor_id = Column(Integer, ForeignKey("users.id"))
+    mentor_id = Column(Integer, ForeignKey("users.id"), index=True)
     title = Column(String, index=True)
     description = Column(Text)
     type = Column(String) # internship, research_assistant, phd_guidance, collaboration
@@ -335,8 +412,8 @@ class Certificate(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     uuid = Column(String, unique=True, index=True) # Public verification code
-    student_id = Column(Integer, ForeignKey("users.id"))
-    mentor_id = Column(Integer, ForeignKey("users.id"))
+    student_id = Column(Integer, ForeignKey("users.id"), index=True)
+    mentor_id = Column(Integer, ForeignKey("users.id"), index=True)
     opportunity_id = Column(Integer, ForeignKey("opportunities.id"))
     issue_date = Column(DateTime, default=datetime.utcnow)
     pdf_url = Column(String)
@@ -357,6 +434,11 @@ class OpportunitySkill(Base):
 
 class Application(Base):
     __tablename__ = "applications"
+    __table_args__ = (
+        Index("ix_applications_student_id_opportunity_id", "student_id", "opportunity_id"),
+        Index("ix_applications_opportunity_id_match_score", "opportunity_id", "match_score"),
+        Index("ix_applications_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("users.id"))
@@ -364,7 +446,7 @@ class Application(Base):
     status = Column(String, default="pending") # pending, reviewing, accepted, rejected
     cover_letter = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
-    match_score = Column(Float, default=0.0) # Snapshot of match score at time of application
+    match_score = Column(Float, default=0.0, nullable=False) # Snapshot of match score at time of application; keys the ranked applicant pages
     match_details = Column(Text) # JSON string explaining the score (strengths, gaps)
     
     # Phase 7: Funding
@@ -376,10 +458,13 @@ class Application(Base):
 
 class ImprovementPlan(Base):
     __tablename__ = "improvement_plans"
+    __table_args__ = (
+        Index("ix_improvement_plans_student_id_opportunity_id", "student_id", "opportunity_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("users.id"))
-    opportunity_id = Column(Integer, ForeignKey("opportunities.id"))
+    opportunity_id = Column(Integer, ForeignKey("opportunities.id"), index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     status = Column(String, default="in_progress") # in_progress, completed, abandoned
     
@@ -392,7 +477,7 @@ class PlanItem(Base):
     __tablename__ = "plan_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    plan_id = Column(Integer, ForeignKey("improvement_plans.id"))
+    plan_id = Column(Integer, ForeignKey("improvement_plans.id"), index=True)
     title = Column(String)
     description = Column(Text)
     type = Column(String) # skill_gap, mini_project, reading_list, sop
@@ -412,7 +497,7 @@ class Assignment(Base):
     __tablename__ = "assignments"
 
     id = Column(Integer, primary_key=True, index=True)
-    opportunity_id = Column(Integer, ForeignKey("opportunities.id"))
+    opportunity_id = Column(Integer, ForeignKey("opportunities.id"), index=True)
     title = Column(String)
     description = Column(Text)
     type = Column(String) # code, pdf, analysis
@@ -425,6 +510,9 @@ class Assignment(Base):
 
 class Submission(Base):
     __tablename__ = "submissions"
+    __table_args__ = (
+        Index("ix_submissions_assignment_id_student_id", "assignment_id", "student_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     assignment_id = Column(Integer, ForeignKey("assignments.id"))
@@ -445,10 +533,13 @@ class Submission(Base):
 
 class PublicationProject(Base):
     __tablename__ = "publication_projects"
+    __table_args__ = (
+        Index("ix_publication_projects_mentor_id_status", "mentor_id", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String)
-    student_id = Column(Integer, ForeignKey("users.id"))
+    student_id = Column(Integer, ForeignKey("users.id"), index=True)
     mentor_id = Column(Integer, ForeignKey("users.id"))
     opportunity_id = Column(Integer, ForeignKey("opportunities.id"), nullable=True)
     status = Column(String, default="Ideation") # Ideation, Literature Review, Experimentation, Drafting, Submission, Published
@@ -462,6 +553,12 @@ class PublicationProject(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_sender_id_receiver_id_id", "sender_id", "receiver_id", "id"),
+        # Unread messages only, so unread counts and mark-as-read never touch read rows
+        Index("ix_messages_unread", "receiver_id", "sender_id", "id",
+              sqlite_where=text("read IS NOT 1"), postgresql_where=text("read IS NOT true")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     sender_id = Column(Integer, ForeignKey("users.id"))
@@ -473,8 +570,31 @@ class Message(Base):
     sender = relationship("User", foreign_keys=[sender_id])
     receiver = relationship("User", foreign_keys=[receiver_id])
 
+# Denormalized inbox: one row per participant of each chat, maintained on every
+# message by app/services/conversations.py
+class Conversation(Base):
+    __tablename__ = "conversations"
+    __table_args__ = (
+        UniqueConstraint("user_id", "partner_id", name="uq_conversations_user_id_partner_id"),
+        Index("ix_conversations_user_id_last_message_at_id", "user_id", "last_message_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    partner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    last_message_id = Column(Integer, ForeignKey("messages.id"))
+    last_message_at = Column(DateTime)
+    unread_count = Column(Integer, default=0, nullable=False) # Messages from partner not yet read by user
+
+    partner = relationship("User", foreign_keys=[partner_id])
+    last_message = relationship("Message", foreign_keys=[last_message_id])
+
 class Meeting(Base):
     __tablename__ = "meetings"
+    __table_args__ = (
+        Index("ix_meetings_organizer_id_start_time", "organizer_id", "start_time"),
+        Index("ix_meetings_attendee_id_start_time", "attendee_id", "start_time"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     organizer_id = Column(Integer, ForeignKey("users.id"))
@@ -493,7 +613,7 @@ class Reference(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     mentor_id = Column(Integer, ForeignKey("users.id"))
-    student_id = Column(Integer, ForeignKey("users.id"))
+    student_id = Column(Integer, ForeignKey("users.id"), index=True)
     content = Column(Text)
     is_silent = Column(Boolean, default=True) # Visible only to other mentors/admins? Or aggregated?
     # Actually, user requirement says "Silent reference system" & "Reference visibility rules (private by design)"
@@ -519,6 +639,9 @@ class ProjectFile(Base):
 
 class SavedResearchGap(Base):
     __tablename__ = "saved_research_gaps"
+    __table_args__ = (
+        Index("ix_saved_research_gaps_student_id_created_at", "student_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("users.id"))
@@ -538,3 +661,101 @@ class SavedResearchGap(Base):
 
     student = relationship("User", foreign_keys=[student_id])
     mentor = relationship("MentorProfile", foreign_keys=[mentor_id])
+
+# Materialized /analytics/dashboard counters: one row per mentor plus a platform-wide
+# row (mentor_id 0), rebuilt together by app/services/analytics_rollup.py
+class DashboardStats(Base):
+    __tablename__ = "dashboard_stats"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Mentor's user id, or 0 for the platform row; a sentinel rather than NULL so
+    # the unique constraint also covers the platform row
+    mentor_id = Column(Integer, unique=True, nullable=False)
+    students = Column(Integer, default=0, nullable=False) # Platform: student accounts; mentor: distinct applicants
+    mentors = Column(Integer, default=0, nullable=False)
+    opportunities = Column(Integer, default=0, nullable=False)
+    applications = Column(Integer, default=0, nullable=False)
+    certificates = Column(Integer, default=0, nullable=False)
+    active_projects = Column(Integer, default=0, nullable=False)
+    published_projects = Column(Integer, default=0, nullable=False)
+    total_funding = Column(Float, default=0.0, nullable=False)
+    refreshed_at = Column(DateTime, nullable=False)
+
+# Per-day counters for /analytics/timeseries, incremented in the same transaction as
+# the write they count (app/services/daily_stats.py). mentor_id / opportunity_id are
+# 0 rather than NULL when absent, so each bucket has exactly one row to upsert.
+class DailyStat(Base):
+    __tablename__ = "daily_stats"
+    __table_args__ = (
+        UniqueConstraint("metric", "mentor_id", "opportunity_id", "day", name="uq_daily_stats_bucket"),
+        Index("ix_daily_stats_metric_mentor_id_day", "metric", "mentor_id", "day"),
+        Index("ix_daily_stats_metric_day", "metric", "day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    metric = Column(String, nullable=False) # See daily_stats.METRICS
+    mentor_id = Column(Integer, nullable=False, default=0)
+    opportunity_id = Column(Integer, nullable=False, default=0)
+    day = Column(Date, nullable=False)
+    value = Column(Float, nullable=False, default=0.0)
+
+# Platform-wide trend recomputation (app/services/trend_jobs.py): one row per run,
+# one item per mentor, so an interrupted run resumes with the mentors still pending
+class TrendRun(Base):
+    __tablename__ = "trend_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String, nullable=False) # all, changed
+    status = Column(String, nullable=False, default="running", index=True) # running, completed
+    total = Column(Integer, default=0, nullable=False)
+    done = Column(Integer, default=0, nullable=False)
+    failed = Column(Integer, default=0, nullable=False)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    heartbeat_at = Column(DateTime, default=datetime.utcnow) # Bumped while the run executes; a stale one means the runner died
+    finished_at = Column(DateTime, nullable=True)
+
+    items = relationship("TrendRunItem", back_populates="run", cascade="all, delete-orphan")
+
+class TrendRunItem(Base):
+    __tablename__ = "trend_run_items"
+    __table_args__ = (
+        Index("ix_trend_run_items_run_id_status", "run_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("trend_runs.id"), nullable=False)
+    mentor_id = Column(Integer, ForeignKey("mentor_profiles.id"), nullable=False)
+    status = Column(String, nullable=False, default="pending") # pending, done, failed
+    duration_ms = Column(Float, nullable=True)
+    error = Column(Text, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    run = relationship("TrendRun", back_populates="items")
+
+# Durable background jobs (app/services/job_queue.py), run by `python -m app.worker`
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_priority_id", "status", "priority", "id"),
+        Index("ix_jobs_status_lease_expires_at", "status", "lease_expires_at"),
+        Index("ix_jobs_mentor_id_type_id", "mentor_id", "type", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    type = Column(String, nullable=False)
+    mentor_id = Column(Integer, ForeignKey("mentor_profiles.id"), nullable=True)
+    payload = Column(Text, nullable=True) # JSON
+    # "<type>:<mentor id>" while queued or running, NULL once finished, so at most
+    # one active job per (type, mentor)
+    dedup_key = Column(String, unique=True, nullable=True)
+    status = Column(String, nullable=False, default="queued") # queued, running, succeeded, failed
+    priority = Column(Integer, nullable=False, default=0) # Higher runs first
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, default=datetime.utcnow) # Not leased before this (retry backoff)
+    locked_by = Column(String, nullable=True) # Worker holding the lease
+    lease_expires_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True) # Last failure
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -0,0 +1,52 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, tuple_
+from sqlalchemy.orm import Query
+
+from app.core.config import settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("wrong number of values")
+        return [
+            datetime.fromisoformat(value) if isinstance(key.type, DateTime) and value is not None else value
+            for key, value in zip(keys, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(query: Query, keys: Sequence, cursor: Optional[str], limit: int,
+             response: Response, descending: bool = True) -> List:
+    """
+    Keyset pagination: orders `query` by `keys` (ending in a unique column, usually
+    id) and returns the page after `cursor`. The cursor for the following page goes
+    in the X-Next-Cursor header, absent on the last page, so response bodies stay
+    plain lists. Each page is an index range scan, however deep it is.
+    """
+    limit = max(1, min(limit, settings.PAGE_SIZE_MAX))
+    if cursor:
+        position = tuple_(*keys)
+        after = tuple_(*decode_cursor(cursor, keys))
+        query = query.filter(position < after if descending else position > after)
+    query = query.order_by(*[key.desc() if descending else key.asc() for key in keys])
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(rows[-1], key.key) for key in keys])
+    return rows
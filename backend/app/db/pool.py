@@ -0,0 +1,187 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+_WAIT_SAMPLES = 1000  # recent checkout waits kept for percentiles
+
+
+class PoolTelemetry:
+    """
+    Counters for one engine's connection pool: how long checkouts wait for a
+    connection, how far the pool runs into overflow, and how often connections
+    are invalidated, pinged or time out.
+    """
+
+    def __init__(self, name: str, slow_checkout_ms: float = 0):
+        self.name = name
+        self.slow_checkout_ms = slow_checkout_ms
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=_WAIT_SAMPLES)
+        self.pool = None
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.pings = 0
+        self.ping_failures = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.overflow_peak = 0
+
+    def record_wait(self, wait_ms: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_ms_total += wait_ms
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+            self._waits.append(wait_ms)
+            if self.pool is not None:
+                self.overflow_peak = max(self.overflow_peak, self.pool.overflow())
+        if self.slow_checkout_ms and wait_ms >= self.slow_checkout_ms:
+            logger.warning(f"{self.name} pool: waited {wait_ms:.0f} ms for a connection ({self.pool.status()})")
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+        logger.error(f"{self.name} pool: checkout timed out ({self.pool.status()})")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            stats = {
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "pings": self.pings,
+                "ping_failures": self.ping_failures,
+                "wait_ms_avg": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 3),
+                "wait_ms_p50": _percentile(waits, 0.50),
+                "wait_ms_p95": _percentile(waits, 0.95),
+                "wait_ms_p99": _percentile(waits, 0.99),
+                "overflow_peak": self.overflow_peak
+            }
+        pool = self.pool
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow()
+            })
+        return stats
+
+
+def _percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return round(sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))], 3)
+
+
+class _InstrumentedGet:
+    """Times QueuePool._do_get, i.e. how long a checkout waits for a free connection."""
+
+    telemetry: Optional[PoolTelemetry] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            if self.telemetry:
+                self.telemetry.record_timeout()
+            raise
+        if self.telemetry:
+            self.telemetry.record_wait((time.perf_counter() - start) * 1000)
+        return conn
+
+    def recreate(self):
+        # Keep telemetry across dispose()/recreate()
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        if self.telemetry:
+            self.telemetry.pool = pool
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedGet, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedGet, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(settings, is_async: bool = False) -> dict:
+    """create_engine / create_async_engine keyword arguments from the DB_* settings."""
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        # "idle" pings are handled by a checkout listener in instrument_engine
+        "pool_pre_ping": settings.DB_PRE_PING == "always"
+    }
+    if settings.DB_PRE_PING not in ("always", "idle", "never"):
+        raise ValueError(f"DB_PRE_PING must be always, idle or never, not {settings.DB_PRE_PING!r}")
+    return options
+
+
+def instrument_engine(engine: Engine, name: str, settings) -> PoolTelemetry:
+    """
+    Attaches telemetry, idle pre-ping and the per-statement timeout to `engine`
+    (for an AsyncEngine pass its .sync_engine).
+    """
+    telemetry = PoolTelemetry(name, slow_checkout_ms=settings.DB_SLOW_CHECKOUT_MS)
+    telemetry.pool = engine.pool
+    engine.pool.telemetry = telemetry
+    is_postgres = engine.dialect.name == "postgresql"
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        telemetry.connects += 1
+        connection_record.info["checked_in_at"] = time.monotonic()
+        if is_postgres and settings.DB_STATEMENT_TIMEOUT_MS > 0:
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"SET statement_timeout = {int(settings.DB_STATEMENT_TIMEOUT_MS)}")
+            cursor.close()
+            # Keep it across ROLLBACKs of the first transaction
+            dbapi_connection.commit()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        telemetry.invalidations += 1
+
+    if settings.DB_PRE_PING == "idle":
+        # Only connections that sat idle long enough to have been dropped by a
+        # firewall/pgbouncer/server timeout pay for the extra round-trip
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            idle = time.monotonic() - connection_record.info.get("checked_in_at", time.monotonic())
+            if idle < settings.DB_PRE_PING_IDLE_SECONDS:
+                return
+            telemetry.pings += 1
+            try:
+                cursor = dbapi_connection.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+            except Exception:
+                telemetry.ping_failures += 1
+                # The pool discards this connection and retries the checkout
+                raise exc.DisconnectionError()
+
+    return telemetry
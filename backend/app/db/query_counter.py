@@ -0,0 +1,40 @@
+from contextlib import contextmanager
+from typing import Any, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements: List[str] = []
+        self.parameters: List[Any] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __str__(self) -> str:
+        return "\n".join(f"{i + 1}. {sql}" for i, sql in enumerate(self.statements))
+
+
+@contextmanager
+def count_queries(engine: Engine):
+    """
+    Records every SQL statement `engine` executes inside the block, e.g.
+
+        with count_queries(engine) as queries:
+            ...
+        assert queries.count < 5, str(queries)
+    """
+    counter = QueryCounter()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+        counter.parameters.append(parameters)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
@@ -0,0 +1,40 @@
+import json
+import re
+from typing import Any, Iterator, List
+
+from sqlalchemy.engine import Connection
+
+# "SCAN messages" / "SCAN m USING COVERING INDEX ..." (every row read) as opposed to
+# "SEARCH messages USING INDEX ..." (index lookup)
+_SQLITE_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)(\w+)")
+# FROM-clause subqueries, whose own "SCAN anon_1" reads the derived rows, not a table
+_SQLITE_DERIVED = re.compile(r"^(?:CO-ROUTINE|MATERIALIZE) (\w+)")
+
+
+def full_table_scans(conn: Connection, statement: str, parameters: Any = ()) -> List[str]:
+    """
+    Tables (or aliases, on SQLite) that `statement` reads end to end according to
+    the database's plan. Postgres is planned with enable_seqscan off, so a Seq Scan
+    only shows up where no index applies at all, whatever the table size.
+    """
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        details = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+        derived = {m.group(1) for m in map(_SQLITE_DERIVED.match, details) if m}
+        return [m.group(1) for m in map(_SQLITE_SCAN.match, details) if m and m.group(1) not in derived]
+    if dialect == "postgresql":
+        conn.exec_driver_sql("SET enable_seqscan = off")
+        try:
+            plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        finally:
+            conn.exec_driver_sql("RESET enable_seqscan")
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return [node["Relation Name"] for node in _plan_nodes(plan[0]["Plan"]) if node["Node Type"] == "Seq Scan"]
+    raise NotImplementedError(f"No query plan check for {dialect}")
+
+
+def _plan_nodes(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
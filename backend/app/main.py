@@ -13,7 +13,7 @@ from app.api.skills import router as skills_router
 from app.api.improvement import router as improvement_router
 from app.api.assignments import router as assignments_router
 from app.api.research import router as research_router
-from app.api.communication import router as communication_router
+from app.api.communication import router as communication_router, HAS_MORE_HEADER
 from app.api.references import router as references_router
 from app.api.certificates import router as certificates_router
 from app.api.analytics import router as analytics_router
@@ -23,6 +23,8 @@ from app.api.matches import router as matches_router
 from app.api.intelligence import router as intelligence_router
 from app.api.realworld import router as realworld_router
 from app.core.config import settings
+from app.db.pagination import NEXT_CURSOR_HEADER
+from app.services import match_cache  # noqa: F401 - registers match cache invalidation handlers
 import logging
 
 
@@ -64,6 +66,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, HAS_MORE_HEADER],  # list pagination cursor; chat history windows
 )
 
 app.include_router(auth_router)
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from app.core.config import settings
 from app.db.database import get_db
+from app.db.pagination import paginate
 from app.db.models import User
 from app.schemas import UserResponse
 from app.deps import get_current_user
@@ -13,6 +15,6 @@ def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
 
 @router.get("/", response_model=List[UserResponse])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    users = db.query(User).offset(skip).limit(limit).all()
+def read_users(response: Response, cursor: Optional[str] = None, limit: int = settings.PAGE_SIZE_DEFAULT, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    users = paginate(db.query(User), [User.id], cursor, limit, response, descending=False)
     return users
@@ -1,5 +1,11 @@
+import asyncio
+import hashlib
 import google.generativeai as genai
 from app.core.config import settings
+from app.services.embedding_client import EmbeddingBatcher
+from app.services.embedding_cache import EmbeddingCache, cache_key
+from app.core.cache_backends import create_backend
+from app.services.json_stream import IncrementalJSONObject
 import json
 import logging
 from datetime import datetime, timedelta
@@ -13,20 +19,104 @@ if settings.GEMINI_API_KEY:
 
 # Use Gemini 1.5 Flash
 MODEL_NAME = "gemini-2.5-flash" 
+EMBEDDING_MODEL = "models/gemini-embedding-001"
+EMBEDDING_TASK_TYPE = "retrieval_document"
 
 def get_model():
     if not settings.GEMINI_API_KEY:
         raise Exception("GEMINI_API_KEY is not set in the environment variables.")
     return genai.GenerativeModel(MODEL_NAME)
 
+# Caps concurrent Gemini generations per worker so a burst of slow calls queues
+# instead of exhausting upstream quota
+_slots_loop = None
+_slots = None
+
+def _generation_slots() -> asyncio.Semaphore:
+    # asyncio primitives belong to one loop; CLIs and tests run several in turn
+    global _slots_loop, _slots
+    loop = asyncio.get_running_loop()
+    if _slots_loop is not loop:
+        _slots_loop = loop
+        _slots = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+    return _slots
+
+async def generate_text(prompt: str, timeout: float = None) -> str:
+    """
+    Runs a Gemini generation on the native async client, so the event loop keeps
+    serving other requests. Raises asyncio.TimeoutError after `timeout` seconds
+    (LLM_TIMEOUT_SECONDS by default); cancelling the caller cancels the upstream call.
+    """
+    model = get_model()
+    async with _generation_slots():
+        response = await asyncio.wait_for(
+            model.generate_content_async(prompt),
+            timeout or settings.LLM_TIMEOUT_SECONDS
+        )
+    return response.text
+
+async def stream_text(prompt: str, timeout: float = None):
+    """
+    Streaming counterpart of generate_text: yields text chunks as they arrive. The
+    timeout bounds the whole stream; closing the generator cancels the upstream call.
+    """
+    model = get_model()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (timeout or settings.LLM_TIMEOUT_SECONDS)
+    async with _generation_slots():
+        response = await asyncio.wait_for(
+            model.generate_content_async(prompt, stream=True),
+            deadline - loop.time()
+        )
+        chunks = response.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), deadline - loop.time())
+            except StopAsyncIteration:
+                break
+            if chunk.text:
+                yield chunk.text
+
+# Responses for deterministic prompts, shared across workers when LLM_CACHE_URL points
+# at a sqlite:/// or redis:// store
+_response_cache = create_backend(settings.LLM_CACHE_URL, max_entries=settings.LLM_CACHE_MAX_ENTRIES, namespace="llm")
+
+def _prompt_fingerprint(prompt: str) -> str:
+    return hashlib.sha256(f"{MODEL_NAME}\0{prompt}".encode("utf-8")).hexdigest()
+
+async def generate_cached(prompt: str, parse=str.strip, ttl_seconds: int = None):
+    """
+    generate_text behind a response cache keyed by hash(model + rendered prompt).
+
+    The prompt embeds the formatted profile/opportunity text, so any change to those
+    inputs yields a new fingerprint and the stale entry simply ages out. Only responses
+    that `parse` accepts are cached, so a malformed reply is retried on the next call.
+    """
+    key = _prompt_fingerprint(prompt)
+    cached = await _response_cache.aget(key)
+    if cached is not None:
+        return parse(cached)
+
+    text = await generate_text(prompt)
+    result = parse(text)
+    await _response_cache.aset(key, text, ttl_seconds or settings.LLM_CACHE_TTL_SECONDS)
+    return result
+
+def _parse_json(text: str):
+    """Strips the markdown code fence Gemini sometimes wraps JSON in, then parses it."""
+    text = text.strip()
+    if text.startswith("```json"):
+        text = text[7:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return json.loads(text)
+
 async def analyze_match(resume_text: str, job_description: str) -> dict:
     """
     Analyzes the match between a resume and a job description.
     Returns a dictionary with score, missing_skills, and explanation.
     """
     try:
-        model = get_model()
-        
         prompt = f"""
         You are an expert ATS and Recruiter. Compare the following Resume against the Job Description.
         
@@ -44,16 +134,7 @@ async def analyze_match(resume_text: str, job_description: str) -> dict:
         Output ONLY the JSON.
         """
         
-        response = model.generate_content(prompt)
-        
-        # Clean up response text to ensure it's valid JSON
-        text = response.text.strip()
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.endswith("```"):
-            text = text[:-3]
-            
-        return json.loads(text)
+        return await generate_cached(prompt, parse=_parse_json)
         
     except Exception as e:
         logger.error(f"Error in analyze_match: {str(e)}")
@@ -77,8 +158,6 @@ async def generate_improvement_plan(resume_text: str, job_description: str, days
     Returns a list of plan items with estimated hours and deadlines.
     """
     try:
-        model = get_model()
-        
         prompt = f"""
         You are a supportive mentor helping a student prepare for an internship. 
         Analyze the student's resume and the target opportunity.
@@ -108,29 +187,14 @@ async def generate_improvement_plan(resume_text: str, job_description: str, days
         Output ONLY the JSON ARRAY.
         """
         
-        response = model.generate_content(prompt)
-        
-        # Clean up response text to ensure it's valid JSON
-        text = response.text.strip()
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.endswith("```"):
-            text = text[:-3]
-            
-        return json.loads(text)
+        return _parse_json(await generate_text(prompt))
         
     except Exception as e:
         logger.error(f"Error in generate_improvement_plan: {str(e)}")
         return []
 
-async def generate_cover_letter(resume_text: str, job_description: str) -> str:
-    """
-    Generates a custom cover letter based on the resume and job description.
-    """
-    try:
-        model = get_model()
-        
-        prompt = f"""
+def _cover_letter_prompt(resume_text: str, job_description: str) -> str:
+    return f"""
         You are a professional career coach. Write a compelling, personalized cover letter for the candidate based on their Resume and the Job Description below.
         
         Job Description:
@@ -147,9 +211,14 @@ async def generate_cover_letter(resume_text: str, job_description: str) -> str:
         
         Output ONLY the cover letter text.
         """
-        
-        response = model.generate_content(prompt)
-        return response.text.strip()
+
+async def generate_cover_letter(resume_text: str, job_description: str) -> str:
+    """
+    Generates a custom cover letter based on the resume and job description.
+    """
+    try:
+        prompt = _cover_letter_prompt(resume_text, job_description)
+        return await generate_cached(prompt)
         
     except Exception as e:
         logger.error(f"Error in generate_cover_letter: {str(e)}")
@@ -157,9 +226,58 @@ async def generate_cover_letter(resume_text: str, job_description: str) -> str:
              return "Please add GEMINI_API_KEY to your .env file to enable AI features."
         return "Error generating cover letter. Please try again later."
 
+async def stream_cover_letter(resume_text: str, job_description: str):
+    """
+    Streaming variant of generate_cover_letter: yields text chunks as Gemini produces
+    them. A cached letter is replayed as a single chunk; a completed one is cached.
+    """
+    prompt = _cover_letter_prompt(resume_text, job_description)
+    key = _prompt_fingerprint(prompt)
+    cached = await _response_cache.aget(key)
+    if cached is not None:
+        yield cached.strip()
+        return
+
+    parts = []
+    async for chunk in stream_text(prompt):
+        parts.append(chunk)
+        yield chunk
+    await _response_cache.aset(key, "".join(parts), settings.LLM_CACHE_TTL_SECONDS)
+
+def _embed_batch(texts: list[str]) -> list:
+    """Blocking batch call to the Gemini embedding API (runs in a worker thread)."""
+    result = genai.embed_content(
+        model=EMBEDDING_MODEL,
+        content=texts,
+        task_type=EMBEDDING_TASK_TYPE,
+        title="Matching Embedding"
+    )
+    return result['embedding']
+
+_embedding_client = EmbeddingBatcher(
+    _embed_batch,
+    window_ms=settings.EMBEDDING_BATCH_WINDOW_MS,
+    max_batch=settings.EMBEDDING_MAX_BATCH,
+    max_concurrency=settings.EMBEDDING_MAX_CONCURRENCY
+)
+
+_embedding_cache = EmbeddingCache(
+    max_entries=settings.EMBEDDING_CACHE_SIZE,
+    path=settings.EMBEDDING_CACHE_PATH or None,
+    max_disk_mb=settings.EMBEDDING_CACHE_DISK_MAX_MB
+)
+
+def embedding_cache_stats() -> dict:
+    return _embedding_cache.stats()
+
+def response_cache_stats() -> dict:
+    return _response_cache.stats()
+
 async def get_embedding(text: str) -> list:
     """
     Generates a vector embedding for the given text using Gemini.
+    Results are cached by content hash; concurrent misses are coalesced into
+    batch requests off the event loop.
     """
     if not text:
         return []
@@ -170,26 +288,30 @@ async def get_embedding(text: str) -> list:
              logger.warning("GEMINI_API_KEY not set. Returning dummy embedding.")
              return [0.0] * 768 
 
-        # Use the embedding model
-        result = genai.embed_content(
-            model="models/gemini-embedding-001",
-            content=text,
-            task_type="retrieval_document",
-            title="Matching Embedding"
-        )
-        return result['embedding']
+        key = cache_key(EMBEDDING_MODEL, EMBEDDING_TASK_TYPE, text)
+        cached = await _embedding_cache.aget(key)
+        if cached is not None:
+            return cached
+
+        vec = await _embedding_client.embed(text)
+        await _embedding_cache.aput(key, vec)
+        return vec
     except Exception as e:
         logger.error(f"Error in get_embedding: {str(e)}")
         return [0.0] * 768 # Fallback
 
+async def get_embeddings(texts: list[str]) -> list:
+    """
+    Embeds several texts concurrently so they share batch requests.
+    """
+    return list(await asyncio.gather(*(get_embedding(text) for text in texts)))
+
 async def generate_simulated_publications(mentor_name: str, research_areas: str, bio: str) -> list:
     """
     Generates a list of simulated recent publications for a mentor based on their profile.
     Used for the 'Ingestion' phase demo to populate the database with realistic data.
     """
     try:
-        model = get_model()
-        
         prompt = f"""
         You are a research database simulator. Generate 10-15 realistic academic publication records for a professor named {mentor_name}.
         
@@ -214,14 +336,7 @@ async def generate_simulated_publications(mentor_name: str, research_areas: str,
         Output ONLY the JSON ARRAY.
         """
         
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.endswith("```"):
-            text = text[:-3]
-            
-        return json.loads(text)
+        return _parse_json(await generate_text(prompt))
     except Exception as e:
         logger.error(f"Error in generate_simulated_publications: {str(e)}")
         return []
@@ -231,8 +346,6 @@ async def extract_research_topics(abstracts: list[str]) -> list[str]:
     Extracts high-level research topics from a list of abstracts.
     """
     try:
-        model = get_model()
-        
         # Limit input size to avoid token limits, take first 50 abstracts or just concat first 2000 chars
         combined_text = "\n\n".join(abstracts[:20]) 
         
@@ -248,14 +361,7 @@ async def extract_research_topics(abstracts: list[str]) -> list[str]:
         Output ONLY the JSON ARRAY.
         """
         
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.endswith("```"):
-            text = text[:-3]
-            
-        return json.loads(text)
+        return _parse_json(await generate_text(prompt))
     except Exception as e:
         logger.error(f"Error in extract_research_topics: {str(e)}")
         return []
@@ -265,8 +371,6 @@ async def generate_research_gaps(mentor_name: str, mentor_domains: list[str], st
     Identifies research gaps by combining mentor domains with student skills (method-domain gaps).
     """
     try:
-        model = get_model()
-        
         # Context preparation
         domains_str = ", ".join(mentor_domains)
         skills_str = ", ".join(student_skills)
@@ -301,43 +405,30 @@ async def generate_research_gaps(mentor_name: str, mentor_domains: list[str], st
         Output ONLY the JSON ARRAY.
         """
         
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.endswith("```"):
-            text = text[:-3]
-            
-        return json.loads(text)
+        return _parse_json(await generate_text(prompt))
     except Exception as e:
         logger.error(f"Error in generate_research_gaps: {str(e)}")
         return []
 
-async def generate_proposal_guidance(student_profile: dict, mentor_profile: dict, research_gap: dict) -> dict:
-    """
-    Generates structured proposal guidance, supervisor talking points, and a readiness check.
-    """
-    try:
-        model = get_model()
-
-        student_context = f"""
+def _proposal_guidance_prompt(student_profile: dict, mentor_profile: dict, research_gap: dict) -> str:
+    student_context = f"""
         Skills: {', '.join(student_profile.get('skills', []))}
         Degree: {student_profile.get('degree', 'N/A')}
         Major: {student_profile.get('major', 'N/A')}
         Bio: {student_profile.get('bio', 'N/A')}
         """
 
-        mentor_context = f"""
+    mentor_context = f"""
         Name: {mentor_profile.get('name', 'N/A')}
         Research Areas: {mentor_profile.get('research_areas', 'N/A')}
         """
 
-        gap_context = f"""
+    gap_context = f"""
         Gap Title: {research_gap.get('title', 'N/A')}
         Gap Description: {research_gap.get('description', 'N/A')}
         """
 
-        prompt = f"""
+    return f"""
         You are a PhD Application Strategist. Help a student prepare a research proposal direction for a specific mentor.
 
         Student Profile:
@@ -372,14 +463,14 @@ async def generate_proposal_guidance(student_profile: dict, mentor_profile: dict
         Output ONLY the JSON object.
         """
 
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.endswith("```"):
-            text = text[:-3]
+async def generate_proposal_guidance(student_profile: dict, mentor_profile: dict, research_gap: dict) -> dict:
+    """
+    Generates structured proposal guidance, supervisor talking points, and a readiness check.
+    """
+    try:
+        prompt = _proposal_guidance_prompt(student_profile, mentor_profile, research_gap)
 
-        return json.loads(text)
+        return await generate_cached(prompt, parse=_parse_json)
 
     except Exception as e:
         logger.error(f"Error in generate_proposal_guidance: {str(e)}")
@@ -398,3 +489,26 @@ async def generate_proposal_guidance(student_profile: dict, mentor_profile: dict
                 "suggestions": ["Please try again later."]
             }
         }
+
+async def stream_proposal_guidance(student_profile: dict, mentor_profile: dict, research_gap: dict):
+    """
+    Streaming variant of generate_proposal_guidance: yields (section, value) pairs for
+    "proposal_direction", "talking_points" and "readiness_check" as each one completes.
+    """
+    prompt = _proposal_guidance_prompt(student_profile, mentor_profile, research_gap)
+    key = _prompt_fingerprint(prompt)
+    cached = await _response_cache.aget(key)
+    if cached is not None:
+        for section in _parse_json(cached).items():
+            yield section
+        return
+
+    assembler = IncrementalJSONObject()
+    parts = []
+    async for chunk in stream_text(prompt):
+        parts.append(chunk)
+        for section in assembler.feed(chunk):
+            yield section
+
+    if assembler.finished:
+        await _response_cache.aset(key, "".join(parts), settings.LLM_CACHE_TTL_SECONDS)
@@ -0,0 +1,185 @@
+"""
+Materialized counters for /analytics/dashboard.
+
+refresh() rebuilds the dashboard_stats table (a row per mentor plus a platform row,
+mentor_id PLATFORM) from a handful of GROUP BY queries, so reads are a single-row
+lookup whatever the size of the underlying tables. Reads past
+ANALYTICS_ROLLUP_MAX_AGE_SECONDS still serve the old row and schedule a refresh;
+a missing row falls back to live_stats().
+
+    python -m app.services.analytics_rollup     # refresh now (e.g. from cron)
+"""
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import case, func, insert, literal, select, true
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+
+logger = logging.getLogger(__name__)
+
+STAT_COLUMNS = [
+    "students", "mentors", "opportunities", "applications", "certificates",
+    "active_projects", "published_projects", "total_funding"
+]
+
+# dashboard_stats.mentor_id of the platform totals row
+PLATFORM = 0
+
+# Postgres advisory lock serialising refreshes across workers
+_REFRESH_LOCK_KEY = 7304187
+
+_refreshing = threading.Lock()
+
+
+def _lock(db: Session, wait: bool = True) -> bool:
+    """
+    Takes the refresh lock until the transaction ends; False if `wait` is off and
+    another worker holds it. SQLite needs none, as it allows a single writer.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    if wait:
+        db.execute(select(func.pg_advisory_xact_lock(_REFRESH_LOCK_KEY)))
+        return True
+    return bool(db.execute(select(func.pg_try_advisory_xact_lock(_REFRESH_LOCK_KEY))).scalar())
+
+
+def refresh(db: Session) -> int:
+    """
+    Recomputes every row in one transaction; returns the number of mentor rows.
+    Concurrent refreshes (other workers, cron) wait for each other.
+    """
+    User, Opportunity, Application = models.User, models.Opportunity, models.Application
+    Certificate, PublicationProject = models.Certificate, models.PublicationProject
+    _lock(db)
+    refreshed_at = datetime.utcnow()
+
+    # Keyed by mentor id; the None key collects rows without a mentor, which only
+    # count towards the platform totals
+    stats = defaultdict(lambda: dict.fromkeys(STAT_COLUMNS, 0))
+    for (mentor_id,) in db.query(User.id).filter(User.role == "mentor"):
+        stats[mentor_id]
+    for mentor_id, opportunities, funding in db.query(
+        Opportunity.mentor_id, func.count(Opportunity.id), func.coalesce(func.sum(Opportunity.funding_amount), 0.0)
+    ).group_by(Opportunity.mentor_id):
+        stats[mentor_id].update(opportunities=opportunities, total_funding=funding)
+    for mentor_id, applications, students in db.query(
+        Opportunity.mentor_id, func.count(Application.id), func.count(Application.student_id.distinct())
+    ).select_from(Application).outerjoin(Opportunity, Application.opportunity_id == Opportunity.id)\
+            .group_by(Opportunity.mentor_id):
+        stats[mentor_id].update(applications=applications, students=students)
+    for mentor_id, active, published in db.query(
+        PublicationProject.mentor_id,
+        func.count(case((PublicationProject.status != "Published", 1))),
+        func.count(case((PublicationProject.status == "Published", 1)))
+    ).group_by(PublicationProject.mentor_id):
+        stats[mentor_id].update(active_projects=active, published_projects=published)
+    for mentor_id, certificates in db.query(Certificate.mentor_id, func.count(Certificate.id)).group_by(Certificate.mentor_id):
+        stats[mentor_id]["certificates"] = certificates
+
+    platform = {column: sum(row[column] for row in stats.values()) for column in STAT_COLUMNS}
+    roles = dict(db.query(User.role, func.count(User.id)).group_by(User.role).all())
+    platform.update(students=roles.get("student", 0), mentors=roles.get("mentor", 0))
+
+    rows = [dict(platform, mentor_id=PLATFORM, refreshed_at=refreshed_at)]
+    rows += [dict(row, mentor_id=mentor_id, refreshed_at=refreshed_at) for mentor_id, row in stats.items() if mentor_id is not None]
+    db.query(models.DashboardStats).delete(synchronize_session=False)
+    db.execute(insert(models.DashboardStats), rows)
+    db.commit()
+    logger.info(f"Refreshed dashboard stats for {len(rows) - 1} mentors")
+    return len(rows) - 1
+
+
+def live_stats(db: Session, mentor_id: Optional[int] = None) -> dict:
+    """
+    The same counters straight from the source tables, in a single query: one
+    conditional-aggregate subquery per table, cross-joined into one row.
+    """
+    User, Opportunity, Application = models.User, models.Opportunity, models.Application
+    Certificate, PublicationProject = models.Certificate, models.PublicationProject
+
+    def scoped(query, column):
+        return query if mentor_id is None else query.where(column == mentor_id)
+
+    opportunities = scoped(select(
+        func.count(Opportunity.id).label("opportunities"),
+        func.coalesce(func.sum(Opportunity.funding_amount), 0.0).label("total_funding")
+    ), Opportunity.mentor_id).subquery()
+    projects = scoped(select(
+        func.count(case((PublicationProject.status != "Published", 1))).label("active_projects"),
+        func.count(case((PublicationProject.status == "Published", 1))).label("published_projects")
+    ), PublicationProject.mentor_id).subquery()
+    certificates = scoped(select(func.count(Certificate.id).label("certificates")), Certificate.mentor_id).subquery()
+    if mentor_id is None:
+        users = select(
+            func.count(case((User.role == "student", 1))).label("students"),
+            func.count(case((User.role == "mentor", 1))).label("mentors")
+        ).subquery()
+        applications = select(func.count(Application.id).label("applications")).subquery()
+        students, mentors = users.c.students, users.c.mentors
+        sources = [users, applications]
+    else:
+        applications = select(
+            func.count(Application.id).label("applications"),
+            func.count(Application.student_id.distinct()).label("students")
+        ).join(Opportunity, Application.opportunity_id == Opportunity.id)\
+            .where(Opportunity.mentor_id == mentor_id).subquery()
+        students, mentors = applications.c.students, literal(0)
+        sources = [applications]
+
+    joined = sources[0]
+    for source in sources[1:] + [opportunities, projects, certificates]:
+        joined = joined.join(source, true())
+    row = db.execute(select(
+        students.label("students"), mentors.label("mentors"),
+        opportunities.c.opportunities, applications.c.applications, certificates.c.certificates,
+        projects.c.active_projects, projects.c.published_projects, opportunities.c.total_funding
+    ).select_from(joined)).mappings().one()
+    return dict(row)
+
+
+def dashboard_stats(db: Session, mentor_id: Optional[int] = None) -> Tuple[dict, datetime, str]:
+    """Counters for a mentor (or the platform), when they were computed, and whether from the rollup or live."""
+    DashboardStats = models.DashboardStats
+    row = db.query(DashboardStats).filter(DashboardStats.mentor_id == (mentor_id or PLATFORM)).first()
+    if row is None:
+        return live_stats(db, mentor_id), datetime.utcnow(), "live"
+    return {column: getattr(row, column) for column in STAT_COLUMNS}, row.refreshed_at, "rollup"
+
+
+def is_stale(refreshed_at: datetime) -> bool:
+    return datetime.utcnow() - refreshed_at > timedelta(seconds=settings.ANALYTICS_ROLLUP_MAX_AGE_SECONDS)
+
+
+def refresh_if_stale(bind: Engine):
+    """Background refresh after a stale (or missing) read; skipped if one is already running here or in another worker."""
+    if not _refreshing.acquire(blocking=False):
+        return
+    try:
+        with Session(bind=bind) as db:
+            if not _lock(db, wait=False):
+                return
+            platform = db.query(models.DashboardStats.refreshed_at)\
+                .filter(models.DashboardStats.mentor_id == PLATFORM).scalar()
+            # Another worker may have refreshed since the read that scheduled this
+            if platform is None or is_stale(platform):
+                refresh(db)
+    except Exception as e:
+        logger.error(f"Dashboard stats refresh failed: {str(e)}")
+    finally:
+        _refreshing.release()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    from app.db.database import SessionLocal
+
+    with SessionLocal() as session:
+        print(f"Refreshed dashboard stats for {refresh(session)} mentors")
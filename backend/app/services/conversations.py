@@ -0,0 +1,143 @@
+import logging
+from typing import List, Optional
+
+from sqlalchemy import case, func, or_, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, contains_eager
+
+from app.db import models
+
+logger = logging.getLogger(__name__)
+
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def record_message(db: Session, message: models.Message):
+    """
+    Updates both participants' conversation rows for a new message: last message
+    for each, and one more unread for the receiver. Call after the message is
+    flushed (it needs an id) and before commit, so the summary commits with it.
+    """
+    _upsert(db, message.sender_id, message.receiver_id, message, unread=0)
+    _upsert(db, message.receiver_id, message.sender_id, message, unread=1)
+
+
+def message_payload(message: models.Message) -> dict:
+    """JSON-ready message, as pushed to WebSocket clients."""
+    return {
+        "id": message.id,
+        "sender_id": message.sender_id,
+        "receiver_id": message.receiver_id,
+        "content": message.content,
+        "timestamp": message.timestamp.isoformat() if message.timestamp else None,
+        "read": bool(message.read)
+    }
+
+
+def mark_read(db: Session, user_id: int, partner_id: int, up_to_id: Optional[int] = None) -> int:
+    """
+    Marks messages from `partner_id` to `user_id` (up to `up_to_id`, if given) as read
+    and refreshes the unread count. Returns how many messages changed; the caller commits.
+    """
+    Message = models.Message
+    incoming = db.query(Message).filter(
+        Message.sender_id == partner_id,
+        Message.receiver_id == user_id,
+        Message.read.isnot(True)
+    )
+    marked = (incoming.filter(Message.id <= up_to_id) if up_to_id is not None else incoming)\
+        .update({"read": True}, synchronize_session=False)
+    if marked:
+        # Recount rather than decrement, so a drifted counter heals itself
+        db.query(models.Conversation).filter(
+            models.Conversation.user_id == user_id, models.Conversation.partner_id == partner_id
+        ).update({"unread_count": incoming.count()}, synchronize_session=False)
+    return marked
+
+
+def conversation_window(db: Session, user_id: int, partner_id: int, limit: int,
+                        before_id: Optional[int] = None, since_id: Optional[int] = None) -> List[models.Message]:
+    """
+    Up to `limit` messages between two users, oldest first: the latest ones, those
+    before `before_id` (scrolling back) or those after `since_id` (catching up).
+
+    Each direction is read separately as an index range on (sender_id, receiver_id, id)
+    capped at `limit`, then the two are merged; an OR over both directions would make
+    the database sort the whole conversation for every page.
+    """
+    Message = models.Message
+    forwards = since_id is not None
+
+    def side(sender_id: int, receiver_id: int):
+        query = select(Message.id).where(Message.sender_id == sender_id, Message.receiver_id == receiver_id)
+        if before_id is not None:
+            query = query.where(Message.id < before_id)
+        if forwards:
+            query = query.where(Message.id > since_id)
+        return select(query.order_by(Message.id.asc() if forwards else Message.id.desc()).limit(limit).subquery())
+
+    candidates = union_all(side(user_id, partner_id), side(partner_id, user_id)).subquery()
+    messages = db.query(Message)\
+        .filter(Message.id.in_(select(candidates.c.id)))\
+        .order_by(Message.id.asc() if forwards else Message.id.desc())\
+        .limit(limit)\
+        .all()
+    return messages if forwards else messages[::-1]
+
+
+def unread_total(db: Session, user_id: int) -> int:
+    total = db.query(func.coalesce(func.sum(models.Conversation.unread_count), 0))\
+        .filter(models.Conversation.user_id == user_id).scalar()
+    return int(total)
+
+
+def messages_since(db: Session, user_id: int, since_id: int, limit: int) -> List[models.Message]:
+    """A user's messages in every conversation after `since_id`, oldest first (reconnect catch-up)."""
+    Message = models.Message
+    return db.query(Message).filter(
+        Message.id > since_id,
+        or_(Message.sender_id == user_id, Message.receiver_id == user_id)
+    ).order_by(Message.id).limit(limit).all()
+
+
+def conversation_index(db: Session, user_id: int):
+    """All of a user's conversations with partner and last message, newest first, in one query."""
+    Conversation = models.Conversation
+    return db.query(Conversation)\
+        .join(Conversation.partner)\
+        .outerjoin(Conversation.last_message)\
+        .options(contains_eager(Conversation.partner), contains_eager(Conversation.last_message))\
+        .filter(Conversation.user_id == user_id)
+
+
+def _upsert(db: Session, user_id: int, partner_id: int, message: models.Message, unread: int):
+    Conversation = models.Conversation
+    values = {
+        "user_id": user_id,
+        "partner_id": partner_id,
+        "last_message_id": message.id,
+        "last_message_at": message.timestamp,
+        "unread_count": unread
+    }
+    # Messages can commit out of order; only move last_message forwards
+    newer = Conversation.last_message_id.is_(None) | (Conversation.last_message_id < message.id)
+    updates = {
+        "last_message_id": case((newer, message.id), else_=Conversation.last_message_id),
+        "last_message_at": case((newer, message.timestamp), else_=Conversation.last_message_at),
+        "unread_count": Conversation.unread_count + unread
+    }
+
+    insert = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if insert is not None:
+        statement = insert(Conversation).values(**values).on_conflict_do_update(
+            index_elements=["user_id", "partner_id"], set_=updates
+        )
+        db.execute(statement)
+        return
+
+    updated = db.query(Conversation).filter(
+        Conversation.user_id == user_id, Conversation.partner_id == partner_id
+    ).update(updates, synchronize_session=False)
+    if not updated:
+        db.add(Conversation(**values))
+        db.flush()
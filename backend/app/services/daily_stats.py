@@ -0,0 +1,128 @@
+"""
+Daily counters behind /analytics/timeseries.
+
+Write paths call record() before they commit, so a bucket always agrees with the
+rows it counts. Range reads sum at most one row per day and are downsampled in
+Python to weekly or monthly points.
+"""
+import logging
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+logger = logging.getLogger(__name__)
+
+APPLICATIONS = "applications"
+APPLICATIONS_ACCEPTED = "applications_accepted"
+CERTIFICATES = "certificates"
+PROJECTS_STARTED = "projects_started"
+PROJECTS_PUBLISHED = "projects_published"
+FUNDING_COMMITTED = "funding_committed"
+
+METRICS = (APPLICATIONS, APPLICATIONS_ACCEPTED, CERTIFICATES, PROJECTS_STARTED, PROJECTS_PUBLISHED, FUNDING_COMMITTED)
+
+# Ratios of two stored metrics, computed per point after downsampling
+DERIVED = {"acceptance_rate": (APPLICATIONS_ACCEPTED, APPLICATIONS)}
+
+INTERVALS = ("day", "week", "month")
+
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def record(db: Session, metric: str, mentor_id: Optional[int], opportunity_id: Optional[int] = None,
+           amount: float = 1, day: Optional[date] = None):
+    """
+    Adds `amount` (negative to undo) to a bucket, today's by default. Call before
+    commit, in the same transaction as the write being counted.
+    """
+    if not amount:
+        return
+    DailyStat = models.DailyStat
+    values = {
+        "metric": metric,
+        "mentor_id": mentor_id or 0,
+        "opportunity_id": opportunity_id or 0,
+        "day": day or datetime.utcnow().date(),
+        "value": amount
+    }
+
+    insert = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if insert is not None:
+        db.execute(insert(DailyStat).values(**values).on_conflict_do_update(
+            index_elements=["metric", "mentor_id", "opportunity_id", "day"],
+            set_={"value": DailyStat.value + amount}
+        ))
+        return
+
+    updated = db.query(DailyStat).filter(
+        DailyStat.metric == metric, DailyStat.mentor_id == values["mentor_id"],
+        DailyStat.opportunity_id == values["opportunity_id"], DailyStat.day == values["day"]
+    ).update({"value": DailyStat.value + amount}, synchronize_session=False)
+    if not updated:
+        db.add(DailyStat(**values))
+        db.flush()
+
+
+def daily_values(db: Session, metric: str, start: date, end: date,
+                 mentor_id: Optional[int] = None, opportunity_id: Optional[int] = None) -> Dict[date, float]:
+    """Per-day totals of `metric` in [start, end]; days without activity are absent."""
+    DailyStat = models.DailyStat
+    query = db.query(DailyStat.day, func.sum(DailyStat.value))\
+        .filter(DailyStat.metric == metric, DailyStat.day >= start, DailyStat.day <= end)
+    if mentor_id is not None:
+        query = query.filter(DailyStat.mentor_id == mentor_id)
+        if opportunity_id is not None:
+            query = query.filter(DailyStat.opportunity_id == opportunity_id)
+    return {day: float(value) for day, value in query.group_by(DailyStat.day)}
+
+
+def pick_interval(start: date, end: date, max_points: int) -> str:
+    """The finest interval that keeps the series within `max_points`."""
+    days = (end - start).days + 1
+    if days <= max_points:
+        return "day"
+    if days / 7 <= max_points:
+        return "week"
+    return "month"
+
+
+def bucket_start(day: date, interval: str) -> date:
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    return day
+
+
+def downsample(values: Dict[date, float], start: date, end: date, interval: str) -> List[Tuple[date, float]]:
+    """Sums daily values into `interval` buckets covering [start, end], zero-filled, oldest first."""
+    buckets: "OrderedDict[date, float]" = OrderedDict()
+    day = start
+    while day <= end:
+        buckets.setdefault(bucket_start(day, interval), 0.0)
+        day += timedelta(days=1)
+    for day, value in values.items():
+        buckets[bucket_start(day, interval)] += value
+    return list(buckets.items())
+
+
+def series(db: Session, metric: str, start: date, end: date, interval: str,
+           mentor_id: Optional[int] = None, opportunity_id: Optional[int] = None) -> Tuple[List[Tuple[date, Optional[float]]], Optional[float]]:
+    """Downsampled points and the total over the range; ratio metrics give None where the denominator is 0."""
+    if metric in DERIVED:
+        numerator, denominator = (
+            downsample(daily_values(db, name, start, end, mentor_id, opportunity_id), start, end, interval)
+            for name in DERIVED[metric]
+        )
+        points = [(day, top / bottom if bottom else None) for (day, top), (_, bottom) in zip(numerator, denominator)]
+        top, bottom = sum(value for _, value in numerator), sum(value for _, value in denominator)
+        return points, (top / bottom if bottom else None)
+
+    points = downsample(daily_values(db, metric, start, end, mentor_id, opportunity_id), start, end, interval)
+    return points, sum(value for _, value in points)
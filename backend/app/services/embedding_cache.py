@@ -0,0 +1,199 @@
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends from several workers are not serialised
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_KEY_SIZE = 32
+_HEADER = struct.Struct("<32sI")  # sha256 key, dimensions
+
+
+def cache_key(model: str, task_type: str, text: str) -> bytes:
+    """Content address of an embedding: sha256 over (model, task_type, text)."""
+    return hashlib.sha256(f"{model}\0{task_type}\0{text}".encode("utf-8")).digest()
+
+
+class _DiskSegment:
+    """
+    Append-only file of (key, dims, float32[dims]) records, read through mmap.
+
+    The key -> offset index is rebuilt by scanning the file on startup, and the tail is
+    re-scanned on a miss so records appended by other workers become visible.
+    A partially written trailing record (crash mid-append) is ignored.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._index: Dict[bytes, Tuple[int, int]] = {}
+        self._scanned = 0
+        self._map: Optional[mmap.mmap] = None
+        self._full_warned = False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        open(path, "ab").close()
+        self._catch_up()
+
+    def _remap(self):
+        size = os.path.getsize(self.path)
+        if self._map is not None and len(self._map) >= size:
+            return
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if size:
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _catch_up(self):
+        self._remap()
+        if self._map is None:
+            return
+        end = len(self._map)
+        offset = self._scanned
+        while offset + _HEADER.size <= end:
+            key, dims = _HEADER.unpack_from(self._map, offset)
+            record_end = offset + _HEADER.size + 4 * dims
+            if record_end > end:
+                break
+            self._index[key] = (offset + _HEADER.size, dims)
+            offset = record_end
+        self._scanned = offset
+
+    def get(self, key: bytes) -> Optional[List[float]]:
+        location = self._index.get(key)
+        if location is None:
+            self._catch_up()
+            location = self._index.get(key)
+            if location is None:
+                return None
+        offset, dims = location
+        vec = array("f")
+        vec.frombytes(self._map[offset:offset + 4 * dims])
+        return vec.tolist()
+
+    def put(self, key: bytes, vec: List[float]):
+        if key in self._index:
+            return
+        record = _HEADER.pack(key, len(vec)) + array("f", vec).tobytes()
+        if self._scanned + len(record) > self.max_bytes:
+            if not self._full_warned:
+                logger.warning(f"Embedding cache segment {self.path} is full; new entries stay in memory only")
+                self._full_warned = True
+            return
+        with open(self.path, "ab") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.write(record)
+                f.flush()
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+        self._catch_up()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache: bounded in-memory LRU in front of an optional
+    memory-mapped on-disk segment that survives restarts. Async callers use aget/aput,
+    which serve memory hits inline and do disk reads and appends in a worker thread.
+    """
+
+    def __init__(self, max_entries: int = 10000, path: Optional[str] = None, max_disk_mb: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = _DiskSegment(path, max_disk_mb * 1024 * 1024) if path else None
+        # Separate from _lock, so a slow disk access never holds up memory lookups
+        self._disk_lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: bytes) -> Optional[List[float]]:
+        vec = self._get_memory(key)
+        if vec is None and self._disk is not None:
+            vec = self._get_disk(key)
+        return vec
+
+    def put(self, key: bytes, vec: List[float]):
+        with self._lock:
+            self._remember(key, vec)
+        if self._disk is not None:
+            self._put_disk(key, vec)
+
+    async def aget(self, key: bytes) -> Optional[List[float]]:
+        vec = self._get_memory(key)
+        if vec is None and self._disk is not None:
+            vec = await asyncio.to_thread(self._get_disk, key)
+        return vec
+
+    async def aput(self, key: bytes, vec: List[float]):
+        with self._lock:
+            self._remember(key, vec)
+        if self._disk is not None:
+            await asyncio.to_thread(self._put_disk, key, vec)
+
+    def _get_memory(self, key: bytes) -> Optional[List[float]]:
+        with self._lock:
+            vec = self._entries.get(key)
+            if vec is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            elif self._disk is None:
+                self.misses += 1
+            return vec
+
+    def _get_disk(self, key: bytes) -> Optional[List[float]]:
+        with self._disk_lock:
+            vec = self._disk.get(key)
+        with self._lock:
+            if vec is None:
+                self.misses += 1
+            else:
+                self.disk_hits += 1
+                self._remember(key, vec)
+        return vec
+
+    def _put_disk(self, key: bytes, vec: List[float]):
+        with self._disk_lock:
+            self._disk.put(key, vec)
+
+    def _remember(self, key: bytes, vec: List[float]):
+        self._entries[key] = vec
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk_entries": len(self._disk) if self._disk is not None else None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent embedding requests into batch calls.
+
+    Texts submitted within `window_ms` of each other are sent upstream as one batch
+    (split at `max_batch`); identical texts already in flight share a single future;
+    at most `max_concurrency` batches run at once. The blocking SDK call runs in a
+    worker thread, so the event loop keeps serving other requests meanwhile.
+    """
+
+    def __init__(self, embed_batch: Callable[[List[str]], List[List[float]]],
+                 window_ms: int = 10, max_batch: int = 100, max_concurrency: int = 4):
+        self._embed_batch = embed_batch
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.max_concurrency = max_concurrency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind_loop(self):
+        # asyncio primitives belong to one loop; (re)create them lazily for the running one
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._inflight: Dict[str, asyncio.Future] = {}
+            self._pending: List[str] = []
+            self._timer: Optional[asyncio.TimerHandle] = None
+            # The loop only keeps weak references to tasks; hold running batches here
+            self._batches: Set[asyncio.Task] = set()
+        return loop
+
+    async def embed(self, text: str) -> List[float]:
+        loop = self._bind_loop()
+        future = self._inflight.get(text)
+        if future is None:
+            future = loop.create_future()
+            self._inflight[text] = future
+            self._pending.append(text)
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+        # shield: one caller being cancelled must not cancel the shared result
+        return await asyncio.shield(future)
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        return list(await asyncio.gather(*(self.embed(text) for text in texts)))
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        for start in range(0, len(pending), self.max_batch):
+            task = self._loop.create_task(self._run(pending[start:start + self.max_batch]))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run(self, batch: List[str]):
+        try:
+            async with self._semaphore:
+                vectors = await asyncio.to_thread(self._embed_batch, batch)
+            if len(vectors) != len(batch):
+                raise ValueError(f"Expected {len(batch)} embeddings, got {len(vectors)}")
+        except Exception as e:
+            logger.error(f"Embedding batch of {len(batch)} failed: {str(e)}")
+            for text in batch:
+                future = self._inflight.pop(text, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+
+        for text, vector in zip(batch, vectors):
+            future = self._inflight.pop(text, None)
+            if future is not None and not future.done():
+                future.set_result(vector)
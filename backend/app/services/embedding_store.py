@@ -0,0 +1,220 @@
+import hashlib
+import logging
+from array import array
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.db import models
+from app.db.database import AsyncSessionLocal, run_in_session
+from app.services import ai_service
+from app.services.mentor_index import get_mentor_index
+
+logger = logging.getLogger(__name__)
+
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def mentor_embedding_text(mentor: models.MentorProfile) -> str:
+    """Text used to represent a mentor in the semantic (lens 2) space."""
+    return f"{mentor.research_areas or ''} {mentor.bio or ''}"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def pack_vector(vec: List[float]) -> bytes:
+    return array("f", vec).tobytes()
+
+
+def unpack_vector(blob: bytes) -> List[float]:
+    vec = array("f")
+    vec.frombytes(blob)
+    return vec.tolist()
+
+
+def _is_fresh(row: Optional[models.MentorEmbedding], text_hash: str) -> bool:
+    return row is not None and row.content_hash == text_hash and row.model == ai_service.EMBEDDING_MODEL
+
+
+def _store_vector(db: Session, mentor: models.MentorProfile, row: Optional[models.MentorEmbedding],
+                  text_hash: str, vec: List[float]) -> bool:
+    """Stages an embedding row (caller commits). Returns False for vectors not worth keeping."""
+    # get_embedding returns a zero vector when the API key is missing or the call failed;
+    # never persist those, so the next request retries instead of caching a useless vector.
+    if not vec or not any(vec):
+        return False
+
+    if row is None:
+        row = models.MentorEmbedding(mentor_id=mentor.id)
+        db.add(row)
+    row.content_hash = text_hash
+    row.model = ai_service.EMBEDDING_MODEL
+    row.dimensions = len(vec)
+    row.vector = pack_vector(vec)
+    row.updated_at = datetime.utcnow()
+    return True
+
+
+def _fetch_row(db: Session, mentor_id: int) -> Optional[models.MentorEmbedding]:
+    return db.query(models.MentorEmbedding).filter(models.MentorEmbedding.mentor_id == mentor_id).first()
+
+
+def _fetch_rows(db: Session, mentor_ids: List[int]) -> Dict[int, models.MentorEmbedding]:
+    rows = db.query(models.MentorEmbedding).filter(models.MentorEmbedding.mentor_id.in_(mentor_ids)).all()
+    return {row.mentor_id: row for row in rows}
+
+
+def _persist(db: Session, staged: list) -> List[tuple]:
+    """Stores (mentor, row, text_hash, vec) tuples in one commit; returns the (id, vec) kept."""
+    stored = [
+        (mentor.id, vec) for mentor, row, text_hash, vec in staged
+        if _store_vector(db, mentor, row, text_hash, vec)
+    ]
+    if stored:
+        db.commit()
+    return stored
+
+
+async def refresh_mentor_embedding(db, mentor: models.MentorProfile,
+                                   row: Optional[models.MentorEmbedding] = None) -> List[float]:
+    """
+    Returns the stored embedding for a mentor, re-embedding only when the
+    research_areas/bio text (or the embedding model) changed since it was stored.
+    `db` may be a Session or an AsyncSession.
+    """
+    text = mentor_embedding_text(mentor)
+    text_hash = content_hash(text)
+    if row is None:
+        row = await run_in_session(db, _fetch_row, mentor.id)
+    if _is_fresh(row, text_hash):
+        return unpack_vector(row.vector)
+
+    vec = await ai_service.get_embedding(text)
+    if await run_in_session(db, _persist, [(mentor, row, text_hash, vec)]):
+        # Incremental ANN update for this worker; other workers pick it up via index sync
+        get_mentor_index().upsert(mentor.id, vec)
+    return vec
+
+
+async def load_mentor_vectors(db, mentors: List[models.MentorProfile]) -> Dict[int, List[float]]:
+    """
+    Bulk-loads stored embeddings for the given mentors in a single query.
+    Mentors without a fresh embedding (legacy rows, edits made before the store existed)
+    are backfilled once in a batched embedding call and persisted, so steady-state match
+    requests make no mentor embedding calls at all. `db` may be a Session or an AsyncSession.
+    """
+    if not mentors:
+        return {}
+
+    rows_by_id = await run_in_session(db, _fetch_rows, [m.id for m in mentors])
+
+    vectors = {}
+    stale = []
+    for mentor in mentors:
+        row = rows_by_id.get(mentor.id)
+        text = mentor_embedding_text(mentor)
+        text_hash = content_hash(text)
+        if _is_fresh(row, text_hash):
+            vectors[mentor.id] = unpack_vector(row.vector)
+        else:
+            stale.append((mentor, row, text, text_hash))
+
+    if stale:
+        fresh_vecs = await ai_service.get_embeddings([text for _, _, text, _ in stale])
+        staged = []
+        for (mentor, row, _, text_hash), vec in zip(stale, fresh_vecs):
+            vectors[mentor.id] = vec
+            staged.append((mentor, row, text_hash, vec))
+        stored = await run_in_session(db, _persist, staged)
+        index = get_mentor_index()
+        for mentor_id, vec in stored:
+            index.upsert(mentor_id, vec)
+    return vectors
+
+
+def publication_embedding_text(title: Optional[str], description: Optional[str]) -> str:
+    """Text used to classify a publication into research topics."""
+    return f"{title or ''}\n{description or ''}".strip()
+
+
+def _fetch_publication_rows(db: Session, publication_ids: List[int]) -> Dict[int, tuple]:
+    PublicationEmbedding = models.PublicationEmbedding
+    rows = db.query(PublicationEmbedding.publication_id, PublicationEmbedding.content_hash,
+                    PublicationEmbedding.model, PublicationEmbedding.vector)\
+        .filter(PublicationEmbedding.publication_id.in_(publication_ids))
+    return {publication_id: (text_hash, model, vector) for publication_id, text_hash, model, vector in rows}
+
+
+def _persist_publication_vectors(db: Session, staged: List[dict]):
+    """Upserts staged publication embedding rows in one statement and commits."""
+    PublicationEmbedding = models.PublicationEmbedding
+    insert = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if insert is not None:
+        statement = insert(PublicationEmbedding)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["publication_id"],
+            set_={column: statement.excluded[column] for column in ("content_hash", "model", "dimensions", "vector", "updated_at")}
+        ), staged)
+    else:
+        for values in staged:
+            db.merge(PublicationEmbedding(**values))
+    db.commit()
+
+
+async def load_publication_vectors(db, texts: List[Tuple[int, str]]) -> Dict[int, np.ndarray]:
+    """
+    Embeddings for (publication id, text) pairs as float32 arrays. Stored vectors
+    are reused while the text hash and model match; the rest are embedded in one
+    batched call and stored, so re-analysing unchanged papers makes no embedding
+    calls. Publications whose embedding failed are left out.
+    `db` may be a Session or an AsyncSession.
+    """
+    texts = [(publication_id, text) for publication_id, text in texts if text]
+    if not texts:
+        return {}
+    rows = await run_in_session(db, _fetch_publication_rows, [publication_id for publication_id, _ in texts])
+
+    vectors = {}
+    stale = []
+    for publication_id, text in texts:
+        text_hash = content_hash(text)
+        stored_hash, model, blob = rows.get(publication_id, (None, None, None))
+        if stored_hash == text_hash and model == ai_service.EMBEDDING_MODEL:
+            vectors[publication_id] = np.frombuffer(blob, dtype=np.float32)
+        else:
+            stale.append((publication_id, text, text_hash))
+
+    if stale:
+        fresh_vecs = await ai_service.get_embeddings([text for _, text, _ in stale])
+        now = datetime.utcnow()
+        staged = []
+        for (publication_id, _, text_hash), vec in zip(stale, fresh_vecs):
+            # Zero vectors mean the call failed or no API key is set; retry next time
+            if not vec or not any(vec):
+                continue
+            vectors[publication_id] = np.asarray(vec, dtype=np.float32)
+            staged.append({
+                "publication_id": publication_id, "content_hash": text_hash, "model": ai_service.EMBEDDING_MODEL,
+                "dimensions": len(vec), "vector": pack_vector(vec), "updated_at": now
+            })
+        if staged:
+            await run_in_session(db, _persist_publication_vectors, staged)
+        logger.info(f"Embedded {len(staged)} of {len(stale)} new or changed publications ({len(texts) - len(stale)} reused)")
+    return vectors
+
+
+async def refresh_mentor_embedding_task(mentor_id: int):
+    """
+    Background-task entry point. Opens its own session because the request-scoped
+    one is closed by the time background tasks run.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            mentor = await db.get(models.MentorProfile, mentor_id)
+            if mentor:
+                await refresh_mentor_embedding(db, mentor)
+        except Exception as e:
+            logger.error(f"Error refreshing embedding for mentor {mentor_id}: {str(e)}")
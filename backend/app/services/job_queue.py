@@ -0,0 +1,222 @@
+"""
+Durable background jobs, stored in the `jobs` table and run by `python -m app.worker`.
+
+API handlers enqueue() and return at once; workers lease() the highest-priority
+due job, renewing the lease while the handler runs. A job whose worker dies is
+picked up again once its lease expires, and a failing one is retried with
+exponential backoff until JOB_MAX_ATTEMPTS. There is at most one queued or
+running job per (type, mentor): enqueueing a duplicate returns the existing job,
+raising its priority if needed.
+"""
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import case
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+
+logger = logging.getLogger(__name__)
+
+# Job types, with the modules that register their handlers
+INGEST_PUBLICATIONS = "ingest_publications"  # research_service; mentor_id
+ANALYZE_TRENDS = "analyze_trends"  # research_service; mentor_id
+TREND_RUN = "trend_run"  # trend_jobs; payload run_id
+
+ACTIVE = ("queued", "running")
+
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+_handlers: Dict[str, Callable[..., Awaitable[Any]]] = {}
+
+
+def register(job_type: str, handler: Callable[..., Awaitable[Any]]):
+    """Registers `await handler(mentor_id, **payload)` to run jobs of `job_type`; raising fails the attempt."""
+    _handlers[job_type] = handler
+
+
+def handler_for(job_type: str) -> Optional[Callable[..., Awaitable[Any]]]:
+    return _handlers.get(job_type)
+
+
+def dedup_key(job_type: str, mentor_id: Optional[int]) -> str:
+    return f"{job_type}:{mentor_id or ''}"
+
+
+def enqueue(db: Session, job_type: str, mentor_id: Optional[int] = None,
+            payload: Optional[dict] = None, priority: int = 0) -> models.Job:
+    """The queued or running job for (type, mentor), creating it if there is none. Commits."""
+    Job = models.Job
+    key = dedup_key(job_type, mentor_id)
+    values = {
+        "type": job_type,
+        "mentor_id": mentor_id,
+        "payload": json.dumps(payload or {}),
+        "dedup_key": key,
+        "status": "queued",
+        "priority": priority,
+        "max_attempts": settings.JOB_MAX_ATTEMPTS,
+        "run_after": datetime.utcnow(),
+        "created_at": datetime.utcnow()
+    }
+
+    insert = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if insert is not None:
+        statement = insert(Job).values(**values)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["dedup_key"],
+            set_={"priority": case(
+                (Job.priority < statement.excluded.priority, statement.excluded.priority), else_=Job.priority
+            )}
+        ))
+    else:
+        updated = db.query(Job).filter(Job.dedup_key == key, Job.priority < priority)\
+            .update({"priority": priority}, synchronize_session=False)
+        if not updated and db.query(Job.id).filter(Job.dedup_key == key).first() is None:
+            db.add(Job(**values))
+    db.commit()
+
+    job = db.query(Job).filter(Job.dedup_key == key).one()
+    logger.info(f"Job {job.id} ({job_type}, mentor {mentor_id}) is {job.status}")
+    return job
+
+
+def _reclaim_expired(db: Session, now: datetime):
+    """Jobs whose worker stopped renewing the lease: requeued, or failed when out of attempts."""
+    Job = models.Job
+    expired = db.query(Job).filter(Job.status == "running", Job.lease_expires_at < now)
+    error = "Worker lease expired"
+    failed = expired.filter(Job.attempts >= Job.max_attempts).update({
+        "status": "failed", "dedup_key": None, "locked_by": None, "lease_expires_at": None,
+        "error": error, "finished_at": now
+    }, synchronize_session=False)
+    requeued = expired.filter(Job.attempts < Job.max_attempts).update({
+        "status": "queued", "locked_by": None, "lease_expires_at": None, "error": error, "run_after": now
+    }, synchronize_session=False)
+    if failed or requeued:
+        logger.warning(f"Reclaimed expired leases: {requeued} requeued, {failed} failed")
+
+
+def lease(db: Session, worker_id: str) -> Optional[models.Job]:
+    """
+    Claims the highest-priority due job for `worker_id`, or None. Postgres skips rows
+    other workers are claiming (FOR UPDATE SKIP LOCKED); the guarded UPDATE makes
+    the claim safe on SQLite too, where a lost race just moves on to the next job.
+    """
+    Job = models.Job
+    now = datetime.utcnow()
+    _reclaim_expired(db, now)
+    db.commit()
+
+    for _ in range(3):
+        candidate = db.query(Job.id)\
+            .filter(Job.status == "queued", Job.run_after <= now)\
+            .order_by(Job.priority.desc(), Job.id)\
+            .limit(1)\
+            .with_for_update(skip_locked=True)\
+            .first()
+        if candidate is None:
+            db.commit()
+            return None
+
+        claimed = db.query(Job).filter(Job.id == candidate.id, Job.status == "queued").update({
+            "status": "running",
+            "attempts": Job.attempts + 1,
+            "locked_by": worker_id,
+            "lease_expires_at": now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+            "started_at": now
+        }, synchronize_session=False)
+        db.commit()
+        if claimed:
+            return db.query(Job).filter(Job.id == candidate.id).one()
+    return None
+
+
+def renew_lease(db: Session, job_id: int, worker_id: str) -> bool:
+    """Extends the lease; False if the job is no longer this worker's."""
+    Job = models.Job
+    renewed = db.query(Job).filter(Job.id == job_id, Job.locked_by == worker_id, Job.status == "running").update({
+        "lease_expires_at": datetime.utcnow() + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+    }, synchronize_session=False)
+    db.commit()
+    return bool(renewed)
+
+
+def complete(db: Session, job_id: int, worker_id: str):
+    Job = models.Job
+    db.query(Job).filter(Job.id == job_id, Job.locked_by == worker_id, Job.status == "running").update({
+        "status": "succeeded", "dedup_key": None, "locked_by": None, "lease_expires_at": None,
+        "error": None, "finished_at": datetime.utcnow()
+    }, synchronize_session=False)
+    db.commit()
+
+
+def retry_delay(attempts: int) -> int:
+    """Seconds before retrying after the `attempts`-th failure."""
+    return min(settings.JOB_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), settings.JOB_RETRY_MAX_SECONDS)
+
+
+def fail(db: Session, job_id: int, worker_id: str, error: str) -> Optional[str]:
+    """Records a failed attempt: the job is retried after a backoff or, when out of attempts, failed. Returns the new status."""
+    Job = models.Job
+    job = db.query(Job).filter(Job.id == job_id, Job.locked_by == worker_id, Job.status == "running").first()
+    if job is None:
+        db.commit()
+        return None  # The lease was lost; whoever holds it now decides
+
+    now = datetime.utcnow()
+    job.error = error
+    job.locked_by = None
+    job.lease_expires_at = None
+    if job.attempts >= job.max_attempts:
+        job.status = "failed"
+        job.dedup_key = None
+        job.finished_at = now
+    else:
+        job.status = "queued"
+        job.run_after = now + timedelta(seconds=retry_delay(job.attempts))
+    db.commit()
+    return job.status
+
+
+def job_status(db: Session, job: models.Job) -> dict:
+    """A job as the UI polls it; queued jobs include how many jobs run before them."""
+    Job = models.Job
+    status = {
+        "id": job.id,
+        "type": job.type,
+        "mentor_id": job.mentor_id,
+        "status": job.status,
+        "priority": job.priority,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "error": job.error,
+        "created_at": job.created_at,
+        "run_after": job.run_after if job.status == "queued" else None,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "payload": json.loads(job.payload) if job.payload else {}
+    }
+    if job.status == "queued":
+        status["ahead"] = db.query(Job.id).filter(
+            Job.status == "queued",
+            (Job.priority > job.priority) | ((Job.priority == job.priority) & (Job.id < job.id))
+        ).count()
+    return status
+
+
+def get_job(db: Session, job_id: int) -> Optional[models.Job]:
+    return db.query(models.Job).filter(models.Job.id == job_id).first()
+
+
+def mentor_jobs(db: Session, mentor_id: int, limit: int = 20):
+    """The mentor's most recent jobs, newest first."""
+    jobs = db.query(models.Job).filter(models.Job.mentor_id == mentor_id)\
+        .order_by(models.Job.id.desc())\
+        .limit(limit)\
+        .all()
+    return [job_status(db, job) for job in jobs]
@@ -0,0 +1,61 @@
+import json
+from typing import Any, List, Tuple
+
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONObject:
+    """
+    Assembles a streamed top-level JSON object and releases each member as soon as its
+    value is complete, so callers can render sections before the whole object arrives.
+
+    A value is only released once the next structural character (',' or '}') has been
+    seen, which keeps scalars such as numbers from being cut off mid-token.
+    Anything before the opening brace (e.g. a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = None  # index just after the last consumed member
+        self._decoder = json.JSONDecoder()
+        self.result = {}
+        self.finished = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self._buffer += chunk
+        members = []
+        if self._pos is None:
+            start = self._buffer.find("{")
+            if start < 0:
+                return members
+            self._pos = start + 1
+
+        while not self.finished:
+            pos = self._skip(self._pos, ",")
+            if pos >= len(self._buffer):
+                break
+            if self._buffer[pos] == "}":
+                self.finished = True
+                break
+            try:
+                key, pos = self._decoder.raw_decode(self._buffer, pos)
+                pos = self._skip(pos)
+                if pos >= len(self._buffer):
+                    break
+                if self._buffer[pos] != ":":
+                    raise ValueError(f"Expected ':' after key {key!r}")
+                value, end = self._decoder.raw_decode(self._buffer, self._skip(pos + 1))
+            except json.JSONDecodeError:
+                break  # member still incomplete; wait for more text
+            after = self._skip(end)
+            if after >= len(self._buffer):
+                break
+            self.result[key] = value
+            members.append((key, value))
+            self._pos = after
+        return members
+
+    def _skip(self, pos: int, extra: str = "") -> int:
+        while pos < len(self._buffer) and self._buffer[pos] in _WHITESPACE + extra:
+            pos += 1
+        return pos
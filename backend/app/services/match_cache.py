@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from app.core import events
+from app.core.cache import cache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Mentor id -> time of the mentor's last relevant change, kept for one match TTL
+_CHANGES_KEY = "smart_matches_mentor_changes"
+
+
+def match_cache_key(email: str) -> str:
+    return f"smart_matches_{email}"
+
+
+def new_entry(matches: List[Dict[str, Any]], depth: int, computed_at: float) -> dict:
+    """
+    `computed_at` must be taken before the mentors were read, so that a change landing
+    mid-computation is still treated as dirty on the next read.
+    """
+    return {"depth": depth, "matches": matches, "computed_at": computed_at}
+
+
+def ttl_seconds() -> int:
+    """
+    How long match lists stay cached. Change events from other processes (API workers,
+    the job worker) only reach entries in a shared cache backend, so a per-process one
+    keeps them briefly.
+    """
+    if cache.backend.shared:
+        return settings.MATCH_CACHE_TTL_SECONDS
+    return min(settings.MATCH_CACHE_TTL_SECONDS, settings.MATCH_CACHE_LOCAL_TTL_SECONDS)
+
+
+async def store(email: str, entry: dict):
+    await cache.aset(match_cache_key(email), entry, ttl_seconds=ttl_seconds())
+
+
+async def dirty_mentor_ids(entry: dict) -> Set[int]:
+    """Mentors that changed after `entry` was computed."""
+    changes = await cache.aget(_CHANGES_KEY) or {}
+    computed_at = entry.get("computed_at", 0)
+    return {int(mentor_id) for mentor_id, changed_at in changes.items() if changed_at >= computed_at}
+
+
+def merge_rescored(entry: dict, dirty_ids: Set[int], rescored: List[Dict[str, Any]], computed_at: float) -> dict:
+    """
+    Replaces the dirty mentors' rows with freshly scored ones and re-sorts.
+
+    If the cached list was cut at `depth`, mentors below the cut are unknown, so any
+    row now scoring under the old cut-off score is dropped and the depth shrinks with
+    it; requests for more rows than remain fall back to a full recomputation.
+    """
+    matches = entry["matches"]
+    depth = entry["depth"]
+    truncated = len(matches) >= depth
+    cutoff = matches[-1]["match_score"] if truncated and matches else None
+
+    merged = [m for m in matches if m["mentor_id"] not in dirty_ids] + rescored
+    merged.sort(key=lambda m: m["match_score"], reverse=True)
+    if cutoff is not None:
+        merged = [m for m in merged if m["match_score"] >= cutoff][:depth]
+        depth = len(merged)
+    return new_entry(merged, depth, computed_at)
+
+
+def _evict_student(email: Optional[str] = None, **_):
+    if email:
+        cache.delete(match_cache_key(email))
+
+
+def _with_change(changes: Optional[dict], mentor_id: int, changed_at: float) -> dict:
+    # Entries older than one TTL have expired, so their changes no longer matter
+    horizon = changed_at - ttl_seconds()
+    changes = {key: value for key, value in (changes or {}).items() if value > horizon}
+    changes[str(mentor_id)] = changed_at
+    return changes
+
+
+def _record_mentor_change_sync(mentor_id: int, changed_at: float):
+    try:
+        with cache.lock_sync(_CHANGES_KEY):
+            changes = _with_change(cache.get(_CHANGES_KEY), mentor_id, changed_at)
+            cache.set(_CHANGES_KEY, changes, ttl_seconds=ttl_seconds())
+    except Exception as e:
+        logger.error(f"Recording a change to mentor {mentor_id} failed: {str(e)}")
+
+
+_pending = set()
+
+
+def _record_mentor_change(mentor_id: int, **_):
+    # Every writer goes through lock_sync, so publishers in sync routes (threads) and
+    # async code can't interleave their read-modify-write of the changes map
+    now = time.time()
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if loop is None:
+        _record_mentor_change_sync(mentor_id, now)
+        return
+    # Published from async code: waiting on the lock must not block the event loop
+    task = loop.create_task(asyncio.to_thread(_record_mentor_change_sync, mentor_id, now))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+async def drain():
+    """Waits for mentor changes recorded from async code; call before a short-lived loop exits."""
+    if _pending:
+        await asyncio.gather(*list(_pending), return_exceptions=True)
+
+
+events.subscribe(events.STUDENT_PROFILE_UPDATED, _evict_student)
+events.subscribe(events.STUDENT_SKILLS_UPDATED, _evict_student)
+events.subscribe(events.MENTOR_PROFILE_UPDATED, _record_mentor_change)
+events.subscribe(events.MENTOR_TRENDS_UPDATED, _record_mentor_change)
@@ -1,8 +1,11 @@
+import heapq
 import logging
 import math
-from typing import List, Dict, Any
+import numpy as np
+from typing import List, Dict, Any, Optional
 from app.db import models
 from app.services import ai_service
+from app.services.matching_matrix import DOMAIN_ALIASES, MentorFeatureMatrix
 
 logger = logging.getLogger(__name__)
 
@@ -47,14 +50,7 @@ class MatchingEngine:
         
         # Check for direct match or substring match (e.g. "CS" in "Computer Science")
         # Also check for broad categories
-        aliases = {
-            "cs": "computer science",
-            "cse": "computer science",
-            "ece": "electrical engineering",
-            "ee": "electrical engineering",
-            "ml": "machine learning",
-            "ai": "artificial intelligence"
-        }
+        aliases = DOMAIN_ALIASES
         
         normalized_student = aliases.get(student_major, student_major)
         
@@ -194,69 +190,87 @@ class MatchingEngine:
         return "Matched because " + " and ".join(reasons) + "."
 
     @classmethod
-    async def match_student_with_mentors(cls, student: models.StudentProfile, mentors: List[models.MentorProfile]) -> List[Dict[str, Any]]:
+    def _build_match(cls, student: models.StudentProfile, mentor: models.MentorProfile,
+                     semantic_sim: float, alignment_score: float, final_score: float) -> Dict[str, Any]:
+        explanation = cls._generate_explanation(student, mentor, semantic_sim, alignment_score)
+        
+        # Extract trend info for frontend display
+        trends = []
+        if hasattr(mentor, 'topic_trends') and mentor.topic_trends:
+            # Sort by count desc
+            sorted_trends = sorted(mentor.topic_trends, key=lambda x: x.total_count, reverse=True)
+            for t in sorted_trends[:3]: # Top 3
+                if t.topic:
+                    trends.append({
+                        "topic": t.topic.name,
+                        "status": t.trend_status,
+                        "count": t.total_count
+                    })
+
+        return {
+            "mentor_id": mentor.id,
+            "mentor_name": mentor.user.name if mentor.user else "Unknown",
+            "mentor_type": mentor.mentor_type,
+            "institution": mentor.university or mentor.company,
+            "position": mentor.position,
+            "match_score": round(final_score),
+            "semantic_score": round(semantic_sim * 100),
+            "alignment_score": round(alignment_score),
+            "explanation": explanation,
+            "research_areas": mentor.research_areas,
+            "accepting_students": mentor.accepting_phd_students,
+            "trends": trends
+        }
+
+    @classmethod
+    def rank_with_matrix(cls, student: models.StudentProfile, student_vec: List[float],
+                         matrix: MentorFeatureMatrix, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        Main Entry Point: Returns ranked list of mentors for a student.
+        Batch scoring mode: all three lenses are evaluated as array operations over the
+        whole mentor matrix; explanations are only built for the top `limit` mentors.
         """
-        matches = []
+        final, semantic_sim, alignment, keep = matrix.score(student, student_vec)
+        rows = np.flatnonzero(keep).tolist()
+        rounded = np.round(final)
         
-        # Cache student embedding once
-        student_text = f"{student.research_interests or ''} {student.bio or ''} {student.primary_skills or ''}"
-        student_vec = await ai_service.get_embedding(student_text)
+        # Sort by Final Match Score (Desc); heap top-k, ties keep mentor order
+        if limit is None:
+            order = sorted(rows, key=lambda row: rounded[row], reverse=True)
+        else:
+            order = heapq.nlargest(limit, rows, key=lambda row: rounded[row])
         
-        for mentor in mentors:
-            # LENS 1: Domain Filtering
-            if not cls._lens_1_domain_filtering(student, mentor):
-                continue # Hard filter
-                
-            # LENS 2: Semantic Similarity (0-100 scale equivalent)
-            mentor_text = f"{mentor.research_areas or ''} {mentor.bio or ''}"
-            mentor_vec = await ai_service.get_embedding(mentor_text)
-            
-            semantic_sim = cls._cosine_similarity(student_vec, mentor_vec)
-            semantic_score = semantic_sim * 100 # Convert to 0-100
-            
-            # LENS 3: Profile Alignment (0-40 scale in our implementation, normalized to 100 range)
-            alignment_score = cls._lens_3_profile_alignment(student, mentor)
-            
-            # FINAL MATCH SCORE
-            # Formula: 60% Semantic + 40% Alignment
-            # (Domain filter is binary)
-            final_score = (semantic_score * 0.6) + (alignment_score)
-            final_score = min(100.0, final_score) # Cap at 100
-            
-            if final_score > 10: # Minimum threshold to show
-                explanation = cls._generate_explanation(student, mentor, semantic_sim, alignment_score)
-                
-                # Extract trend info for frontend display
-                trends = []
-                if hasattr(mentor, 'topic_trends') and mentor.topic_trends:
-                    # Sort by count desc
-                    sorted_trends = sorted(mentor.topic_trends, key=lambda x: x.total_count, reverse=True)
-                    for t in sorted_trends[:3]: # Top 3
-                        if t.topic:
-                            trends.append({
-                                "topic": t.topic.name,
-                                "status": t.trend_status,
-                                "count": t.total_count
-                            })
+        return [
+            cls._build_match(student, matrix.mentors[row], float(semantic_sim[row]),
+                             float(alignment[row]), float(final[row]))
+            for row in order
+        ]
+
+    @staticmethod
+    async def embed_student(student: models.StudentProfile) -> List[float]:
+        student_text = f"{student.research_interests or ''} {student.bio or ''} {student.primary_skills or ''}"
+        return await ai_service.get_embedding(student_text)
 
-                matches.append({
-                    "mentor_id": mentor.id,
-                    "mentor_name": mentor.user.name if mentor.user else "Unknown",
-                    "mentor_type": mentor.mentor_type,
-                    "institution": mentor.university or mentor.company,
-                    "position": mentor.position,
-                    "match_score": round(final_score),
-                    "semantic_score": round(semantic_score),
-                    "alignment_score": round(alignment_score),
-                    "explanation": explanation,
-                    "research_areas": mentor.research_areas,
-                    "accepting_students": mentor.accepting_phd_students,
-                    "trends": trends
-                })
+    @classmethod
+    async def match_student_with_mentors(cls, student: models.StudentProfile, mentors: List[models.MentorProfile],
+                                         mentor_vectors: Optional[Dict[int, List[float]]] = None,
+                                         student_vec: Optional[List[float]] = None,
+                                         limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Main Entry Point: Returns ranked list of mentors for a student.
+        `mentor_vectors` maps mentor id -> stored embedding (see embedding_store); mentors
+        missing from it are embedded live. `limit` keeps only the top-k matches.
+        """
+        # Cache student embedding once
+        if student_vec is None:
+            student_vec = await cls.embed_student(student)
         
-        # Sort by Final Match Score (Desc)
-        matches.sort(key=lambda x: x["match_score"], reverse=True)
+        vectors = dict(mentor_vectors or {})
+        missing = [mentor for mentor in mentors if mentor.id not in vectors]
+        if missing:
+            missing_vecs = await ai_service.get_embeddings(
+                [f"{mentor.research_areas or ''} {mentor.bio or ''}" for mentor in missing]
+            )
+            vectors.update(zip([mentor.id for mentor in missing], missing_vecs))
         
-        return matches
+        # FINAL MATCH SCORE = 60% Semantic + Alignment, capped at 100 (Domain filter is binary)
+        return cls.rank_with_matrix(student, student_vec, MentorFeatureMatrix(mentors, vectors), limit=limit)
@@ -0,0 +1,145 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.db import models
+
+# Broad-category aliases shared by the scalar and batch Lens 1 implementations
+DOMAIN_ALIASES = {
+    "cs": "computer science",
+    "cse": "computer science",
+    "ece": "electrical engineering",
+    "ee": "electrical engineering",
+    "ml": "machine learning",
+    "ai": "artificial intelligence"
+}
+
+
+def _split_terms(value: Optional[str]) -> List[str]:
+    return [term.strip().lower() for term in value.split(',')] if value else []
+
+
+class _TermIndex:
+    """
+    Sparse mentor x term incidence stored as parallel (owner row, term code) arrays.
+    Evaluating a per-term predicate once and gathering it through `codes` replaces
+    re-splitting comma-separated strings for every student/mentor pair.
+    """
+
+    def __init__(self, per_row_terms: List[List[str]], normalize=None):
+        vocab: Dict[str, int] = {}
+        owners, codes = [], []
+        for row, terms in enumerate(per_row_terms):
+            for term in set(terms):
+                key = normalize(term) if normalize else term
+                code = vocab.setdefault(key, len(vocab))
+                owners.append(row)
+                codes.append(code)
+        self.vocab = list(vocab)
+        self.owners = np.asarray(owners, dtype=np.int64)
+        self.codes = np.asarray(codes, dtype=np.int64)
+        self.size = len(per_row_terms)
+
+    def count_hits(self, term_mask: np.ndarray) -> np.ndarray:
+        """Number of terms per row for which `term_mask[code]` is true."""
+        if not len(self.codes):
+            return np.zeros(self.size, dtype=np.float32)
+        return np.bincount(self.owners, weights=term_mask[self.codes], minlength=self.size).astype(np.float32)
+
+    def row_counts(self) -> np.ndarray:
+        return np.bincount(self.owners, minlength=self.size).astype(np.float32)
+
+
+class MentorFeatureMatrix:
+    """
+    Batch form of the 3-lens features for a fixed set of mentors.
+
+    Build once per mentor set, then `score` any number of students: Lens 2 is a single
+    matrix-vector product against L2-normalised float32 rows, Lens 1/3 are gathers over
+    precomputed term codes and per-mentor arrays.
+    """
+
+    def __init__(self, mentors: List[models.MentorProfile], mentor_vectors: Dict[int, List[float]]):
+        self.mentors = list(mentors)
+        n = len(self.mentors)
+
+        # Lens 2: normalised embedding matrix (zero rows for missing/mismatched vectors)
+        dims = next((len(v) for v in (mentor_vectors.get(m.id) for m in self.mentors) if v), 0)
+        matrix = np.zeros((n, dims), dtype=np.float32)
+        for row, mentor in enumerate(self.mentors):
+            vec = mentor_vectors.get(mentor.id)
+            if vec and len(vec) == dims:
+                matrix[row] = vec
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        self.vectors = matrix
+
+        # Lens 1: preferred backgrounds (an empty preference list means "open to all")
+        self.open_domain = np.array([not m.preferred_backgrounds for m in self.mentors], dtype=bool)
+        self.backgrounds = _TermIndex(
+            [_split_terms(m.preferred_backgrounds) for m in self.mentors],
+            normalize=lambda bg: DOMAIN_ALIASES.get(bg, bg)
+        )
+
+        # Lens 3: expectations, mentor type and availability
+        self.expectations = _TermIndex([_split_terms(m.min_expectations) for m in self.mentors])
+        self.expectation_counts = self.expectations.row_counts()
+        self.is_academic = np.array([m.mentor_type == 'academic_supervisor' for m in self.mentors], dtype=bool)
+        self.availability = np.array(
+            [{'Yes': 10.0, 'Maybe': 5.0}.get(m.accepting_phd_students, 0.0) for m in self.mentors],
+            dtype=np.float32
+        )
+
+    def __len__(self) -> int:
+        return len(self.mentors)
+
+    def domain_mask(self, student: models.StudentProfile) -> np.ndarray:
+        """Vectorised LENS 1: True where the mentor survives the hard domain filter."""
+        if not student.major:
+            return np.ones(len(self), dtype=bool)
+        student_major = student.major.lower().strip()
+        normalized_student = DOMAIN_ALIASES.get(student_major, student_major)
+        term_ok = np.array(
+            [normalized_student in bg or bg in normalized_student for bg in self.backgrounds.vocab],
+            dtype=np.float32
+        )
+        return self.open_domain | (self.backgrounds.count_hits(term_ok) > 0)
+
+    def semantic_similarity(self, student_vec: List[float]) -> np.ndarray:
+        """Vectorised LENS 2: cosine similarity against every mentor in one product."""
+        if not student_vec or len(student_vec) != self.vectors.shape[1]:
+            return np.zeros(len(self), dtype=np.float32)
+        query = np.asarray(student_vec, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return np.zeros(len(self), dtype=np.float32)
+        return self.vectors @ (query / norm)
+
+    def profile_alignment(self, student: models.StudentProfile) -> np.ndarray:
+        """Vectorised LENS 3: same 10/20/10 point split as MatchingEngine._lens_3_profile_alignment."""
+        if student.is_phd_seeker:
+            academic_pts = 10.0
+        elif student.degree and "master" in student.degree.lower():
+            academic_pts = 5.0
+        else:
+            academic_pts = 0.0
+        industry_pts = 10.0 if student.projects else 0.0
+        score = np.where(self.is_academic, academic_pts, industry_pts).astype(np.float32)
+
+        student_skills = set(_split_terms(student.primary_skills))
+        has_skill = np.array([req in student_skills for req in self.expectations.vocab], dtype=np.float32)
+        overlap = self.expectations.count_hits(has_skill)
+        ratio = np.divide(overlap, self.expectation_counts,
+                          out=np.ones(len(self), dtype=np.float32), where=self.expectation_counts > 0)
+        score += 20 * ratio
+
+        return score + self.availability
+
+    def score(self, student: models.StudentProfile, student_vec: List[float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns (final_score, semantic_sim, alignment_score, keep_mask) arrays, using the
+        60% semantic + alignment formula capped at 100 and the > 10 display threshold.
+        """
+        semantic_sim = self.semantic_similarity(student_vec)
+        alignment = self.profile_alignment(student)
+        final = np.minimum(100.0, semantic_sim * 100 * 0.6 + alignment)
+        keep = self.domain_mask(student) & (final > 10)
+        return final, semantic_sim, alignment, keep
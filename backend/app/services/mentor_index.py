@@ -0,0 +1,250 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db import models
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(vec) -> Optional[np.ndarray]:
+    arr = np.asarray(vec, dtype=np.float32)
+    norm = np.linalg.norm(arr)
+    if arr.ndim != 1 or norm == 0:
+        return None
+    return arr / norm
+
+
+class MentorANNIndex:
+    """
+    In-process IVF (inverted file) index over L2-normalised mentor embeddings.
+
+    Vectors are clustered with spherical k-means into ~sqrt(N) lists; a query only scores
+    the mentors in the `n_probe` lists whose centroids are closest to it. Below
+    `min_train_size` vectors the index stays untrained and searches exhaustively.
+    Upserts are incremental (a new/changed vector is assigned to its nearest list);
+    the clustering is retrained only when the index has doubled or halved in size.
+    """
+
+    def __init__(self, n_probe: int = 8, min_train_size: int = 1024, kmeans_iters: int = 10):
+        self.n_probe = n_probe
+        self.min_train_size = min_train_size
+        self.kmeans_iters = kmeans_iters
+        self._lock = threading.RLock()
+        self._reset(0)
+        self.synced_at: Optional[datetime] = None
+        self.pruned_at: Optional[datetime] = None
+
+    def _reset(self, dims: int):
+        self.dims = dims
+        self._ids = np.empty(0, dtype=np.int64)
+        self._vectors = np.empty((0, dims), dtype=np.float32)
+        self._alive = np.empty(0, dtype=bool)
+        self._size = 0
+        self._row_of: Dict[int, int] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._list_of_row = np.empty(0, dtype=np.int64)
+        self._lists: List[List[int]] = []
+        self._trained_count = 0
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    # --- Mutation ---
+
+    def _grow(self):
+        capacity = max(64, 2 * len(self._ids))
+        ids = np.zeros(capacity, dtype=np.int64)
+        vectors = np.zeros((capacity, self.dims), dtype=np.float32)
+        alive = np.zeros(capacity, dtype=bool)
+        list_of_row = np.full(capacity, -1, dtype=np.int64)
+        ids[:self._size] = self._ids[:self._size]
+        vectors[:self._size] = self._vectors[:self._size]
+        alive[:self._size] = self._alive[:self._size]
+        list_of_row[:self._size] = self._list_of_row[:self._size]
+        self._ids, self._vectors, self._alive, self._list_of_row = ids, vectors, alive, list_of_row
+
+    def upsert(self, mentor_id: int, vec) -> bool:
+        unit = _normalize(vec)
+        if unit is None:
+            return False
+        with self._lock:
+            if not len(self) and len(unit) != self.dims:
+                self._reset(len(unit))
+            elif len(unit) != self.dims:
+                logger.warning(f"Ignoring {len(unit)}-d embedding for mentor {mentor_id}; index is {self.dims}-d")
+                return False
+
+            row = self._row_of.get(mentor_id)
+            if row is None:
+                if self._size == len(self._ids):
+                    self._grow()
+                row = self._size
+                self._size += 1
+                self._row_of[mentor_id] = row
+                self._ids[row] = mentor_id
+                self._alive[row] = True
+            else:
+                self._detach(row)
+            self._vectors[row] = unit
+            self._attach(row)
+            self._maybe_retrain()
+        return True
+
+    def remove(self, mentor_id: int):
+        with self._lock:
+            row = self._row_of.pop(mentor_id, None)
+            if row is not None:
+                self._detach(row)
+                self._alive[row] = False
+
+    def _attach(self, row: int):
+        if self._centroids is None:
+            return
+        list_id = int(np.argmax(self._centroids @ self._vectors[row]))
+        self._list_of_row[row] = list_id
+        self._lists[list_id].append(row)
+
+    def _detach(self, row: int):
+        list_id = int(self._list_of_row[row])
+        if self._centroids is not None and list_id >= 0:
+            self._lists[list_id].remove(row)
+        self._list_of_row[row] = -1
+
+    # --- Training ---
+
+    def _maybe_retrain(self):
+        count = len(self)
+        if count < self.min_train_size:
+            if self._centroids is not None:
+                self._centroids = None
+                self._lists = []
+                self._list_of_row[:self._size] = -1
+            return
+        if self._centroids is None or count >= 2 * self._trained_count or count * 2 <= self._trained_count:
+            self.train()
+
+    def train(self):
+        """(Re)clusters all live vectors; also compacts rows left behind by removals."""
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:self._size])
+            ids = self._ids[rows]
+            vectors = self._vectors[rows]
+            self._size = len(rows)
+            self._ids[:self._size] = ids
+            self._vectors[:self._size] = vectors
+            self._alive[:self._size] = True
+            self._alive[self._size:] = False
+            self._row_of = {int(mentor_id): row for row, mentor_id in enumerate(ids)}
+
+            n_lists = int(np.clip(np.sqrt(self._size), 1, 1024))
+            rng = np.random.default_rng(0)
+            sample = vectors[rng.choice(self._size, size=min(self._size, 64 * n_lists), replace=False)]
+            centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+            for _ in range(self.kmeans_iters):
+                assign = np.argmax(sample @ centroids.T, axis=1)
+                for list_id in range(n_lists):
+                    members = sample[assign == list_id]
+                    if len(members):
+                        centroid = members.sum(axis=0)
+                        norm = np.linalg.norm(centroid)
+                        if norm > 0:
+                            centroids[list_id] = centroid / norm
+
+            self._centroids = centroids
+            assign = np.argmax(vectors @ centroids.T, axis=1)
+            self._list_of_row[:self._size] = assign
+            self._list_of_row[self._size:] = -1
+            self._lists = [[] for _ in range(n_lists)]
+            for row, list_id in enumerate(assign):
+                self._lists[list_id].append(row)
+            self._trained_count = self._size
+            logger.info(f"Mentor index trained: {self._size} vectors in {n_lists} lists")
+
+    # --- Query ---
+
+    def search(self, query_vec, k: int) -> List[Tuple[int, float]]:
+        """Returns up to k (mentor_id, cosine similarity) pairs, best first."""
+        query = _normalize(query_vec)
+        with self._lock:
+            if query is None or len(query) != self.dims or not len(self):
+                return []
+            if self._centroids is None:
+                rows = np.flatnonzero(self._alive[:self._size])
+            else:
+                n_probe = min(self.n_probe, len(self._lists))
+                probe = np.argpartition(self._centroids @ query, -n_probe)[-n_probe:]
+                rows = np.fromiter((row for list_id in probe for row in self._lists[list_id]), dtype=np.int64)
+            if not len(rows):
+                return []
+            sims = self._vectors[rows] @ query
+            if len(rows) > k:
+                top = np.argpartition(sims, -k)[-k:]
+                rows, sims = rows[top], sims[top]
+            order = np.argsort(-sims, kind="stable")
+            return [(int(self._ids[rows[i]]), float(sims[i])) for i in order]
+
+    def get_vectors(self, mentor_ids: List[int]) -> Dict[int, List[float]]:
+        with self._lock:
+            return {
+                mentor_id: self._vectors[self._row_of[mentor_id]].tolist()
+                for mentor_id in mentor_ids if mentor_id in self._row_of
+            }
+
+    # --- Persistence sync ---
+
+    def sync(self, db: Session):
+        """
+        Pulls rows from mentor_embeddings changed since the last sync, so edits made on
+        other workers reach this process without a full rebuild. Every
+        MATCH_ANN_PRUNE_INTERVAL_SECONDS it also drops mentors that were deactivated or
+        deleted, which leave no trace in mentor_embeddings but would otherwise keep
+        taking candidate slots.
+        """
+        query = db.query(
+            models.MentorEmbedding.mentor_id,
+            models.MentorEmbedding.vector,
+            models.MentorEmbedding.updated_at
+        )
+        if self.synced_at is not None:
+            query = query.filter(models.MentorEmbedding.updated_at >= self.synced_at)
+        latest = self.synced_at
+        for mentor_id, blob, updated_at in query.all():
+            if blob:
+                self.upsert(mentor_id, np.frombuffer(blob, dtype=np.float32))
+            if updated_at and (latest is None or updated_at > latest):
+                latest = updated_at
+        self.synced_at = latest
+
+        now = datetime.utcnow()
+        if self.pruned_at is None or now - self.pruned_at >= timedelta(seconds=settings.MATCH_ANN_PRUNE_INTERVAL_SECONDS):
+            self.prune(db)
+            self.pruned_at = now
+
+    def prune(self, db: Session) -> int:
+        """Removes mentors without an active account; returns how many were dropped."""
+        active = {mentor_id for (mentor_id,) in db.query(models.MentorProfile.id)
+                  .join(models.User, models.MentorProfile.user_id == models.User.id)
+                  .filter(models.User.is_active == True)}
+        with self._lock:
+            stale = [mentor_id for mentor_id in self._row_of if mentor_id not in active]
+            for mentor_id in stale:
+                self.remove(mentor_id)
+            if stale:
+                self._maybe_retrain()
+        if stale:
+            logger.info(f"Mentor index dropped {len(stale)} inactive mentors")
+        return len(stale)
+
+
+_index: Optional[MentorANNIndex] = None
+
+
+def get_mentor_index() -> MentorANNIndex:
+    global _index
+    if _index is None:
+        _index = MentorANNIndex(n_probe=settings.MATCH_ANN_NPROBE)
+    return _index
@@ -1,19 +1,43 @@
+import hashlib
 import logging
+from collections import defaultdict
+from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, insert
+from sqlalchemy.dialects import postgresql, sqlite
 from app.db import models
-from app.services import ai_service
-from typing import List, Dict, Any
+from app.services import ai_service, embedding_store, job_queue, trend_stats
+from app.services.topic_matcher import TopicMatcher, similar_topics
+from app.core.config import settings
+from app.core import events
+from app.db.database import AsyncSessionLocal, run_in_session
+from typing import List, Dict, Any, Iterable, Optional, Set
 
 logger = logging.getLogger(__name__)
 
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
 class ResearchService:
     
     @staticmethod
-    async def ingest_publications(db: Session, mentor_id: int):
+    async def ingest_publications(db, mentor_id: int):
         """
         Simulates ingestion of publications for a mentor.
+        `db` may be a Session or an AsyncSession.
         """
+        mentor_info = await run_in_session(db, ResearchService._ingestion_context, mentor_id)
+        if mentor_info is None:
+            return
+            
+        # Generate simulated pubs
+        logger.info(f"Generating publications for mentor {mentor_id}...")
+        pubs_data = await ai_service.generate_simulated_publications(**mentor_info)
+        
+        await run_in_session(db, ResearchService._store_publications, mentor_id, pubs_data)
+        logger.info(f"Ingested {len(pubs_data)} publications for mentor {mentor_id}")
+
+    @staticmethod
+    def _ingestion_context(db: Session, mentor_id: int):
         mentor = db.query(models.MentorProfile).filter(models.MentorProfile.id == mentor_id).first()
         if not mentor:
             raise ValueError("Mentor not found")
@@ -22,16 +46,16 @@ class ResearchService:
         existing_count = db.query(models.Publication).filter(models.Publication.mentor_profile_id == mentor_id).count()
         if existing_count > 0:
             logger.info(f"Mentor {mentor_id} already has {existing_count} publications. Skipping ingestion.")
-            return
+            return None
             
-        # Generate simulated pubs
-        logger.info(f"Generating publications for mentor {mentor_id}...")
-        pubs_data = await ai_service.generate_simulated_publications(
-            mentor_name=mentor.user.name if mentor.user else "Professor",
-            research_areas=mentor.research_areas,
-            bio=mentor.bio
-        )
-        
+        return {
+            "mentor_name": mentor.user.name if mentor.user else "Professor",
+            "research_areas": mentor.research_areas,
+            "bio": mentor.bio
+        }
+
+    @staticmethod
+    def _store_publications(db: Session, mentor_id: int, pubs_data: List[Dict[str, Any]]):
         for p in pubs_data:
             pub = models.Publication(
                 mentor_profile_id=mentor_id,
@@ -44,122 +68,202 @@ class ResearchService:
             db.add(pub)
         
         db.commit()
-        logger.info(f"Ingested {len(pubs_data)} publications for mentor {mentor_id}")
 
     @staticmethod
-    async def analyze_trends(db: Session, mentor_id: int):
+    async def ingest_publications_job(mentor_id: int):
+        """job_queue handler; errors propagate so the attempt is retried."""
+        async with AsyncSessionLocal() as db:
+            await ResearchService.ingest_publications(db, mentor_id)
+
+    @staticmethod
+    async def analyze_trends(db, mentor_id: int):
         """
         Analyzes publications to extract topics and compute trends.
+        `db` may be a Session or an AsyncSession.
         """
-        mentor = db.query(models.MentorProfile).filter(models.MentorProfile.id == mentor_id).first()
-        if not mentor:
-            raise ValueError("Mentor not found")
-            
         # 1. Fetch Publications
-        pubs = db.query(models.Publication).filter(models.Publication.mentor_profile_id == mentor_id).all()
-        if not pubs:
+        papers = await run_in_session(db, ResearchService._load_publications, mentor_id)
+        if not papers:
             logger.warning("No publications found for analysis")
             return
             
-        abstracts = [p.description for p in pubs if p.description]
+        abstracts = [p.description for p in papers if p.description]
         
         # 2. Extract Topics (AI)
-        topic_names = await ai_service.extract_research_topics(abstracts)
-        
-        # 3. Link Topics & Compute Trends
-        # Clear existing trends for re-analysis
-        db.query(models.MentorTopicTrend).filter(models.MentorTopicTrend.mentor_id == mentor_id).delete()
-        db.commit()
+        # Distinct, non-empty names (the model's output is not guaranteed clean)
+        names = list(dict.fromkeys(
+            name.strip() for name in await ai_service.extract_research_topics(abstracts)
+            if isinstance(name, str) and name.strip()
+        ))
+        if not names:
+            # Extraction returns [] on errors; keep the mentor's current trends
+            raise RuntimeError(f"No topics extracted for mentor {mentor_id}")
+
+        # 3. Classify papers by embedding similarity (stored paper vectors are reused)
+        paper_vectors = await embedding_store.load_publication_vectors(db, [
+            (p.id, embedding_store.publication_embedding_text(p.title, p.description)) for p in papers
+        ])
+        similar = similar_topics(
+            paper_vectors, await ai_service.get_embeddings(names), settings.TOPIC_SIMILARITY_THRESHOLD
+        )
         
-        for topic_name in topic_names:
-            # Get or Create Topic
-            topic = db.query(models.ResearchTopic).filter(models.ResearchTopic.name == topic_name).first()
-            if not topic:
-                topic = models.ResearchTopic(name=topic_name)
-                db.add(topic)
-                db.commit()
-                db.refresh(topic)
-                
-            # Link papers to this topic (Simple keyword match in abstract/title)
-            # In a real system, we'd use embedding similarity or AI classification
-            topic_years = []
-            
-            for pub in pubs:
-                text = (pub.title + " " + (pub.description or "")).lower()
-                if topic_name.lower() in text:
-                    # Link it
-                    # Check if link exists
-                    link = db.query(models.PublicationTopic).filter(
-                        models.PublicationTopic.publication_id == pub.id,
-                        models.PublicationTopic.topic_id == topic.id
-                    ).first()
-                    
-                    if not link:
-                        link = models.PublicationTopic(publication_id=pub.id, topic_id=topic.id)
-                        db.add(link)
-                    
-                    try:
-                        year = int(pub.publication_date[:4])
-                        topic_years.append(year)
-                    except:
-                        pass
-            
-            # Compute Trend Stats
-            if topic_years:
-                from collections import Counter
-                counts = Counter(topic_years)
-                total_count = len(topic_years)
-                last_active = max(topic_years)
-                
-                # Simple Trend Logic
-                # Compare recent (last 3 years) vs previous
-                current_year = 2025
-                recent_count = sum(c for y, c in counts.items() if y >= current_year - 3)
-                old_count = total_count - recent_count
-                
-                status = "Stable"
-                if recent_count > old_count * 1.5: # Arbitrary threshold
-                    status = "Rising"
-                elif recent_count == 0:
-                    status = "Declining"
-                
-                # Save Trend Summary
-                trend = models.MentorTopicTrend(
-                    mentor_id=mentor_id,
-                    topic_id=topic.id,
-                    trend_status=status,
-                    total_count=total_count,
-                    last_active_year=last_active
-                )
-                db.add(trend)
-                
-        db.commit()
+        # 4. Link Topics & Compute Trends
+        await run_in_session(db, ResearchService._store_trends, mentor_id, papers, names, similar)
         logger.info(f"Analysis complete for mentor {mentor_id}")
 
+        # Trends are shown on match cards, so cached rankings must pick them up
+        events.publish(events.MENTOR_TRENDS_UPDATED, mentor_id=mentor_id)
+
+    @staticmethod
+    def _load_publications(db: Session, mentor_id: int):
+        """The mentor's publications as plain rows, which stay usable across commits."""
+        mentor = db.query(models.MentorProfile.id).filter(models.MentorProfile.id == mentor_id).first()
+        if not mentor:
+            raise ValueError("Mentor not found")
+        Publication = models.Publication
+        return db.query(Publication.id, Publication.title, Publication.description,
+                        Publication.publication_date, Publication.citation_count)\
+            .filter(Publication.mentor_profile_id == mentor_id)\
+            .all()
+
     @staticmethod
-    def get_mentor_analytics(db: Session, mentor_id: int):
+    def _store_trends(db: Session, mentor_id: int, papers, names: List[str],
+                      similar: Optional[Dict[int, Set[int]]] = None):
         """
-        Returns structured analytics data for the frontend.
+        Links the mentor's publications to the extracted topics and rebuilds their
+        trend rows in one transaction. A paper is linked to each topic it names
+        literally and each one in `similar` (indexes into `names`, which must be
+        distinct and non-empty). Topics and links are read and written in bulk and
+        every title/abstract is scanned once for all topics, so the number of
+        statements does not grow with the number of papers or topics.
+        """
+        similar = similar or {}
+        topic_ids = ResearchService._topic_ids(db, names)
+
+        matcher = TopicMatcher(names)
+        links = set()
+        # (topic, year) -> [publications, citations]
+        year_counts = defaultdict(lambda: [0, 0])
+        for paper in papers:
+            year = ResearchService._publication_year(paper.publication_date)
+            text = f"{paper.title or ''} {paper.description or ''}"
+            for index in matcher.find(text) | similar.get(paper.id, set()):
+                topic_id = topic_ids[names[index]]
+                links.add((paper.id, topic_id))
+                if year is not None:
+                    counts = year_counts[(topic_id, year)]
+                    counts[0] += 1
+                    counts[1] += paper.citation_count or 0
+
+        existing_links = set(db.query(models.PublicationTopic.publication_id, models.PublicationTopic.topic_id)
+                             .filter(models.PublicationTopic.publication_id.in_([paper.id for paper in papers]))
+                             .all())
+        new_links = [{"publication_id": pub_id, "topic_id": topic_id} for pub_id, topic_id in sorted(links - existing_links)]
+        if new_links:
+            db.execute(insert(models.PublicationTopic), new_links)
+
+        # Re-analysis replaces the mentor's year counts and the trends derived from them
+        buckets = [(topic_id, year, count, citations) for (topic_id, year), (count, citations) in year_counts.items()]
+        db.query(models.MentorTopicYear).filter(models.MentorTopicYear.mentor_id == mentor_id)\
+            .delete(synchronize_session=False)
+        if buckets:
+            db.execute(insert(models.MentorTopicYear), [
+                {"mentor_id": mentor_id, "topic_id": topic_id, "year": year, "publications": count, "citations": citations}
+                for topic_id, year, count, citations in buckets
+            ])
+        db.query(models.MentorTopicTrend).filter(models.MentorTopicTrend.mentor_id == mentor_id)\
+            .delete(synchronize_session=False)
+        trends = trend_stats.trend_rows(mentor_id, buckets)
+        if trends:
+            db.execute(insert(models.MentorTopicTrend), trends)
+
+        db.query(models.MentorProfile).filter(models.MentorProfile.id == mentor_id).update({
+            "trends_analyzed_at": datetime.utcnow(),
+            "trends_fingerprint": ResearchService.publications_fingerprint(papers)
+        }, synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def _topic_ids(db: Session, names: List[str]) -> Dict[str, int]:
+        """Topic id per name, creating missing topics with one bulk insert."""
+        if not names:
+            return {}
+        Topic = models.ResearchTopic
+        found = dict(db.query(Topic.name, Topic.id).filter(Topic.name.in_(names)).all())
+        missing = [name for name in names if name not in found]
+        if missing:
+            upsert = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+            if upsert is not None:
+                # A concurrent analysis may be creating the same topics; keep whichever wins
+                db.execute(upsert(Topic).values([{"name": name} for name in missing])
+                           .on_conflict_do_nothing(index_elements=["name"]))
+            else:
+                db.add_all([Topic(name=name) for name in missing])
+                db.flush()
+            found.update(db.query(Topic.name, Topic.id).filter(Topic.name.in_(missing)).all())
+        return found
+
+    @staticmethod
+    def publications_fingerprint(papers: Iterable[tuple]) -> str:
+        """
+        Identifies a mentor's publications by what analysis reads from them, given
+        (id, title, description, publication_date, citation_count) rows: any edit,
+        addition or deletion changes it.
+        """
+        digest = hashlib.sha256()
+        for paper_id, title, description, publication_date, citation_count in sorted(papers, key=lambda paper: paper[0]):
+            text_hash = embedding_store.content_hash(embedding_store.publication_embedding_text(title, description))
+            digest.update(f"{paper_id}:{text_hash}:{publication_date}:{citation_count or 0}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _publication_year(publication_date: Optional[str]) -> Optional[int]:
+        try:
+            return int(publication_date[:4])
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    async def analyze_trends_job(mentor_id: int):
+        """job_queue handler; errors propagate so the attempt is retried."""
+        async with AsyncSessionLocal() as db:
+            await ResearchService.analyze_trends(db, mentor_id)
+
+    @staticmethod
+    def get_mentor_analytics(db: Session, mentor_id: int, window: Optional[int] = None):
+        """
+        Returns structured analytics data for the frontend: the top topics, with
+        trends derived for `window` years (TREND_WINDOW_YEARS by default).
         """
-        trends = db.query(models.MentorTopicTrend).filter(
-            models.MentorTopicTrend.mentor_id == mentor_id
-        ).order_by(models.MentorTopicTrend.total_count.desc()).limit(5).all()
-        
         return [
             {
-                "topic": t.topic.name,
-                "status": t.trend_status,
-                "count": t.total_count,
-                "last_active": t.last_active_year
+                "topic": t["topic"],
+                "status": t["status"],
+                "count": t["count"],
+                "last_active": t["last_active"],
+                "recent": t["recent"],
+                "previous": t["previous"],
+                "slope": t["slope"],
+                "citations": t["citations"]
             }
-            for t in trends
+            for t in trend_stats.mentor_trends(db, mentor_id, window, limit=5)
         ]
 
     @staticmethod
-    async def generate_gaps_for_pair(db: Session, mentor_id: int, student_id: int) -> List[Dict[str, Any]]:
+    async def generate_gaps_for_pair(db, mentor_id: int, student_id: int) -> List[Dict[str, Any]]:
         """
         Generates research gaps for a specific student-mentor pair.
+        `db` may be a Session or an AsyncSession.
         """
+        context = await run_in_session(db, ResearchService._gap_context, mentor_id, student_id)
+        
+        # 2. Call AI Service
+        gaps = await ai_service.generate_research_gaps(**context)
+        
+        return gaps
+
+    @staticmethod
+    def _gap_context(db: Session, mentor_id: int, student_id: int) -> Dict[str, Any]:
         mentor = db.query(models.MentorProfile).filter(models.MentorProfile.id == mentor_id).first()
         student = db.query(models.StudentProfile).filter(models.StudentProfile.id == student_id).first()
         
@@ -195,12 +299,13 @@ class ResearchService:
              if student.interests:
                  student_skills = [s.strip() for s in student.interests.split(',')]
         
-        # 2. Call AI Service
-        gaps = await ai_service.generate_research_gaps(
-            mentor_name=mentor.user.name,
-            mentor_domains=mentor_domains,
-            student_skills=student_skills,
-            mentor_abstracts=mentor_abstracts
-        )
-        
-        return gaps
+        return {
+            "mentor_name": mentor.user.name,
+            "mentor_domains": mentor_domains,
+            "student_skills": student_skills,
+            "mentor_abstracts": mentor_abstracts
+        }
+
+
+job_queue.register(job_queue.INGEST_PUBLICATIONS, ResearchService.ingest_publications_job)
+job_queue.register(job_queue.ANALYZE_TRENDS, ResearchService.analyze_trends_job)
@@ -0,0 +1,96 @@
+"""
+Linking publications to topics.
+
+TopicMatcher does multi-pattern substring matching (Aho–Corasick): scanning each
+text once finds every topic it contains, instead of one `in` test per topic per
+publication. Matching is case-insensitive and, like the `in` test it replaces, on
+plain substrings. similar_topics() adds the topics a paper is about without
+naming them, by embedding similarity.
+"""
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Sequence, Set
+
+import numpy as np
+
+
+class TopicMatcher:
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        # Trie as parallel lists: per state, its transitions, failure link and the
+        # pattern indexes ending there (including those reached by failure links)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Set[int]] = [set()]
+
+        for pattern in patterns:
+            self._add(pattern.lower())
+        self._link()
+
+    def _add(self, pattern: str):
+        index = len(self.patterns)
+        self.patterns.append(pattern)
+        if not pattern:
+            return  # An empty topic name would match everything
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(set())
+            state = nxt
+        self._output[state].add(index)
+
+    def _link(self):
+        # Breadth-first, so a state's failure target is always linked before it
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._output[nxt] |= self._output[self._fail[nxt]]
+
+    def find(self, text: str) -> Set[int]:
+        """Indexes (into `patterns`) of every pattern occurring in `text`."""
+        found: Set[int] = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+
+def _unit_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def similar_topics(paper_vectors: Dict[int, np.ndarray], topic_vectors: Sequence[Sequence[float]],
+                   threshold: float) -> Dict[int, Set[int]]:
+    """
+    Per paper id, the indexes (into `topic_vectors`) of topics whose embedding has
+    cosine similarity >= `threshold` with the paper's, scored for all pairs in one
+    matrix product. Missing or zero vectors (failed embeddings) match nothing.
+    """
+    dims = next((len(vec) for vec in topic_vectors if len(vec)), 0)
+    paper_ids = [paper_id for paper_id, vec in paper_vectors.items() if len(vec) == dims]
+    if not dims or not paper_ids:
+        return {}
+    topics = _unit_rows(np.array([vec if len(vec) == dims else np.zeros(dims) for vec in topic_vectors], dtype=np.float32))
+    papers = _unit_rows(np.vstack([paper_vectors[paper_id] for paper_id in paper_ids]).astype(np.float32))
+
+    matches: Dict[int, Set[int]] = defaultdict(set)
+    for row, col in zip(*np.nonzero(papers @ topics.T >= threshold)):
+        matches[paper_ids[row]].add(int(col))
+    return dict(matches)
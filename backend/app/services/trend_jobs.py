@@ -0,0 +1,234 @@
+"""
+Platform-wide trend recomputation.
+
+A run lists the mentors to analyse ("all" with publications, or only those whose
+publications changed since their last analysis) as checkpoint items, then works
+through them with at most TREND_JOB_CONCURRENCY analyses in flight. Every mentor
+uses its own session and commits its checkpoint when it finishes, so if the
+process dies, the next start resumes the run with the mentors still pending.
+
+    python -m app.services.trend_jobs                  # changed mentors (or resume)
+    python -m app.services.trend_jobs --all -c 8       # every mentor, 8 at a time
+    python -m app.services.trend_jobs --status         # latest run
+
+POST /admin/trends/recompute queues the run as a TREND_RUN job for app.worker.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.db import models
+from app.db.database import AsyncSessionLocal, run_in_session
+from app.services import job_queue, match_cache
+from app.services.research_service import ResearchService
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ("changed", "all")
+
+
+def mentors_to_analyse(db: Session, scope: str):
+    """Mentor profile ids with publications; for "changed", only those whose publications differ from the last analysis."""
+    Publication = models.Publication
+    if scope == "all":
+        return sorted(mentor_id for (mentor_id,) in db.query(Publication.mentor_profile_id)
+                      .filter(Publication.mentor_profile_id.isnot(None))
+                      .distinct())
+    papers = defaultdict(list)
+    for mentor_id, *paper in db.query(Publication.mentor_profile_id, Publication.id, Publication.title,
+                                      Publication.description, Publication.publication_date,
+                                      Publication.citation_count)\
+            .filter(Publication.mentor_profile_id.isnot(None)):
+        papers[mentor_id].append(paper)
+    fingerprints = dict(db.query(models.MentorProfile.id, models.MentorProfile.trends_fingerprint))
+    return sorted(
+        mentor_id for mentor_id, rows in papers.items()
+        if fingerprints.get(mentor_id) != ResearchService.publications_fingerprint(rows)
+    )
+
+
+def active_run(db: Session) -> Optional[models.TrendRun]:
+    return db.query(models.TrendRun).filter(models.TrendRun.status == "running")\
+        .order_by(models.TrendRun.id.desc()).first()
+
+
+def is_abandoned(run: models.TrendRun) -> bool:
+    return datetime.utcnow() - run.heartbeat_at > timedelta(seconds=settings.TREND_JOB_STALE_SECONDS)
+
+
+def start_run(db: Session, scope: str = "changed") -> Tuple[models.TrendRun, bool]:
+    """
+    The run to execute and whether it is a resumed one. An unfinished run whose
+    runner has gone quiet is resumed; a live one raises RuntimeError.
+    """
+    run = active_run(db)
+    if run is not None:
+        if not is_abandoned(run):
+            raise RuntimeError(f"Trend run {run.id} is still in progress")
+        run.heartbeat_at = datetime.utcnow()
+        db.commit()
+        logger.info(f"Resuming trend run {run.id} ({run.total - run.done - run.failed} mentors left)")
+        return run, True
+
+    mentor_ids = mentors_to_analyse(db, scope)
+    run = models.TrendRun(scope=scope, total=len(mentor_ids))
+    run.items = [models.TrendRunItem(mentor_id=mentor_id) for mentor_id in mentor_ids]
+    db.add(run)
+    db.commit()
+    logger.info(f"Started trend run {run.id}: {len(mentor_ids)} mentors ({scope})")
+    return run, False
+
+
+def run_status(db: Session, run_id: Optional[int] = None) -> Optional[dict]:
+    """A run (the latest by default) with its per-mentor timings, slowest first."""
+    query = db.query(models.TrendRun)
+    run = query.filter(models.TrendRun.id == run_id).first() if run_id else query.order_by(models.TrendRun.id.desc()).first()
+    if run is None:
+        return None
+    items = sorted(run.items, key=lambda item: item.duration_ms or 0, reverse=True)
+    return {
+        "id": run.id,
+        "scope": run.scope,
+        "status": run.status,
+        "total": run.total,
+        "done": run.done,
+        "failed": run.failed,
+        "started_at": run.started_at,
+        "heartbeat_at": run.heartbeat_at,
+        "finished_at": run.finished_at,
+        "mentors": [
+            {"mentor_id": item.mentor_id, "status": item.status, "duration_ms": item.duration_ms, "error": item.error}
+            for item in items
+        ]
+    }
+
+
+def _pending_items(db: Session, run_id: int):
+    return db.query(models.TrendRunItem.id, models.TrendRunItem.mentor_id)\
+        .filter(models.TrendRunItem.run_id == run_id, models.TrendRunItem.status == "pending")\
+        .order_by(models.TrendRunItem.id)\
+        .all()
+
+
+def _checkpoint(db: Session, run_id: int, item_id: int, error: Optional[str], duration_ms: float):
+    now = datetime.utcnow()
+    db.query(models.TrendRunItem).filter(models.TrendRunItem.id == item_id).update({
+        "status": "failed" if error else "done", "error": error, "duration_ms": duration_ms, "finished_at": now
+    }, synchronize_session=False)
+    counter = models.TrendRun.failed if error else models.TrendRun.done
+    db.query(models.TrendRun).filter(models.TrendRun.id == run_id).update(
+        {counter: counter + 1, "heartbeat_at": now}, synchronize_session=False
+    )
+    db.commit()
+
+
+def _heartbeat(db: Session, run_id: int):
+    db.query(models.TrendRun).filter(models.TrendRun.id == run_id, models.TrendRun.status == "running").update(
+        {"heartbeat_at": datetime.utcnow()}, synchronize_session=False
+    )
+    db.commit()
+
+
+async def _keep_alive(run_id: int):
+    """
+    Bumps the run's heartbeat while it executes, so a single slow analysis doesn't
+    make a live run look abandoned to the next start.
+    """
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                await run_in_session(db, _heartbeat, run_id)
+        except Exception as e:
+            logger.error(f"Trend run {run_id}: heartbeat failed: {str(e)}")
+        await asyncio.sleep(settings.TREND_JOB_STALE_SECONDS / 3)
+
+
+def _finish(db: Session, run_id: int):
+    db.query(models.TrendRun).filter(models.TrendRun.id == run_id).update(
+        {"status": "completed", "finished_at": datetime.utcnow()}, synchronize_session=False
+    )
+    db.commit()
+
+
+async def execute(run_id: int, concurrency: Optional[int] = None):
+    """Analyses the run's pending mentors, checkpointing each one, then marks the run completed."""
+    async with AsyncSessionLocal() as db:
+        pending = await run_in_session(db, _pending_items, run_id)
+    slots = asyncio.Semaphore(concurrency or settings.TREND_JOB_CONCURRENCY)
+
+    async def analyse(item_id: int, mentor_id: int):
+        async with slots:
+            started = time.perf_counter()
+            error = None
+            try:
+                async with AsyncSessionLocal() as db:
+                    await ResearchService.analyze_trends(db, mentor_id)
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            duration_ms = (time.perf_counter() - started) * 1000
+            async with AsyncSessionLocal() as db:
+                await run_in_session(db, _checkpoint, run_id, item_id, error, duration_ms)
+            if error:
+                logger.warning(f"Trend run {run_id}: mentor {mentor_id} failed after {duration_ms:.0f} ms: {error}")
+            else:
+                logger.info(f"Trend run {run_id}: mentor {mentor_id} done in {duration_ms:.0f} ms")
+
+    heartbeat = asyncio.create_task(_keep_alive(run_id))
+    try:
+        await asyncio.gather(*(analyse(item_id, mentor_id) for item_id, mentor_id in pending))
+    finally:
+        heartbeat.cancel()
+    async with AsyncSessionLocal() as db:
+        await run_in_session(db, _finish, run_id)
+    logger.info(f"Trend run {run_id} completed")
+
+
+async def _run_job(mentor_id: Optional[int], run_id: int):
+    """job_queue handler for TREND_RUN; a retried job resumes the run's pending mentors."""
+    await execute(run_id)
+
+
+job_queue.register(job_queue.TREND_RUN, _run_job)
+
+
+async def _main(args):
+    async with AsyncSessionLocal() as db:
+        if args.status:
+            status = await run_in_session(db, run_status, None)
+            if status is None:
+                print("No trend runs yet")
+                return
+            print(f"Run {status['id']} ({status['scope']}): {status['status']}, "
+                  f"{status['done']} done, {status['failed']} failed of {status['total']}")
+            return
+        run, resumed = await run_in_session(db, start_run, "all" if args.all else "changed")
+        run_id = run.id
+
+    if not cache.backend.shared:
+        logger.warning("CACHE_URL is per process: the API's cached match lists won't see the new trends "
+                       "until they expire (MATCH_CACHE_LOCAL_TTL_SECONDS)")
+    await execute(run_id, args.concurrency)
+    await match_cache.drain()
+    async with AsyncSessionLocal() as db:
+        status = await run_in_session(db, run_status, run_id)
+    for item in status["mentors"]:
+        timing = f"{item['duration_ms']:.0f} ms" if item["duration_ms"] is not None else "-"
+        print(f"mentor {item['mentor_id']:>6}  {item['status']:<7} {timing:>10}  {item['error'] or ''}")
+    print(f"Run {run_id}{' (resumed)' if resumed else ''}: {status['done']} done, {status['failed']} failed of {status['total']}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Recompute mentor topic trends")
+    parser.add_argument("--all", action="store_true", help="every mentor with publications, not just changed ones")
+    parser.add_argument("-c", "--concurrency", type=int, default=None, help="analyses in flight (default TREND_JOB_CONCURRENCY)")
+    parser.add_argument("--status", action="store_true", help="show the latest run and exit")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,174 @@
+"""
+Topic trends derived from per-(mentor, topic, year) counts.
+
+Analysis stores how many of a mentor's publications (and citations) fall on each
+topic per year in mentor_topic_years. Trend status and slope are computed from
+those buckets for any window, relative to the current year, so changing the trend
+definition only means re-deriving (`python -m app.services.trend_stats`), never
+re-running topic extraction.
+
+For a window of W years, "recent" is the last W years including the current one
+and "previous" the W years before. A topic is Rising when recent publications
+exceed previous ones by TREND_RISING_RATIO, Declining when it has none recently
+or previous ones exceed recent ones by the same ratio, and Stable otherwise.
+"""
+import argparse
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core import events
+from app.core.config import settings
+from app.db import models
+
+logger = logging.getLogger(__name__)
+
+# (topic id, year, publications, citations)
+Bucket = Tuple[int, int, int, int]
+
+
+def derive(buckets: Sequence[Bucket], window: Optional[int] = None, current_year: Optional[int] = None,
+           rising_ratio: Optional[float] = None) -> List[dict]:
+    """Trend stats per topic from its year buckets, most published topic first."""
+    if not buckets:
+        return []
+    window = max(window or settings.TREND_WINDOW_YEARS, 1)
+    current_year = current_year or datetime.utcnow().year
+    ratio = rising_ratio or settings.TREND_RISING_RATIO
+
+    topic_ids, years, publications, citations = (np.asarray(column, dtype=np.int64) for column in zip(*buckets))
+    topics, row = np.unique(topic_ids, return_inverse=True)
+    size = len(topics)
+
+    total = np.bincount(row, weights=publications, minlength=size)
+    cited = np.bincount(row, weights=citations, minlength=size)
+    last_active = np.full(size, np.iinfo(np.int64).min)
+    np.maximum.at(last_active, row, years)
+
+    age = current_year - years  # 0 for this year; negative for future-dated papers
+    in_recent = (age >= 0) & (age < window)
+    in_previous = (age >= window) & (age < 2 * window)
+    recent = np.bincount(row, weights=publications * in_recent, minlength=size)
+    previous = np.bincount(row, weights=publications * in_previous, minlength=size)
+
+    # Least-squares slope of publications per year across the recent window
+    per_year = np.zeros((size, window))
+    np.add.at(per_year, (row[in_recent], window - 1 - age[in_recent]), publications[in_recent])
+    x = np.arange(window) - (window - 1) / 2
+    slope = per_year @ x / (x @ x) if window > 1 else np.zeros(size)
+
+    status = np.where(
+        (recent == 0) | (previous > recent * ratio), "Declining",
+        np.where(recent > previous * ratio, "Rising", "Stable")
+    )
+
+    order = np.lexsort((topics, -total))
+    return [
+        {
+            "topic_id": int(topics[i]),
+            "status": str(status[i]),
+            "count": int(total[i]),
+            "recent": int(recent[i]),
+            "previous": int(previous[i]),
+            "slope": round(float(slope[i]), 3),
+            "citations": int(cited[i]),
+            "last_active": int(last_active[i])
+        }
+        for i in order
+    ]
+
+
+def trend_rows(mentor_id: int, buckets: Sequence[Bucket]) -> List[dict]:
+    """MentorTopicTrend values for the configured window, for inserting after an analysis."""
+    return [
+        {
+            "mentor_id": mentor_id,
+            "topic_id": trend["topic_id"],
+            "trend_status": trend["status"],
+            "total_count": trend["count"],
+            "last_active_year": trend["last_active"]
+        }
+        for trend in derive(buckets)
+    ]
+
+
+def _buckets(db: Session, mentor_ids: Optional[Iterable[int]] = None) -> Dict[int, List[Bucket]]:
+    TopicYear = models.MentorTopicYear
+    query = db.query(TopicYear.mentor_id, TopicYear.topic_id, TopicYear.year, TopicYear.publications, TopicYear.citations)
+    if mentor_ids is not None:
+        query = query.filter(TopicYear.mentor_id.in_(list(mentor_ids)))
+    by_mentor: Dict[int, List[Bucket]] = {}
+    for mentor_id, topic_id, year, publications, citations in query:
+        by_mentor.setdefault(mentor_id, []).append((topic_id, year, publications, citations))
+    return by_mentor
+
+
+def mentor_trends(db: Session, mentor_id: int, window: Optional[int] = None,
+                  current_year: Optional[int] = None, limit: Optional[int] = None) -> List[dict]:
+    """The mentor's topic trends for `window` years (TREND_WINDOW_YEARS by default), with topic names."""
+    trends = derive(_buckets(db, [mentor_id]).get(mentor_id, []), window, current_year)[:limit]
+    if trends:
+        names = dict(db.query(models.ResearchTopic.id, models.ResearchTopic.name)
+                     .filter(models.ResearchTopic.id.in_([trend["topic_id"] for trend in trends])))
+        for trend in trends:
+            trend["topic"] = names.get(trend["topic_id"])
+    return trends
+
+
+def refresh(db: Session, mentor_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Re-derives the stored MentorTopicTrend rows (shown on profiles and match cards)
+    from the year buckets, e.g. after a new year starts or the trend settings
+    change. Returns the number of mentors whose trends changed.
+    """
+    Trend = models.MentorTopicTrend
+    by_mentor = _buckets(db, mentor_ids)
+    stored = {}
+    query = db.query(Trend.id, Trend.mentor_id, Trend.topic_id, Trend.trend_status, Trend.total_count, Trend.last_active_year)
+    if mentor_ids is not None:
+        query = query.filter(Trend.mentor_id.in_(list(by_mentor)))
+    for trend_id, mentor_id, topic_id, *values in query:
+        stored[(mentor_id, topic_id)] = (trend_id, tuple(values))
+
+    changes, changed_mentors = [], set()
+    for mentor_id, buckets in by_mentor.items():
+        for trend in derive(buckets):
+            trend_id, values = stored.get((mentor_id, trend["topic_id"]), (None, None))
+            derived = (trend["status"], trend["count"], trend["last_active"])
+            if trend_id is None or values == derived:
+                continue
+            changes.append({"id": trend_id, "trend_status": derived[0], "total_count": derived[1], "last_active_year": derived[2]})
+            changed_mentors.add(mentor_id)
+    if changes:
+        db.execute(update(Trend), changes)
+    db.commit()
+
+    for mentor_id in sorted(changed_mentors):
+        events.publish(events.MENTOR_TRENDS_UPDATED, mentor_id=mentor_id)
+    logger.info(f"Re-derived trends for {len(by_mentor)} mentors: {len(changes)} topics changed")
+    return len(changed_mentors)
+
+
+if __name__ == "__main__":
+    from app.core.cache import cache
+    from app.db.database import SessionLocal
+    # Subscribes to MENTOR_TRENDS_UPDATED, so the API's cached match lists pick up the changes
+    from app.services import match_cache  # noqa: F401
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Re-derive stored topic trends from the year buckets")
+    parser.add_argument("--mentor", type=int, action="append", help="mentor profile id (repeatable; default all)")
+    args = parser.parse_args()
+    if not cache.backend.shared:
+        logger.warning("CACHE_URL is per process: the API's cached match lists won't see the new trends "
+                       "until they expire (MATCH_CACHE_LOCAL_TTL_SECONDS)")
+    db = SessionLocal()
+    try:
+        changed = refresh(db, args.mentor)
+    finally:
+        db.close()
+    print(f"Trends changed for {changed} mentors")
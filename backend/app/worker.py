@@ -0,0 +1,139 @@
+"""
+Background job worker: runs the jobs the API enqueues (see app/services/job_queue.py)
+in its own process, so AI calls never compete with request handling.
+
+    python -m app.worker                # JOB_WORKER_CONCURRENCY jobs at a time
+    python -m app.worker -c 4
+
+Run as many workers as needed; they share the queue through the database. SIGTERM
+stops leasing new jobs and waits for the running ones to finish.
+
+Jobs publish mentor changes that invalidate the API's cached match lists, which
+only reach the API through a shared cache backend, so the worker refuses to start
+with CACHE_URL=memory://.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Optional
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal, run_in_session
+from app.services import job_queue, match_cache
+# Imported for their job_queue.register() calls
+from app.services import research_service, trend_jobs  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+
+async def _keep_lease(job_id: int, worker_id: str, task: asyncio.Task):
+    """Renews the lease while the job runs; cancels it if another worker has taken it over."""
+    while True:
+        await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+        async with AsyncSessionLocal() as db:
+            if not await run_in_session(db, job_queue.renew_lease, job_id, worker_id):
+                logger.warning(f"Lost the lease on job {job_id}; cancelling it")
+                task.cancel()
+                return
+
+
+async def run_job(job, worker_id: str):
+    handler = job_queue.handler_for(job.type)
+    started = time.perf_counter()
+    error: Optional[str] = None
+    if handler is None:
+        error = f"No handler registered for job type '{job.type}'"
+    else:
+        task = asyncio.create_task(handler(job.mentor_id, **json.loads(job.payload or "{}")))
+        lease = asyncio.create_task(_keep_lease(job.id, worker_id, task))
+        try:
+            await task
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            return  # Lease lost: the new holder owns the outcome
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        finally:
+            lease.cancel()
+
+    duration_ms = (time.perf_counter() - started) * 1000
+    async with AsyncSessionLocal() as db:
+        if error is None:
+            await run_in_session(db, job_queue.complete, job.id, worker_id)
+            logger.info(f"Job {job.id} ({job.type}, mentor {job.mentor_id}) done in {duration_ms:.0f} ms")
+        else:
+            status = await run_in_session(db, job_queue.fail, job.id, worker_id, error)
+            logger.warning(f"Job {job.id} ({job.type}, mentor {job.mentor_id}) attempt {job.attempts} "
+                           f"failed after {duration_ms:.0f} ms ({status}): {error}")
+
+
+async def run_worker(concurrency: Optional[int] = None, worker_id: Optional[str] = None,
+                     stopping: Optional[asyncio.Event] = None):
+    """Leases and runs jobs until `stopping` is set, then waits for the running ones."""
+    concurrency = concurrency or settings.JOB_WORKER_CONCURRENCY
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    stopping = stopping or asyncio.Event()
+    slots = asyncio.Semaphore(concurrency)
+    running = set()
+    logger.info(f"Worker {worker_id} started ({concurrency} slots)")
+
+    async def run(job):
+        try:
+            await run_job(job, worker_id)
+        except Exception as e:
+            logger.error(f"Worker {worker_id} could not record job {job.id}: {str(e)}")
+        finally:
+            slots.release()
+
+    while not stopping.is_set():
+        await slots.acquire()
+        if stopping.is_set():
+            slots.release()
+            break
+        try:
+            async with AsyncSessionLocal() as db:
+                job = await run_in_session(db, job_queue.lease, worker_id)
+        except Exception as e:
+            logger.error(f"Worker {worker_id} could not lease a job: {str(e)}")
+            job = None
+        if job is None:
+            slots.release()
+            try:
+                await asyncio.wait_for(stopping.wait(), timeout=settings.JOB_POLL_INTERVAL_MS / 1000)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        task = asyncio.create_task(run(job))
+        running.add(task)
+        task.add_done_callback(running.discard)
+
+    if running:
+        logger.info(f"Worker {worker_id} stopping; waiting for {len(running)} running jobs")
+        await asyncio.gather(*running, return_exceptions=True)
+    await match_cache.drain()
+    logger.info(f"Worker {worker_id} stopped")
+
+
+async def _main(args):
+    if not cache.backend.shared:
+        raise SystemExit("The worker needs a shared CACHE_URL (sqlite:///... or redis://...) so that the "
+                         "mentor changes it records reach the API's match cache; memory:// is per process")
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stopping.set)
+    await run_worker(args.concurrency, stopping=stopping)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Run background jobs")
+    parser.add_argument("-c", "--concurrency", type=int, default=None, help="jobs in flight (default JOB_WORKER_CONCURRENCY)")
+    asyncio.run(_main(parser.parse_args()))
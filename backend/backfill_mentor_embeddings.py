@@ -0,0 +1,21 @@
+import asyncio
+from app.db.database import SessionLocal, engine
+from app.db import models
+from app.services import embedding_store
+
+async def backfill():
+    print("Creating mentor_embeddings table if needed...")
+    models.Base.metadata.create_all(bind=engine, tables=[models.MentorEmbedding.__table__])
+
+    db = SessionLocal()
+    try:
+        mentors = db.query(models.MentorProfile).all()
+        print(f"Checking embeddings for {len(mentors)} mentors...")
+        vectors = await embedding_store.load_mentor_vectors(db, mentors)
+        stored = db.query(models.MentorEmbedding).count()
+        print(f"Done. {stored}/{len(vectors)} mentors have a stored embedding.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
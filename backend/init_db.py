@@ -1,10 +1,10 @@
 from app.db.database import engine
-from app.db.models import Base
+from app.db.migrate import upgrade
 
 def init_db():
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    print("Database tables created successfully!")
+    print("Applying database migrations...")
+    applied = upgrade(engine)
+    print(f"Database is up to date ({len(applied)} migration(s) applied)")
 
 if __name__ == "__main__":
     init_db()
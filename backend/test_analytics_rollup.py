@@ -0,0 +1,94 @@
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.database import Base
+from app.db import models
+from app.services import analytics_rollup
+
+MENTORS = 5
+STUDENTS = 12
+
+def seed(db):
+    random.seed(19)
+    mentors = [models.User(email=f"mentor{i}@example.edu", name=f"Mentor {i}", role="mentor") for i in range(MENTORS)]
+    students = [models.User(email=f"student{i}@example.edu", name=f"Student {i}", role="student") for i in range(STUDENTS)]
+    db.add_all(mentors + students)
+    db.flush()
+    # The last mentor has no activity at all, and one opportunity has no mentor
+    opportunities = [
+        models.Opportunity(mentor_id=random.choice(mentors[:-1]).id, title=f"RA {i}", type="research_assistant", funding_amount=random.choice([None, 500.0, 1200.0]))
+        for i in range(10)
+    ] + [models.Opportunity(mentor_id=None, title="Open call", type="collaboration", funding_amount=300.0)]
+    db.add_all(opportunities)
+    db.flush()
+    for student in students:
+        for opportunity in random.sample(opportunities, 3):
+            db.add(models.Application(student_id=student.id, opportunity_id=opportunity.id, match_score=random.uniform(0, 100)))
+        mentor = random.choice(mentors[:-1])
+        db.add(models.PublicationProject(title=f"Paper by {student.name}", student_id=student.id, mentor_id=mentor.id, status=random.choice(["Ideation", "Drafting", "Published"])))
+        if random.random() < 0.5:
+            db.add(models.Certificate(uuid=f"cert-{student.id}", student_id=student.id, mentor_id=mentor.id, opportunity_id=opportunities[0].id, pdf_url="/uploads/cert.pdf"))
+    db.commit()
+    return [mentor.id for mentor in mentors]
+
+def rollup_rows(db):
+    return {
+        row.mentor_id: {column: getattr(row, column) for column in analytics_rollup.STAT_COLUMNS}
+        for row in db.query(models.DashboardStats)
+    }
+
+def test_analytics_rollup():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    mentor_ids = seed(db)
+
+    # Before the first refresh, reads fall back to the live counters
+    stats, _, source = analytics_rollup.dashboard_stats(db)
+    assert source == "live" and stats == analytics_rollup.live_stats(db)
+
+    # One platform row plus one per mentor (idle mentors included), each matching the live counters
+    assert analytics_rollup.refresh(db) == MENTORS
+    rows = rollup_rows(db)
+    assert set(rows) == {analytics_rollup.PLATFORM, *mentor_ids}, sorted(rows)
+    assert rows[analytics_rollup.PLATFORM] == analytics_rollup.live_stats(db)
+    for mentor_id in mentor_ids:
+        assert rows[mentor_id] == analytics_rollup.live_stats(db, mentor_id), mentor_id
+    assert rows[mentor_ids[-1]] == dict.fromkeys(analytics_rollup.STAT_COLUMNS, 0)
+    for mentor_id in [None, mentor_ids[0]]:
+        stats, _, source = analytics_rollup.dashboard_stats(db, mentor_id)
+        assert source == "rollup" and stats == rows[mentor_id or analytics_rollup.PLATFORM]
+
+    # Refreshing again replaces the rows rather than adding to them, and picks up new writes
+    student = db.query(models.User).filter_by(role="student").first()
+    db.add(models.Opportunity(mentor_id=mentor_ids[-1], title="New", type="internship", funding_amount=100.0))
+    db.add(models.Application(student_id=student.id, opportunity_id=db.query(models.Opportunity.id).first()[0], match_score=50.0))
+    db.commit()
+    analytics_rollup.refresh(db)
+    assert db.query(models.DashboardStats).count() == MENTORS + 1
+    rows = rollup_rows(db)
+    assert rows[analytics_rollup.PLATFORM] == analytics_rollup.live_stats(db)
+    assert rows[analytics_rollup.PLATFORM]["applications"] == STUDENTS * 3 + 1
+    assert rows[mentor_ids[-1]] == analytics_rollup.live_stats(db, mentor_ids[-1]) and rows[mentor_ids[-1]]["opportunities"] == 1
+
+    # Background refreshes only run once the platform row is stale
+    def platform_refreshed_at():
+        db.expire_all()
+        return db.query(models.DashboardStats.refreshed_at).filter_by(mentor_id=analytics_rollup.PLATFORM).scalar()
+    refreshed_at = platform_refreshed_at()
+    analytics_rollup.refresh_if_stale(engine)
+    assert platform_refreshed_at() == refreshed_at, "fresh rollup was rebuilt"
+    stale = datetime.utcnow() - timedelta(seconds=settings.ANALYTICS_ROLLUP_MAX_AGE_SECONDS + 60)
+    db.query(models.DashboardStats).update({models.DashboardStats.refreshed_at: stale})
+    db.commit()
+    analytics_rollup.refresh_if_stale(engine)
+    assert not analytics_rollup.is_stale(platform_refreshed_at()), "stale rollup was not rebuilt"
+    print(f"Rollup of {MENTORS} mentors matches the live counters")
+    db.close()
+
+if __name__ == "__main__":
+    test_analytics_rollup()
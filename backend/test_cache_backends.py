@@ -0,0 +1,80 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+from app.core.cache import Cache
+from app.core.cache_backends import MemoryBackend, SQLiteBackend
+
+def check_backend(backend):
+    cache = Cache(backend, lock_timeout=5, sweep_interval=0)
+    loop_thread = threading.get_ident()
+    io_threads = set()
+    get = backend.get
+    def recording_get(key):
+        io_threads.add(threading.get_ident())
+        return get(key)
+    backend.get = recording_get
+
+    async def run():
+        cache.clear()
+        await cache.aset("a", {"x": 1}, ttl_seconds=60)
+        assert await cache.aget("a") == {"x": 1}
+        await cache.aset("short", 1, ttl_seconds=1)
+        await cache.adelete("a")
+        assert await cache.aget("a") is None
+
+        # Single-flight: concurrent misses share one computation
+        calls = []
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return ["gap"]
+        values = await asyncio.gather(*[cache.get_or_set("gaps", compute) for _ in range(10)])
+        assert values == [["gap"]] * 10 and len(calls) == 1, calls
+
+        # Rejected values are returned but computed again next time
+        empty_calls = []
+        async def empty():
+            empty_calls.append(1)
+            return []
+        for _ in range(3):
+            assert await cache.get_or_set("empty", empty, should_cache=bool) == []
+        assert len(empty_calls) == 3, empty_calls
+
+    # A second event loop must not trip over locks bound to the first
+    asyncio.run(run())
+    asyncio.run(run())
+    if backend.shared:
+        assert loop_thread not in io_threads, "shared backend I/O ran on the event loop"
+    else:
+        assert io_threads == {loop_thread}
+    time.sleep(1.1)
+    assert cache.get("short") is None, "entry outlived its TTL"
+
+    # lock_sync is per key: holding one key doesn't block another
+    held, release = threading.Event(), threading.Event()
+    def hold():
+        with cache.lock_sync("slow"):
+            held.set()
+            release.wait(5)
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait(5)
+    started = time.monotonic()
+    with cache.lock_sync("other"):
+        pass
+    assert time.monotonic() - started < 1, "lock_sync on an unrelated key waited"
+    release.set()
+    holder.join()
+    assert not cache._sync_locks
+    print(f"{type(backend).__name__}: ok")
+
+def test_cache_backends():
+    check_backend(MemoryBackend(max_entries=100))
+    with tempfile.TemporaryDirectory() as tmp:
+        check_backend(SQLiteBackend(os.path.join(tmp, "cache.db"), max_entries=100))
+
+if __name__ == "__main__":
+    test_cache_backends()
@@ -0,0 +1,102 @@
+import importlib
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base
+from app.db import models
+from app.services import conversations
+
+USERS = 4
+MESSAGES = 300
+
+def send(db, sender_id, receiver_id, at):
+    message = models.Message(sender_id=sender_id, receiver_id=receiver_id, content=f"{sender_id}->{receiver_id}", timestamp=at)
+    db.add(message)
+    db.flush()
+    conversations.record_message(db, message)
+    db.commit()
+    return message
+
+def summaries(db):
+    return {
+        (c.user_id, c.partner_id): (c.last_message_id, c.unread_count)
+        for c in db.query(models.Conversation)
+    }
+
+def expected_summaries(db):
+    """Conversation rows recomputed from the messages themselves."""
+    expected = {}
+    for m in db.query(models.Message).order_by(models.Message.id):
+        for user_id, partner_id, incoming in ((m.sender_id, m.receiver_id, 0), (m.receiver_id, m.sender_id, 1)):
+            _, unread = expected.get((user_id, partner_id), (None, 0))
+            expected[(user_id, partner_id)] = (m.id, unread + (incoming and not m.read))
+    return expected
+
+def test_conversations():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    users = [models.User(email=f"user{i}@example.edu", name=f"User {i}", role="student") for i in range(USERS)]
+    db.add_all(users)
+    db.commit()
+    ids = [user.id for user in users]
+
+    random.seed(7)
+    start = datetime(2024, 1, 1)
+    for i in range(MESSAGES):
+        sender_id, receiver_id = random.sample(ids, 2)
+        send(db, sender_id, receiver_id, start + timedelta(minutes=i))
+    assert summaries(db) == expected_summaries(db)
+
+    # The summary only moves forwards, even if an older message commits later
+    me, partner = ids[0], ids[1]
+    latest = db.query(models.Conversation).filter_by(user_id=me, partner_id=partner).one().last_message_id
+    older = min(m.id for m in conversations.conversation_window(db, me, partner, 5))
+    conversations._upsert(db, me, partner, db.get(models.Message, older), unread=0)
+    db.commit()
+    assert db.query(models.Conversation).filter_by(user_id=me, partner_id=partner).one().last_message_id == latest
+
+    # Marking read up to an id clears exactly those, and the counter is recounted
+    incoming = [m.id for m in conversations.conversation_window(db, me, partner, MESSAGES) if m.sender_id == partner]
+    half = incoming[len(incoming) // 2]
+    marked = conversations.mark_read(db, me, partner, up_to_id=half)
+    db.commit()
+    assert marked == len([m for m in incoming if m <= half])
+    assert summaries(db) == expected_summaries(db)
+    assert conversations.unread_total(db, me) == sum(unread for (user_id, _), (_, unread) in expected_summaries(db).items() if user_id == me)
+    conversations.mark_read(db, me, partner)
+    db.commit()
+    assert summaries(db)[(me, partner)][1] == 0
+
+    # Windows: latest page, scrolling back, and catching up are contiguous and oldest first
+    chat = [m.id for m in db.query(models.Message.id).filter(
+        ((models.Message.sender_id == me) & (models.Message.receiver_id == partner)) |
+        ((models.Message.sender_id == partner) & (models.Message.receiver_id == me))
+    ).order_by(models.Message.id)]
+    latest_page = [m.id for m in conversations.conversation_window(db, me, partner, 10)]
+    assert latest_page == chat[-10:]
+    assert [m.id for m in conversations.conversation_window(db, me, partner, 10, before_id=latest_page[0])] == chat[-20:-10]
+    assert [m.id for m in conversations.conversation_window(db, me, partner, 10, since_id=chat[-15])] == chat[-14:-4]
+
+    # Reconnect catch-up covers every conversation of the user
+    since = chat[-15]
+    mine = [m.id for m in db.query(models.Message.id).filter(
+        models.Message.id > since, (models.Message.sender_id == me) | (models.Message.receiver_id == me)
+    ).order_by(models.Message.id)]
+    assert [m.id for m in conversations.messages_since(db, me, since, MESSAGES)] == mine
+
+    # The 0004 backfill rebuilds the same summaries from the messages
+    before = summaries(db)
+    backfill = importlib.import_module("app.db.migrations.0004_conversations")
+    with engine.begin() as conn:
+        backfill.upgrade(conn)
+    db.expire_all()
+    assert summaries(db) == before, "backfill and incremental summaries differ"
+    print(f"{MESSAGES} messages: {len(before)} conversation summaries consistent")
+    db.close()
+
+if __name__ == "__main__":
+    test_conversations()
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import time
+
+from app.core import events
+from app.core.cache import cache
+from app.services import match_cache
+
+MENTORS = 200
+
+def row(mentor_id, score):
+    return {"mentor_id": mentor_id, "match_score": score}
+
+def test_match_cache():
+    cache.clear()
+    computed_at = time.time()
+    entry = match_cache.new_entry([row(1, 90), row(2, 80), row(3, 70)], 3, computed_at)
+
+    async def store_and_check():
+        await match_cache.store("student@example.edu", entry)
+        assert await cache.aget(match_cache.match_cache_key("student@example.edu")) == entry
+        assert await match_cache.dirty_mentor_ids(entry) == set()
+    asyncio.run(store_and_check())
+
+    # Sync routes (worker threads) and async code publish mentor changes at the same
+    # time; none of them may be lost. A slow read widens any read-modify-write race
+    backend_get = cache.backend.get
+    def slow_get(key):
+        value = backend_get(key)
+        time.sleep(0.001)
+        return value
+    cache.backend.get = slow_get
+
+    def publish_sync(mentor_ids):
+        for mentor_id in mentor_ids:
+            events.publish(events.MENTOR_PROFILE_UPDATED, mentor_id=mentor_id)
+
+    async def publish_async(mentor_ids):
+        for mentor_id in mentor_ids:
+            events.publish(events.MENTOR_TRENDS_UPDATED, mentor_id=mentor_id)
+            await asyncio.sleep(0)
+        await match_cache.drain()
+
+    threads = [threading.Thread(target=publish_sync, args=(range(start, MENTORS, 8),)) for start in range(0, 8, 2)]
+    for thread in threads:
+        thread.start()
+    asyncio.run(publish_async(range(1, MENTORS, 2)))
+    for thread in threads:
+        thread.join()
+    cache.backend.get = backend_get
+
+    dirty = asyncio.run(match_cache.dirty_mentor_ids(entry))
+    assert dirty == set(range(MENTORS)), f"lost {len(set(range(MENTORS)) - dirty)} mentor changes"
+    assert asyncio.run(match_cache.dirty_mentor_ids(match_cache.new_entry([], 3, time.time() + 1))) == set()
+
+    # Re-scored mentors replace their rows; below the old cut-off they drop out
+    merged = match_cache.merge_rescored(entry, {1, 3}, [row(1, 60), row(3, 85)], time.time())
+    assert [m["mentor_id"] for m in merged["matches"]] == [3, 2] and merged["depth"] == 2, merged
+
+    # Student profile edits evict the student's list
+    events.publish(events.STUDENT_PROFILE_UPDATED, user_id=1, email="student@example.edu")
+    assert cache.get(match_cache.match_cache_key("student@example.edu")) is None
+    print(f"Recorded {len(dirty)} concurrent mentor changes")
+
+if __name__ == "__main__":
+    test_match_cache()
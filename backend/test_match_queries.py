@@ -0,0 +1,85 @@
+import asyncio
+import random
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base
+from app.db import models
+from app.db.queries import matching_mentors_select
+from app.db.query_counter import count_queries
+from app.services import ai_service, embedding_store
+from app.services.matching_engine import MatchingEngine
+
+MENTORS = 5000
+MAX_STATEMENTS = 5
+
+def seed(db):
+    topics = [models.ResearchTopic(name=f"Topic {i}") for i in range(50)]
+    db.add_all(topics)
+    db.flush()
+
+    areas = ["machine learning", "computer vision", "genomics", "robotics", "quantum computing"]
+    for i in range(MENTORS):
+        user = models.User(email=f"mentor{i}@example.edu", name=f"Mentor {i}", role="mentor", is_active=True)
+        mentor = models.MentorProfile(
+            user=user,
+            research_areas=random.choice(areas),
+            bio=f"Works on {random.choice(areas)}",
+            preferred_backgrounds="cs",
+            accepting_phd_students="Yes"
+        )
+        mentor.topic_trends = [
+            models.MentorTopicTrend(topic=topic, trend_status="Stable", total_count=random.randint(1, 9), last_active_year=2024)
+            for topic in random.sample(topics, 3)
+        ]
+        db.add(mentor)
+    db.flush()
+
+    # Fresh stored embeddings, so the match makes no embedding calls
+    for mentor in db.query(models.MentorProfile).all():
+        text = embedding_store.mentor_embedding_text(mentor)
+        vec = [random.random() for _ in range(8)]
+        db.add(models.MentorEmbedding(
+            mentor_id=mentor.id,
+            content_hash=embedding_store.content_hash(text),
+            model=ai_service.EMBEDDING_MODEL,
+            dimensions=len(vec),
+            vector=embedding_store.pack_vector(vec)
+        ))
+
+    student_user = models.User(email="student@example.edu", name="Student", role="student", is_active=True)
+    student = models.StudentProfile(user=student_user, major="CS", primary_skills="python", research_interests="machine learning")
+    db.add(student)
+    db.commit()
+    return student
+
+def test_match_queries():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    seed_db = Session()
+    seed(seed_db)
+    seed_db.close()
+
+    # Fresh session, so nothing is already in the identity map
+    db = Session()
+    try:
+        student = db.query(models.StudentProfile).first()
+        student_vec = [random.random() for _ in range(8)]
+
+        with count_queries(engine) as queries:
+            mentors = db.execute(matching_mentors_select()).scalars().all()
+            mentor_vectors = asyncio.run(embedding_store.load_mentor_vectors(db, mentors))
+            matches = asyncio.run(MatchingEngine.match_student_with_mentors(
+                student, mentors, mentor_vectors, student_vec=student_vec, limit=50
+            ))
+
+        assert len(mentors) == MENTORS
+        print(f"Matched {len(mentors)} mentors ({len(matches)} returned) with {queries.count} SQL statements")
+        assert queries.count < MAX_STATEMENTS, str(queries)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    test_match_queries()
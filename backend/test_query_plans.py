@@ -0,0 +1,143 @@
+import os
+import tempfile
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.security import create_access_token
+from app.db import migrate, models
+from app.db.database import get_async_db, get_db
+from app.db.query_counter import count_queries
+from app.db.query_plan import full_table_scans
+from app.main import app
+from app.services import analytics_rollup
+
+# Tables these endpoints are meant to read whole (small reference tables)
+ALLOWED_SCANS = {"skills", "research_topics"}
+
+def seed(db):
+    mentor_user = models.User(email="mentor@example.edu", name="Mentor", role="mentor", is_active=True)
+    student_user = models.User(email="student@example.edu", name="Student", role="student", is_active=True)
+    mentor = models.MentorProfile(user=mentor_user, research_areas="machine learning")
+    student = models.StudentProfile(user=student_user, major="CS", primary_skills="python")
+    student.projects = [models.Project(title="Thesis")]
+    student.educations = [models.Education(institution="Uni")]
+    student.work_experiences = [models.WorkExperience(company="Lab")]
+    db.add_all([mentor, student])
+    db.flush()
+
+    start = datetime.utcnow()
+    opportunity = models.Opportunity(mentor_id=mentor_user.id, title="RA", description="Assist with experiments", type="research_assistant", is_open=True)
+    db.add(opportunity)
+    db.flush()
+    assignment = models.Assignment(opportunity_id=opportunity.id, title="Task", description="Reproduce baseline", type="code")
+    plan = models.ImprovementPlan(student_id=student_user.id, opportunity_id=opportunity.id)
+    plan.items = [models.PlanItem(title="Read papers", type="skill", status="pending")]
+    topic = models.ResearchTopic(name="Deep Learning")
+    db.add_all([
+        assignment, plan, topic,
+        models.Application(student_id=student_user.id, opportunity_id=opportunity.id, match_score=80.0),
+        models.PublicationProject(title="Paper", student_id=student_user.id, mentor_id=mentor_user.id),
+        models.Certificate(uuid="cert-1", student_id=student_user.id, mentor_id=mentor_user.id, opportunity_id=opportunity.id, pdf_url="/uploads/cert-1.pdf"),
+        models.Reference(mentor_id=mentor_user.id, student_id=student_user.id, content="Great"),
+        models.Meeting(organizer_id=mentor_user.id, attendee_id=student_user.id, title="Sync", start_time=start, end_time=start + timedelta(hours=1)),
+        models.SavedResearchGap(student_id=student_user.id, mentor_id=mentor.id, title="Gap", description="Unexplored", type="method"),
+        models.MentorTopicTrend(mentor_id=mentor.id, topic=topic, total_count=3, trend_status="Rising"),
+        models.Publication(mentor_profile_id=mentor.id, title="Paper", publication_date="2024")
+    ])
+    db.flush()
+    db.add(models.Submission(assignment_id=assignment.id, student_id=student_user.id, content="Done"))
+    for i in range(10):
+        sender, receiver = (student_user, mentor_user) if i % 2 else (mentor_user, student_user)
+        db.add(models.Message(sender_id=sender.id, receiver_id=receiver.id, content=f"Hi {i}", timestamp=start + timedelta(minutes=i)))
+    db.commit()
+    # Dashboard reads come from the rollup; its refresh aggregates whole tables by design
+    analytics_rollup.refresh(db)
+    return student_user.id, mentor_user.id, mentor.id, opportunity.id, assignment.id, plan.id
+
+def test_query_plans():
+    path = os.path.join(tempfile.mkdtemp(), "plans.db")
+    engine = create_engine(f"sqlite:///{path}")
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    migrate.upgrade(engine)
+
+    Session = sessionmaker(bind=engine)
+    AsyncSession = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+    seed_db = Session()
+    student_id, mentor_user_id, mentor_id, opportunity_id, assignment_id, plan_id = seed(seed_db)
+    seed_db.close()
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_async_db():
+        async with AsyncSession() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_async_db] = override_async_db
+    client = TestClient(app)
+    student = {"Authorization": "Bearer " + create_access_token({"sub": "student@example.edu"})}
+    mentor = {"Authorization": "Bearer " + create_access_token({"sub": "mentor@example.edu"})}
+
+    requests = [
+        (student, f"/comm/messages/{mentor_user_id}"),
+        (student, "/comm/conversations"),
+        (student, "/comm/unread"),
+        (student, "/comm/meetings/"),
+        (student, "/applications/me"),
+        (student, "/improvement/"),
+        (student, f"/improvement/{plan_id}"),
+        (student, f"/assignments/{assignment_id}/submissions"),
+        (student, "/research/my"),
+        (student, "/certificates/my/certificates"),
+        (student, "/intelligence/saved-gaps"),
+        (student, "/realworld/interests"),
+        (student, f"/references/student/{student_id}"),
+        (student, f"/opportunities/?mentor_id={mentor_user_id}"),
+        (mentor, "/applications/mentor"),
+        (mentor, "/analytics/dashboard"),
+        (mentor, "/analytics/timeseries/acceptance_rate"),
+        (mentor, f"/analytics/timeseries/applications?opportunity_id={opportunity_id}"),
+        (mentor, f"/assignments/opportunity/{opportunity_id}"),
+        (mentor, f"/improvement/mentor/{opportunity_id}"),
+        (mentor, f"/intelligence/mentors/{mentor_id}/analytics"),
+        (mentor, f"/intelligence/mentors/{mentor_id}/jobs"),
+    ]
+
+    problems = []
+    try:
+        for headers, url in requests:
+            with ExitStack() as stack:
+                queries = stack.enter_context(count_queries(engine))
+                async_queries = stack.enter_context(count_queries(async_engine.sync_engine))
+                response = client.get(url, headers=headers)
+            assert response.status_code == 200, f"{url}: {response.status_code} {response.text}"
+
+            recorded = list(zip(queries.statements, queries.parameters)) + \
+                list(zip(async_queries.statements, async_queries.parameters))
+            with engine.connect() as conn:
+                for statement, parameters in recorded:
+                    if not statement.lstrip().upper().startswith("SELECT"):
+                        continue
+                    scans = [t for t in full_table_scans(conn, statement, parameters) if t not in ALLOWED_SCANS]
+                    if scans:
+                        problems.append(f"{url}: full scan of {', '.join(scans)}\n    {statement}")
+            print(f"{url}: {len(recorded)} statements")
+    finally:
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+    assert not problems, "\n".join(problems)
+    print(f"No unexpected full-table scans across {len(requests)} endpoints")
+
+if __name__ == "__main__":
+    test_query_plans()
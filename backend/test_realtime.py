@@ -0,0 +1,130 @@
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.websockets import WebSocketDisconnect
+
+from app.api import communication
+from app.core import events
+from app.core.config import settings
+from app.core.realtime import RESYNC_EVENT, hub
+from app.core.security import create_access_token
+from app.db import migrate, models
+from app.main import app
+from app.services import conversations
+
+MESSAGES = 12
+
+def socket_url(email, since_id=None):
+    url = "/comm/ws?token=" + create_access_token({"sub": email})
+    return url if since_id is None else f"{url}&since_id={since_id}"
+
+def hang_up(ws):
+    # TestClient cancels the handler right after the disconnect it sends on exit;
+    # let the handler see the disconnect and unsubscribe first
+    ws.close()
+    deadline = time.monotonic() + 5
+    while hub.stats()["sockets"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert hub.stats()["sockets"] == 0, hub.stats()
+
+def test_realtime():
+    path = os.path.join(tempfile.mkdtemp(), "realtime.db")
+    engine = create_engine(f"sqlite:///{path}")
+    migrate.upgrade(engine)
+    db = sessionmaker(bind=engine)()
+    student = models.User(email="student@example.edu", name="Student", role="student", is_active=True)
+    mentor = models.User(email="mentor@example.edu", name="Mentor", role="mentor", is_active=True)
+    db.add_all([student, mentor])
+    db.commit()
+    start = datetime.utcnow()
+    for i in range(MESSAGES):
+        sender, receiver = (student, mentor) if i % 2 else (mentor, student)
+        message = models.Message(sender_id=sender.id, receiver_id=receiver.id, content=f"Hi {i}", timestamp=start + timedelta(minutes=i))
+        db.add(message)
+        db.flush()
+        conversations.record_message(db, message)
+    db.commit()
+    ids = [m.id for m in db.query(models.Message).order_by(models.Message.id)]
+
+    # The socket opens its own sessions rather than taking a dependency
+    session_local = communication.AsyncSessionLocal
+    replay_limit, queue_size = settings.REALTIME_REPLAY_LIMIT, hub.queue_size
+    communication.AsyncSessionLocal = async_sessionmaker(bind=create_async_engine(f"sqlite+aiosqlite:///{path}"), expire_on_commit=False)
+    try:
+        with TestClient(app) as client:
+            # A bad token is refused before the handshake completes
+            try:
+                with client.websocket_connect("/comm/ws?token=bogus") as ws:
+                    ws.receive_json()
+                raise AssertionError("socket accepted a bad token")
+            except WebSocketDisconnect as e:
+                assert e.code == 1008, e.code
+
+            # Reconnecting with since_id replays what was missed, oldest first, and a
+            # live event for a replayed message is not sent twice
+            since = ids[4]
+            with client.websocket_connect(socket_url("student@example.edu", since)) as ws:
+                replayed = [ws.receive_json()["message"]["id"] for _ in ids[5:]]
+                assert replayed == ids[5:], replayed
+                events.publish(events.MESSAGE_SENT, message=conversations.message_payload(db.get(models.Message, ids[-1])))
+                new = models.Message(sender_id=mentor.id, receiver_id=student.id, content="Live", timestamp=datetime.utcnow())
+                db.add(new)
+                db.flush()
+                conversations.record_message(db, new)
+                db.commit()
+                events.publish(events.MESSAGE_SENT, message=conversations.message_payload(new))
+                assert ws.receive_json()["message"]["id"] == new.id
+
+                # Client frames: ping, a read receipt (also pushed back to the reader's
+                # own sockets), and malformed frames
+                ws.send_json({"type": "ping"})
+                assert ws.receive_json() == {"type": "pong"}
+                ws.send_json({"type": "read", "partner_id": mentor.id})
+                receipt = ws.receive_json()
+                assert receipt["type"] == "message.read" and receipt["reader_id"] == student.id and receipt["count"] > 0, receipt
+                ws.send_json({"type": "shout"})
+                assert ws.receive_json()["type"] == "error"
+                ws.send_json({"type": "read"})
+                assert ws.receive_json()["type"] == "error"
+                hang_up(ws)
+            db.expire_all()
+            assert conversations.unread_total(db, student.id) == 0
+
+            # More missed messages than a replay holds: the client is told to resync
+            settings.REALTIME_REPLAY_LIMIT = 3
+            with client.websocket_connect(socket_url("mentor@example.edu", 0)) as ws:
+                replayed = [ws.receive_json()["message"]["id"] for _ in range(3)]
+                assert replayed == ids[:3], replayed
+                assert ws.receive_json() == RESYNC_EVENT
+                hang_up(ws)
+
+            # A client that falls behind gets one resync and is disconnected, rather
+            # than buffering without bound
+            hub.queue_size = 3
+            with client.websocket_connect(socket_url("mentor@example.edu")) as ws:
+                ws.send_json({"type": "ping"})
+                assert ws.receive_json() == {"type": "pong"}
+                # Deliver a burst in one loop callback so the socket can't drain in between
+                burst = [{"type": "meeting.updated", "meeting": {"id": i}} for i in range(10)]
+                hub._loop.call_soon_threadsafe(lambda: [hub._deliver([mentor.id], event) for event in burst])
+                assert ws.receive_json() == RESYNC_EVENT
+                try:
+                    ws.receive_json()
+                    raise AssertionError("overflowed socket stayed open")
+                except WebSocketDisconnect:
+                    pass
+                hang_up(ws)
+    finally:
+        communication.AsyncSessionLocal = session_local
+        settings.REALTIME_REPLAY_LIMIT, hub.queue_size = replay_limit, queue_size
+        db.close()
+    print(f"Replayed {len(ids) - 5} missed messages; resync on replay limit and on overflow")
+
+if __name__ == "__main__":
+    test_realtime()
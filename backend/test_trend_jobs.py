@@ -0,0 +1,87 @@
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.database import Base
+from app.db import models
+from app.services import trend_jobs
+from app.services.research_service import ResearchService
+
+MENTORS = 3
+ANALYSIS_SECONDS = 1.0
+
+def seed(db):
+    for i in range(MENTORS):
+        user = models.User(email=f"mentor{i}@example.edu", name=f"Mentor {i}", role="mentor", is_active=True)
+        mentor = models.MentorProfile(user=user, research_areas="machine learning")
+        mentor.publications = [models.Publication(title=f"Paper {i}", description="Graph neural networks", publication_date="2024")]
+        db.add(mentor)
+    db.commit()
+
+def test_trend_jobs():
+    path = os.path.join(tempfile.mkdtemp(), "trend_jobs.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        seed(db)
+
+    analysed = []
+    async def slow_analysis(db, mentor_id):
+        # Each analysis outlasts the stale window on its own
+        analysed.append(mentor_id)
+        await asyncio.sleep(ANALYSIS_SECONDS)
+
+    session_local, analyze_trends, stale_seconds = trend_jobs.AsyncSessionLocal, ResearchService.__dict__["analyze_trends"], settings.TREND_JOB_STALE_SECONDS
+    trend_jobs.AsyncSessionLocal = async_sessionmaker(bind=create_async_engine(f"sqlite+aiosqlite:///{path}"), expire_on_commit=False)
+    ResearchService.analyze_trends = staticmethod(slow_analysis)
+    settings.TREND_JOB_STALE_SECONDS = 0.3
+    try:
+        with Session() as db:
+            run, resumed = trend_jobs.start_run(db, "all")
+            run_id = run.id
+        assert not resumed and run.total == MENTORS
+
+        async def execute_and_start_again():
+            execution = asyncio.create_task(trend_jobs.execute(run_id, concurrency=1))
+            # Mid-analysis, well past the stale window: the run is still live, so a
+            # second start must not resume it alongside this one
+            await asyncio.sleep(ANALYSIS_SECONDS * 0.8)
+            with Session() as db:
+                assert not trend_jobs.is_abandoned(db.get(models.TrendRun, run_id)), "live run looks abandoned"
+                try:
+                    trend_jobs.start_run(db, "all")
+                    raise AssertionError("a live run was resumed")
+                except RuntimeError:
+                    pass
+            await execution
+        asyncio.run(execute_and_start_again())
+
+        with Session() as db:
+            status = trend_jobs.run_status(db, run_id)
+        assert status["status"] == "completed" and status["done"] == MENTORS, status
+        assert sorted(analysed) == sorted(m["mentor_id"] for m in status["mentors"]), analysed
+
+        # A run whose runner went quiet is resumed with only its pending mentors
+        with Session() as db:
+            run, _ = trend_jobs.start_run(db, "all")
+            item = run.items[0]
+            item.status, run.done = "done", 1
+            run.heartbeat_at = datetime.utcnow() - timedelta(seconds=1)
+            db.commit()
+            resumed_run, resumed = trend_jobs.start_run(db, "all")
+            assert resumed and resumed_run.id == run.id
+            assert [mentor_id for _, mentor_id in trend_jobs._pending_items(db, run.id)] == [i.mentor_id for i in run.items[1:]]
+    finally:
+        trend_jobs.AsyncSessionLocal, ResearchService.analyze_trends = session_local, analyze_trends
+        settings.TREND_JOB_STALE_SECONDS = stale_seconds
+    print(f"Trend run of {MENTORS} mentors stayed live through {ANALYSIS_SECONDS:.0f} s analyses")
+
+if __name__ == "__main__":
+    test_trend_jobs()
@@ -0,0 +1,126 @@
+import asyncio
+import random
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.database import Base
+from app.db import models
+from app.db.query_counter import count_queries
+from app.services import ai_service, trend_stats
+from app.services.research_service import ResearchService
+
+TOPICS = ["Graph Neural Networks", "Protein Folding", "Reinforcement Learning", "Explainable AI", "Causal Inference", "Robotics"]
+# Wordings that never name the topic literally; only the embeddings link them
+SYNONYMS = {"GNNs": "Graph Neural Networks", "AlphaFold": "Protein Folding", "policy gradients": "Reinforcement Learning"}
+FILLER = ["we study", "a novel approach to", "results on", "benchmarks for", "applications of", "survey of"]
+
+def seed(db, papers):
+    user = models.User(email=f"mentor{papers}@example.edu", name="Mentor", role="mentor", is_active=True)
+    mentor = models.MentorProfile(user=user, research_areas="machine learning")
+    mentor.publications = [
+        models.Publication(
+            title=f"{random.choice(FILLER)} {random.choice(TOPICS).lower()}",
+            description=" ".join(random.choice(FILLER + TOPICS + list(SYNONYMS)) for _ in range(12)),
+            publication_date=str(random.randint(2015, 2025))
+        )
+        for _ in range(papers)
+    ]
+    db.add(mentor)
+    db.commit()
+    return mentor.id
+
+def mentioned(text):
+    """Topics a text names or describes by a synonym."""
+    text = text.lower()
+    return {name for name in TOPICS if name.lower() in text} | \
+        {name for synonym, name in SYNONYMS.items() if synonym.lower() in text}
+
+embedded_papers = []
+
+async def fake_embeddings(texts):
+    """One dimension per topic, so a paper is similar to exactly the topics it mentions."""
+    embedded_papers.extend(text for text in texts if text not in TOPICS)
+    return [[1.0 if name in mentioned(text) else 0.0 for name in TOPICS] for text in texts]
+
+def expected_links(db, mentor_id):
+    """The original per-topic, per-paper `in` test, plus synonyms."""
+    topics = {t.name: t.id for t in db.query(models.ResearchTopic)}
+    links = set()
+    for pub in db.query(models.Publication).filter(models.Publication.mentor_profile_id == mentor_id):
+        links |= {(pub.id, topics[name]) for name in mentioned(pub.title + " " + (pub.description or ""))}
+    return links
+
+def expected_trend(buckets, topic_id, window, current_year, ratio):
+    """Per-topic loop over the buckets, for checking the vectorized derivation."""
+    years = [(year, count) for topic, year, count, _ in buckets if topic == topic_id]
+    recent = sum(count for year, count in years if current_year - window < year <= current_year)
+    previous = sum(count for year, count in years if current_year - 2 * window < year <= current_year - window)
+    if recent == 0 or previous > recent * ratio:
+        return "Declining", recent, previous
+    return ("Rising" if recent > previous * ratio else "Stable"), recent, previous
+
+def analyze(Session, engine, mentor_id):
+    db = Session()
+    try:
+        with count_queries(engine) as queries:
+            asyncio.run(ResearchService.analyze_trends(db, mentor_id))
+        return queries.count
+    finally:
+        db.close()
+
+async def fake_topics(abstracts):
+    return TOPICS + ["", "Robotics"]  # blank and duplicate names are ignored
+
+def test_trend_queries():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    originals = (ai_service.extract_research_topics, ai_service.get_embeddings, settings.TOPIC_SIMILARITY_THRESHOLD)
+    ai_service.extract_research_topics = fake_topics
+    ai_service.get_embeddings = fake_embeddings
+    # Mentioning all six topics gives a cosine of 1/sqrt(6) with each
+    settings.TOPIC_SIMILARITY_THRESHOLD = 0.4
+    try:
+        check_trend_queries(Session, engine)
+    finally:
+        ai_service.extract_research_topics, ai_service.get_embeddings, settings.TOPIC_SIMILARITY_THRESHOLD = originals
+
+def check_trend_queries(Session, engine):
+    counts = {}
+    for papers in (10, 300):
+        db = Session()
+        mentor_id = seed(db, papers)
+        db.close()
+        counts[papers] = [analyze(Session, engine, mentor_id)]
+        assert len(embedded_papers) == papers, len(embedded_papers)
+        counts[papers].append(analyze(Session, engine, mentor_id))
+        assert len(embedded_papers) == papers, "unchanged papers were embedded again"
+        embedded_papers.clear()
+
+        db = Session()
+        stored = set(db.query(models.PublicationTopic.publication_id, models.PublicationTopic.topic_id)
+                     .join(models.Publication).filter(models.Publication.mentor_profile_id == mentor_id))
+        assert stored == expected_links(db, mentor_id), "links differ from the per-paper topic match"
+        trends = db.query(models.MentorTopicTrend).filter(models.MentorTopicTrend.mentor_id == mentor_id).all()
+        assert sum(t.total_count for t in trends) == len(stored)
+        buckets = [(r.topic_id, r.year, r.publications, r.citations) for r in
+                   db.query(models.MentorTopicYear).filter(models.MentorTopicYear.mentor_id == mentor_id)]
+        assert sum(count for _, _, count, _ in buckets) == len(stored)
+        assert trend_stats.refresh(db, [mentor_id]) == 0, "stored trends differ from the year buckets"
+        for window in (1, 3, 5):
+            for trend in trend_stats.derive(buckets, window, 2024, 1.5):
+                expected = expected_trend(buckets, trend["topic_id"], window, 2024, 1.5)
+                assert (trend["status"], trend["recent"], trend["previous"]) == expected, (window, trend, expected)
+        db.close()
+        print(f"{papers} papers: {counts[papers][0]} statements, re-analysis {counts[papers][1]}, {len(stored)} links")
+
+    assert counts[10][1] == counts[300][1], counts
+    db = Session()
+    assert db.query(models.ResearchTopic).count() == len(TOPICS)
+    db.close()
+
+if __name__ == "__main__":
+    test_trend_queries()
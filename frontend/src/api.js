@@ -23,6 +23,24 @@ api.interceptors.request.use(
   }
 );
 
+// Paginated list endpoints return one page at a time and put the cursor for the
+// next one in the X-Next-Cursor header (absent on the last page). Screens that
+// show whole lists fetch every page.
+const PAGE_SIZE = 200;
+
+const getAllPages = async (path, params = {}) => {
+  const rows = [];
+  let cursor = null;
+  do {
+    const response = await api.get(path, {
+      params: { ...params, limit: PAGE_SIZE, ...(cursor ? { cursor } : {}) },
+    });
+    rows.push(...response.data);
+    cursor = response.headers["x-next-cursor"];
+  } while (cursor);
+  return rows;
+};
+
 export const login = async (email, password) => {
   const response = await api.post("/auth/login", { email, password });
   return response.data;
@@ -39,8 +57,7 @@ export const getMe = async () => {
 };
 
 export const getUsers = async () => {
-  const response = await api.get("/users/");
-  return response.data;
+  return getAllPages("/users/");
 };
 
 // Profile APIs
@@ -92,13 +109,11 @@ export const verifyMentor = async (userId) => {
 };
 
 export const getAllStudents = async () => {
-  const response = await api.get("/admin/users/students");
-  return response.data;
+  return getAllPages("/admin/users/students");
 };
 
 export const getAllMentors = async () => {
-  const response = await api.get("/admin/users/mentors");
-  return response.data;
+  return getAllPages("/admin/users/mentors");
 };
 
 export const createAdminOpportunity = async (data) => {
@@ -107,8 +122,7 @@ export const createAdminOpportunity = async (data) => {
 };
 
 export const getAllApplications = async () => {
-  const response = await api.get("/admin/applications");
-  return response.data;
+  return getAllPages("/admin/applications");
 };
 
 // Opportunity APIs
@@ -118,9 +132,7 @@ export const createOpportunity = async (data) => {
 };
 
 export const getOpportunities = async (filters = {}) => {
-  const params = new URLSearchParams(filters).toString();
-  const response = await api.get(`/opportunities/?${params}`);
-  return response.data;
+  return getAllPages("/opportunities/", filters);
 };
 
 // Certificate APIs
@@ -145,6 +157,14 @@ export const getAnalytics = async () => {
   return response.data;
 };
 
+// metric: applications, applications_accepted, acceptance_rate, certificates,
+// projects_started, projects_published or funding_committed. params: start, end
+// (YYYY-MM-DD), interval (day/week/month), opportunity_id, mentor_id (admins).
+export const getAnalyticsTimeseries = async (metric, params = {}) => {
+  const response = await api.get(`/analytics/timeseries/${metric}`, { params });
+  return response.data;
+};
+
 export const getOpportunity = async (id) => {
   const response = await api.get(`/opportunities/${id}`);
   return response.data;
@@ -177,8 +197,7 @@ export const getMyApplications = async () => {
 };
 
 export const getMentorApplications = async () => {
-  const response = await api.get("/applications/mentor");
-  return response.data;
+  return getAllPages("/applications/mentor");
 };
 
 export const updateApplicationStatus = async (id, status) => {
@@ -260,16 +279,39 @@ export const sendMessage = async (data) => {
   return response.data;
 };
 
-export const getChatHistory = async (otherUserId) => {
-  const response = await api.get(`/comm/messages/${otherUserId}`);
+// A window of the chat, oldest first: the latest messages, or those before
+// `beforeId` / after `sinceId`. hasMore says whether another window lies that way.
+export const getChatHistory = async (otherUserId, { beforeId, sinceId } = {}) => {
+  const params = {};
+  if (beforeId) params.before_id = beforeId;
+  if (sinceId) params.since_id = sinceId;
+  const response = await api.get(`/comm/messages/${otherUserId}`, { params });
+  return { messages: response.data, hasMore: response.headers["x-has-more"] === "true" };
+};
+
+export const markMessagesRead = async (otherUserId, upToId) => {
+  const response = await api.post(`/comm/messages/${otherUserId}/read`, { up_to_id: upToId });
   return response.data;
 };
 
-export const getConversations = async () => {
-  const response = await api.get("/comm/conversations");
+export const getUnreadTotal = async () => {
+  const response = await api.get("/comm/unread");
   return response.data;
 };
 
+export const getConversations = async () => {
+  return getAllPages("/comm/conversations");
+};
+
+// Real-time chat: pushes message.new / message.read / meeting.updated events.
+// Pass the newest message id already shown to receive anything missed meanwhile.
+export const openChatSocket = (sinceId) => {
+  const token = localStorage.getItem("token");
+  const params = new URLSearchParams({ token });
+  if (sinceId) params.set("since_id", sinceId);
+  return new WebSocket(`${API_URL.replace(/^http/, "ws")}/comm/ws?${params}`);
+};
+
 export const scheduleMeeting = async (data) => {
   const response = await api.post("/comm/meetings/", data);
   return response.data;
@@ -372,8 +414,7 @@ export const createVisit = async (data) => {
 };
 
 export const getVisits = async () => {
-  const response = await api.get("/realworld/visits");
-  return response.data;
+  return getAllPages("/realworld/visits");
 };
 
 export const enrollVisit = async (visitId) => {
@@ -387,8 +428,7 @@ export const createBeehiveEvent = async (data) => {
 };
 
 export const getBeehiveEvents = async () => {
-  const response = await api.get("/realworld/beehive");
-  return response.data;
+  return getAllPages("/realworld/beehive");
 };
 
 export const enrollBeehive = async (eventId) => {
@@ -402,8 +442,7 @@ export const createBeehiveContact = async (data) => {
 };
 
 export const getBeehiveContacts = async () => {
-  const response = await api.get("/realworld/beehive/contact");
-  return response.data;
+  return getAllPages("/realworld/beehive/contact");
 };
 
 export default api;
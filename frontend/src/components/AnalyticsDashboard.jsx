@@ -1,10 +1,11 @@
 import React, { useEffect, useState } from 'react';
-import { getAnalytics } from '../api';
+import { getAnalytics, getAnalyticsTimeseries } from '../api';
 import { FiUsers, FiActivity, FiBook, FiDollarSign, FiAward } from 'react-icons/fi';
 import CubeLoader from './ui/CubeLoader';
 
 const AnalyticsDashboard = ({ title = "Platform Analytics" }) => {
   const [data, setData] = useState(null);
+  const [applicationsSeries, setApplicationsSeries] = useState(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -12,6 +13,8 @@ const AnalyticsDashboard = ({ title = "Platform Analytics" }) => {
       try {
         const result = await getAnalytics();
         setData(result);
+        // Mentors and admins only; others just don't get the chart
+        getAnalyticsTimeseries('applications').then(setApplicationsSeries).catch(() => {});
       } catch (err) {
         console.error("Failed to load analytics", err);
       } finally {
@@ -29,6 +32,8 @@ const AnalyticsDashboard = ({ title = "Platform Analytics" }) => {
   
   if (!data) return <div className="text-stone-500 italic p-4">No analytics data available</div>;
 
+  const seriesPeak = applicationsSeries ? Math.max(1, ...applicationsSeries.points.map((point) => point.value)) : 1;
+
   const StatCard = ({ icon: Icon, title, mainValue, subLabel, secondaryValue, secondaryLabel }) => (
     <div className="bg-[var(--color-academia-cream)] p-4 md:p-6 rounded-sm border border-[var(--color-academia-gold)] relative overflow-hidden group hover:shadow-md transition-all duration-300 h-full">
         <div className="absolute top-0 right-0 p-4 opacity-5 transform group-hover:scale-110 transition-transform duration-500">
@@ -60,6 +65,12 @@ const AnalyticsDashboard = ({ title = "Platform Analytics" }) => {
       <h2 className="text-xl md:text-2xl font-serif font-bold mb-8 text-[var(--color-academia-charcoal)] flex items-center">
         <span className="w-2 h-8 bg-[var(--color-academia-gold)] mr-3 rounded-sm"></span>
         {title}
+        {data.as_of && (
+          // as_of is naive UTC; rollups may be a few minutes old
+          <span className="ml-auto text-xs font-sans font-normal text-stone-500">
+            Updated {new Date(data.as_of + 'Z').toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })}
+          </span>
+        )}
       </h2>
       
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-4 md:gap-6">
@@ -113,6 +124,25 @@ const AnalyticsDashboard = ({ title = "Platform Analytics" }) => {
             subLabel="Committed Grants"
         />
       </div>
+
+      {applicationsSeries && (
+        <div className="mt-6 bg-white p-6 rounded-sm border border-stone-200 shadow-sm">
+            <div className="flex justify-between items-baseline mb-4">
+                <h3 className="text-sm font-bold uppercase tracking-wider text-[var(--color-academia-charcoal)]">Applications per {applicationsSeries.interval}</h3>
+                <span className="text-xs text-stone-500">{applicationsSeries.total} since {applicationsSeries.start}</span>
+            </div>
+            <div className="flex items-end gap-[2px] h-24">
+                {applicationsSeries.points.map((point) => (
+                    <div
+                        key={point.date}
+                        title={`${point.date}: ${point.value}`}
+                        className="flex-1 bg-[var(--color-academia-gold)] opacity-80 rounded-t-sm"
+                        style={{ height: `${(point.value / seriesPeak) * 100}%` }}
+                    />
+                ))}
+            </div>
+        </div>
+      )}
     </div>
   );
 };
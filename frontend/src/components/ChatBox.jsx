@@ -1,42 +1,99 @@
 import React, { useState, useEffect, useRef } from 'react';
-import { sendMessage, getChatHistory } from '../api';
+import { sendMessage, getChatHistory, markMessagesRead, openChatSocket } from '../api';
 import { useAuth } from '../context/AuthContext';
 
 const ChatBox = ({ otherUser }) => {
     const { user } = useAuth();
     const [messages, setMessages] = useState([]);
     const [newMessage, setNewMessage] = useState('');
+    const [hasOlder, setHasOlder] = useState(false);
     const messagesEndRef = useRef(null);
+    const lastIdRef = useRef(0);
 
     useEffect(() => {
-        if (otherUser) {
-            fetchMessages();
-            // Polling for new messages (simple implementation)
-            const interval = setInterval(fetchMessages, 5000);
-            return () => clearInterval(interval);
-        }
+        if (!otherUser) return;
+        let socket = null;
+        let retryTimer = null;
+        let closed = false;
+
+        // Load the history once, then let the server push new messages
+        const connect = () => {
+            socket = openChatSocket(lastIdRef.current);
+            socket.onmessage = (e) => {
+                const event = JSON.parse(e.data);
+                if (event.type === 'message.new') {
+                    const msg = event.message;
+                    if (msg.sender_id !== otherUser.id && msg.receiver_id !== otherUser.id) return;
+                    addMessages([msg]);
+                    if (msg.sender_id === otherUser.id) {
+                        socket.send(JSON.stringify({ type: 'read', partner_id: otherUser.id, up_to_id: msg.id }));
+                    }
+                } else if (event.type === 'resync') {
+                    fetchMessages();
+                }
+            };
+            socket.onclose = () => {
+                // Reconnect; since_id replays whatever arrived while disconnected
+                if (!closed) retryTimer = setTimeout(connect, 3000);
+            };
+        };
+
+        setMessages([]);
+        lastIdRef.current = 0;
+        fetchMessages().then(connect);
+        return () => {
+            closed = true;
+            clearTimeout(retryTimer);
+            if (socket) socket.close();
+        };
     }, [otherUser]);
 
     useEffect(() => {
         scrollToBottom();
     }, [messages]);
 
+    const addMessages = (incoming) => {
+        incoming.forEach((msg) => { lastIdRef.current = Math.max(lastIdRef.current, msg.id); });
+        setMessages((current) => {
+            const known = new Set(current.map((msg) => msg.id));
+            return [...current, ...incoming.filter((msg) => !known.has(msg.id))];
+        });
+    };
+
     const fetchMessages = async () => {
         try {
-            const data = await getChatHistory(otherUser.id);
+            const { messages: data, hasMore } = await getChatHistory(otherUser.id);
+            data.forEach((msg) => { lastIdRef.current = Math.max(lastIdRef.current, msg.id); });
             setMessages(data);
+            setHasOlder(hasMore);
+            const lastIncoming = data.filter((msg) => msg.sender_id === otherUser.id && !msg.read).pop();
+            if (lastIncoming) await markMessagesRead(otherUser.id, lastIncoming.id);
         } catch (err) {
             console.error("Failed to fetch messages", err);
         }
     };
 
+    const fetchOlder = async () => {
+        if (messages.length === 0) return;
+        try {
+            const { messages: older, hasMore } = await getChatHistory(otherUser.id, { beforeId: messages[0].id });
+            setMessages((current) => {
+                const known = new Set(current.map((msg) => msg.id));
+                return [...older.filter((msg) => !known.has(msg.id)), ...current];
+            });
+            setHasOlder(hasMore);
+        } catch (err) {
+            console.error("Failed to fetch older messages", err);
+        }
+    };
+
     const handleSend = async (e) => {
         e.preventDefault();
         if (!newMessage.trim()) return;
 
         try {
             const msg = await sendMessage({ receiver_id: otherUser.id, content: newMessage });
-            setMessages([...messages, msg]);
+            addMessages([msg]);
             setNewMessage('');
         } catch (err) {
             console.error("Failed to send message", err);
@@ -57,6 +114,11 @@ const ChatBox = ({ otherUser }) => {
             </div>
             
             <div className="flex-1 overflow-y-auto p-4 space-y-3">
+                {hasOlder && (
+                    <button onClick={fetchOlder} className="block mx-auto text-xs text-indigo-600 hover:underline">
+                        Load earlier messages
+                    </button>
+                )}
                 {messages.length === 0 && (
                     <p className="text-center text-gray-400 text-sm mt-10">No messages yet. Say hello!</p>
                 )}